@@ -0,0 +1,101 @@
+# app/cache.py
+"""
+In-process caching primitives.
+
+  - TTLCache: bounded LRU whose entries are fresh for `ttl` seconds and then
+    still servable as stale for `stale_ttl` seconds (stale-while-revalidate).
+  - SingleFlight: coalesces concurrent calls for the same key into one await.
+
+Both are per-process and assume a single event loop (no thread locking).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.fresh_until
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry (fresh or stale) and mark it recently used, or None."""
+        e = self._data.get(key)
+        if e is None:
+            self.misses += 1
+            return None
+        if time.monotonic() >= e.stale_until:
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        if e.fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return e
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, stale_ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        fresh_until = now + (self.ttl if ttl is None else ttl)
+        stale_until = fresh_until + (self.stale_ttl if stale_ttl is None else stale_ttl)
+        self._data[key] = CacheEntry(value, fresh_until, stale_until)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+
+class SingleFlight:
+    """
+    Run at most one `fn()` per key at a time; concurrent callers share its result.
+    The shared call runs as its own task, so a cancelled waiter doesn't cancel it.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        return await asyncio.shield(task)
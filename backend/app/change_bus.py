@@ -0,0 +1,162 @@
+# app/change_bus.py
+"""
+Cross-worker change notifications over Postgres LISTEN/NOTIFY.
+
+Owner writes call `publish("skills", ...)`, which runs
+`NOTIFY portfolio_changes, '<resource>'` once per resource. Every worker keeps
+one dedicated connection LISTENing on that channel (not a pool connection:
+the pool recycles connections and PgBouncer transaction pooling can't LISTEN,
+hence DB_LISTEN_URL) and hands each resource to the `subscribe()`d callbacks.
+With DB_POOL_MODE=transaction and no DB_LISTEN_URL the bus is not started:
+LISTEN through PgBouncer would look connected but never receive anything.
+
+Callbacks receive a list of resource names, or None meaning "assume anything
+changed". That's sent right after every (re)connect, since notifications
+issued while we weren't listening are lost. The listener reconnects forever
+with capped exponential backoff via db.retry().
+"""
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from .config import settings
+from .db import connect, get_pool, retry
+
+logger = logging.getLogger("app.change_bus")
+
+CHANNEL = "portfolio_changes"
+PING_INTERVAL_SEC = 30
+PING_TIMEOUT_SEC = 10
+RECONNECT_DELAY_SEC = 1
+RECONNECT_MAX_DELAY_SEC = 30
+
+PUBLISH_SQL = "select pg_notify($1, r) from unnest($2::text[]) as r;"
+
+Callback = Callable[[Optional[List[str]]], None]
+
+_subscribers: List[Callback] = []
+_task: Optional[asyncio.Task] = None
+
+status = {
+    "connected": False,
+    "connects": 0,
+    "received": 0,
+    "published": 0,
+    "publishErrors": 0,
+    "lastError": None,
+}
+
+
+def connected() -> bool:
+    return bool(status["connected"])
+
+
+def subscribe(fn: Callback) -> None:
+    _subscribers.append(fn)
+
+
+def _dispatch(resources: Optional[List[str]]) -> None:
+    for fn in _subscribers:
+        try:
+            fn(resources)
+        except Exception as e:
+            logger.warning("[bus] subscriber %r failed: %s", fn, e)
+
+
+def _listen_url() -> str:
+    if settings.db_listen_url:
+        return settings.db_listen_url
+    # DATABASE_URL is presumably PgBouncer in transaction mode: LISTEN would be silently dead
+    if settings.db_pool_mode == "transaction":
+        return ""
+    return settings.database_url
+
+
+# ------------------------------ publish ------------------------------
+
+async def publish(*resources: str) -> None:
+    """NOTIFY every worker (this one included) that `resources` changed. Never raises."""
+    if not settings.change_bus or not resources:
+        return
+    p = get_pool()
+    if p is None:
+        return
+    try:
+        async with p.acquire() as con:
+            await con.execute(PUBLISH_SQL, CHANNEL, list(resources))
+        status["published"] += len(resources)
+    except Exception as e:
+        # Local caches are already invalidated; peers fall back to their TTL
+        status["publishErrors"] += 1
+        logger.warning("[bus] publish %s failed: %s", resources, e)
+
+
+# ------------------------------ listen ------------------------------
+
+def _on_notify(_con, _pid, _channel, payload: str) -> None:
+    status["received"] += 1
+    names = [r.strip() for r in (payload or "").split(",") if r.strip()]
+    _dispatch(names or None)
+
+
+async def _listen_once() -> None:
+    con = await retry(
+        lambda: connect(_listen_url()), "Change bus connect", attempts=None,
+        delay_sec=RECONNECT_DELAY_SEC, max_delay_sec=RECONNECT_MAX_DELAY_SEC,
+    )
+    lost = asyncio.Event()
+    con.add_termination_listener(lambda _c: lost.set())
+    try:
+        await con.add_listener(CHANNEL, _on_notify)
+        status["connected"] = True
+        status["connects"] += 1
+        _dispatch(None)
+
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), PING_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                # A silently dropped TCP connection never fires the termination listener
+                await asyncio.wait_for(con.fetchval("select 1"), PING_TIMEOUT_SEC)
+        raise ConnectionError("listener connection closed")
+    finally:
+        status["connected"] = False
+        if not con.is_closed():
+            con.terminate()
+
+
+async def _run() -> None:
+    while True:
+        try:
+            await _listen_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status["lastError"] = f"{e.__class__.__name__}: {e}"
+            print("[API] Change bus listener lost ({}), reconnecting".format(status["lastError"]))
+            await asyncio.sleep(RECONNECT_DELAY_SEC)
+
+
+def start() -> bool:
+    global _task
+    if not settings.change_bus or _task is not None:
+        return False
+    if not _listen_url():
+        if settings.database_url:
+            status["lastError"] = "DB_LISTEN_URL is not set and DB_POOL_MODE=transaction"
+            print("[API] Change bus disabled: DB_POOL_MODE=transaction needs DB_LISTEN_URL "
+                  "(a direct, session-level Postgres URL) for LISTEN")
+        return False
+    _task = asyncio.create_task(_run())
+    return True
+
+
+async def stop() -> None:
+    global _task
+    t, _task = _task, None
+    if t is not None:
+        t.cancel()
+        try:
+            await t
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,256 @@
+# app/conditional.py
+"""
+Conditional GETs (ETag / Last-Modified / 304) for the public read endpoints.
+
+Validators come from `change_counters` (migration 12): a per-table version
+bumped by a statement trigger on every write. A request costs one indexed
+lookup of those rows, or nothing while the LISTEN connection of
+app/change_bus.py is up, because the versions are then cached here and
+dropped by the NOTIFY the same trigger sends. The cached versions also expire
+after VERSIONS_TTL_SEC, so a listener that silently stops receiving
+notifications costs bounded staleness rather than stale 304s until restart.
+
+The ETag hashes the table versions with the request path/query, a
+representation variant (e.g. owner vs public) and a build id of this code, so
+a deploy that changes a payload's shape never answers 304 to old bodies.
+`If-None-Match` is answered before the endpoint runs its query.
+
+Routes use `respond(request, tables, build)`; app/response_cache.py calls
+`check()` itself and keys its entries by the ETag.
+"""
+import hashlib
+import logging
+import os
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from . import change_bus
+from .cache import TTLCache
+from .db import get_pool
+from .responses import ORJSONResponse
+
+logger = logging.getLogger("app.conditional")
+
+VERSIONS_SQL = "select table_name, version, changed_at from change_counters where table_name = any($1::text[]);"
+TOUCH_SQL = """
+with bumped as (
+    update change_counters
+       set version = version + 1, changed_at = now()
+     where table_name = any($1::text[])
+    returning table_name
+)
+select pg_notify('portfolio_changes', table_name) from bumped;
+"""
+
+CACHE_CONTROL = "no-cache"
+# Owner-dependent bodies must not be shared between users by intermediaries
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+AUTH_VARY = "Authorization, X-Owner-Token"
+
+
+def _build_id() -> str:
+    """Digest of this package's sources: changes whenever a deploy could change a payload."""
+    h = hashlib.blake2b(digest_size=8)
+    root = os.path.dirname(os.path.abspath(__file__))
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                with open(os.path.join(dirpath, name), "rb") as f:
+                    h.update(f.read())
+    return h.hexdigest()
+
+
+BUILD_ID = _build_id()
+
+
+# ------------------------------ versions ------------------------------
+
+VERSIONS_TTL_SEC = 30.0
+
+# table -> (version, changed_at); only trusted while the bus is connected
+_versions = TTLCache(maxsize=256, ttl=VERSIONS_TTL_SEC)
+_epoch = 0
+
+
+def _on_bus_change(tables: Optional[List[str]]) -> None:
+    global _epoch
+    _epoch += 1
+    if tables is None:
+        _versions.clear()
+    else:
+        for t in tables:
+            _versions.pop(t)
+
+
+change_bus.subscribe(_on_bus_change)
+
+
+async def _table_versions(tables: Sequence[str]) -> Optional[Dict[str, Tuple[int, datetime]]]:
+    use_cache = change_bus.connected()
+    if use_cache:
+        cached = {t: _versions.get(t) for t in tables}
+        if all(e is not None for e in cached.values()):
+            return {t: e.value for t, e in cached.items()}
+
+    p = get_pool()
+    if p is None:
+        return None
+    epoch = _epoch
+    try:
+        async with p.acquire() as con:
+            rows = await con.fetch(VERSIONS_SQL, list(tables))
+    except Exception as e:
+        # No counters yet (migration pending) or DB trouble: serve without validators
+        logger.debug("[conditional] versions unavailable: %s", e)
+        return None
+    found = {r["table_name"]: (r["version"], r["changed_at"]) for r in rows}
+    if len(found) != len(set(tables)):
+        return None
+    # Don't keep what a NOTIFY has already superseded while we were reading
+    if use_cache and epoch == _epoch:
+        for t, v in found.items():
+            _versions.set(t, v)
+    return found
+
+
+def forget() -> None:
+    """Drop all cached versions locally (the writer's own NOTIFY arrives a moment later)."""
+    _on_bus_change(None)
+
+
+class ForgetVersionsOnWrite:
+    """
+    ASGI middleware: once any write request is answered, drop this worker's
+    cached versions before the response leaves, so the writer's next GET can't
+    get a 304 for what it just replaced while the trigger's NOTIFY is in flight.
+    """
+
+    SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in self.SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                forget()
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def touch(*tables: str) -> None:
+    """Bump versions for changes the triggers can't see (e.g. new image variants). Never raises."""
+    p = get_pool()
+    if p is None or not tables:
+        return
+    try:
+        async with p.acquire() as con:
+            await con.fetch(TOUCH_SQL, list(tables))
+    except Exception as e:
+        logger.warning("[conditional] touch %s failed: %s", tables, e)
+
+
+# ------------------------------ validators ------------------------------
+
+@dataclass
+class Validators:
+    etag: str
+    last_modified: datetime
+    private: bool
+    not_modified: bool
+
+    def headers(self) -> Dict[str, str]:
+        h = {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "Cache-Control": PRIVATE_CACHE_CONTROL if self.private else CACHE_CONTROL,
+        }
+        if self.private:
+            h["Vary"] = AUTH_VARY
+        return h
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+async def check(request: Request, tables: Iterable[str], variant: str = "") -> Optional[Validators]:
+    """Validators for this request, or None when versions are unavailable."""
+    tables = tuple(sorted(set(tables)))
+    versions = await _table_versions(tables)
+    if versions is None:
+        return None
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{BUILD_ID}|{variant}|{request.url.path}?{request.url.query}".encode())
+    for t in tables:
+        h.update(f"|{t}:{versions[t][0]}".encode())
+    etag = f'"{h.hexdigest()}"'
+    last_modified = max(changed_at for _v, changed_at in versions.values())
+
+    return revalidate(request, Validators(etag, last_modified, bool(variant), False))
+
+
+def revalidate(request: Request, v: Validators) -> Validators:
+    """`v` with not_modified evaluated against this request's conditional headers."""
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        not_modified = _etag_matches(inm, v.etag)
+    else:
+        ims = request.headers.get("if-modified-since")
+        not_modified = ims is not None and _not_modified_since(ims, v.last_modified)
+    return replace(v, not_modified=not_modified)
+
+
+def not_modified(v: Validators) -> Response:
+    return Response(status_code=304, headers=v.headers())
+
+
+def apply(response: Response, v: Optional[Validators]) -> Response:
+    # A handler that set its own Cache-Control (e.g. no-store fallbacks) keeps it
+    if v is not None and response.status_code == 200 and "cache-control" not in response.headers:
+        response.headers.update(v.headers())
+    return response
+
+
+async def respond(
+    request: Request,
+    tables: Iterable[str],
+    build: Callable[[], Awaitable[Any]],
+    variant: str = "",
+) -> Response:
+    """
+    304 if the client's copy is current, else `await build()` with validators
+    attached. `build` may return a Response or JSON-able content. A non-empty
+    `variant` marks the body as depending on who asks (cached privately).
+    """
+    v = await check(request, tables, variant)
+    if v is not None and v.not_modified:
+        return not_modified(v)
+    result = await build()
+    response = result if isinstance(result, Response) else ORJSONResponse(result)
+    return apply(response, v)
@@ -16,6 +16,29 @@ class Settings:
     jwt_secret: str = os.getenv("JWT_SECRET", "uS0m5p4d3d-32char-minimum-secret-key-123456")
     token_minutes: int = int(os.getenv("TOKEN_MINUTES", "120"))
     web_root: str = os.getenv("WEB_ROOT", "")  # if blank, default inside project
+    # "transaction" = safe behind PgBouncer transaction pooling (no prepared statement cache)
+    # "session"     = direct/session-pooled connections; cache prepared statements per connection
+    db_pool_mode: str = os.getenv("DB_POOL_MODE", "transaction").strip().lower()
+    db_statement_cache_size: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+    # Certificate proxy (shared upstream HTTP client)
+    proxy_http2: bool = os.getenv("PROXY_HTTP2", "1") == "1"  # used only if the h2 package is installed
+    proxy_max_connections: int = int(os.getenv("PROXY_MAX_CONNECTIONS", "40"))
+    proxy_per_host_limit: int = int(os.getenv("PROXY_PER_HOST_LIMIT", "8"))
+    proxy_cache_max_mb: int = int(os.getenv("PROXY_CACHE_MAX_MB", "256"))  # on-disk proxy cache under WEB_ROOT
+    # Upload writes (app/storage.py)
+    upload_io_workers: int = int(os.getenv("UPLOAD_IO_WORKERS", "4"))
+    upload_fsync: bool = os.getenv("UPLOAD_FSYNC", "0") == "1"  # fsync before the atomic rename
+    image_workers: int = int(os.getenv("IMAGE_WORKERS", "2"))  # processes rendering image variants
+    # Orphaned-upload sweeper (app/upload_gc.py); interval 0 disables it
+    upload_gc_interval_hours: float = float(os.getenv("UPLOAD_GC_INTERVAL_HOURS", "24"))
+    upload_gc_grace_hours: float = float(os.getenv("UPLOAD_GC_GRACE_HOURS", "72"))
+    # Serialized public GET responses (app/response_cache.py); 0 disables
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    # Cross-worker invalidation over LISTEN/NOTIFY (app/change_bus.py). LISTEN needs a
+    # session: point DB_LISTEN_URL at Postgres directly when DATABASE_URL is a PgBouncer
+    # in transaction mode. With DB_POOL_MODE=transaction and no DB_LISTEN_URL the bus stays off.
+    change_bus: bool = os.getenv("CHANGE_BUS", "1") == "1"
+    db_listen_url: str = os.getenv("DB_LISTEN_URL", "")
 
     def __post_init__(self):
         self.allowed_origins = _split_csv(os.getenv("ALLOWED_ORIGINS", "http://localhost:5173"))
@@ -1,7 +1,10 @@
 # app/db.py
+import asyncio
 import asyncpg
 import ssl
-from typing import Optional
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .config import settings
 
 # Prefer OS trust store; fall back to certifi; then default
 def _make_sslctx():
@@ -29,12 +32,54 @@ async def init_pool(dsn: str) -> asyncpg.Pool:
     if _pool is None:
         _pool = await asyncpg.create_pool(
             dsn,
-            statement_cache_size=0,  # safer with migrations
+            statement_cache_size=statement_cache_size(),
             max_size=20,
             ssl=_sslctx,
         )
     return _pool
 
+async def connect(dsn: str) -> asyncpg.Connection:
+    """A standalone connection (same TLS setup as the pool), e.g. for LISTEN."""
+    return await asyncpg.connect(dsn, statement_cache_size=0, ssl=_sslctx)
+
+T = TypeVar("T")
+
+async def retry(
+    fn: Callable[[], Awaitable[T]],
+    what: str,
+    attempts: Optional[int] = 20,
+    delay_sec: float = 3.0,
+    max_delay_sec: Optional[float] = None,
+) -> Optional[T]:
+    """
+    Await `fn()` until it succeeds and return its result, sleeping `delay_sec`
+    between failures (doubled each time up to `max_delay_sec` when given).
+    `attempts=None` retries until cancelled; otherwise None once they run out.
+    """
+    delay = delay_sec
+    i = 0
+    while attempts is None or i < attempts:
+        i += 1
+        try:
+            return await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("[API] {} attempt {}/{} failed: {}: {}".format(
+                what, i, attempts if attempts is not None else "inf", e.__class__.__name__, e))
+        await asyncio.sleep(delay)
+        if max_delay_sec is not None:
+            delay = min(delay * 2, max_delay_sec)
+    return None
+
+def prepared_statements_enabled() -> bool:
+    # Migrations now run before traffic, so cached plans are safe in session mode.
+    return settings.db_pool_mode == "session"
+
+def statement_cache_size() -> int:
+    """asyncpg statement cache size for the configured DB_POOL_MODE (0 = pooler-safe)."""
+    return max(0, settings.db_statement_cache_size) if prepared_statements_enabled() else 0
+
 # ---- Accessors (DO NOT RAISE if not ready) ----
 
 def get_pool() -> Optional[asyncpg.Pool]:
@@ -0,0 +1,186 @@
+# app/disk_cache.py
+"""
+Size-bounded, on-disk content cache (used by the certificate proxy).
+
+Layout under `root`:  <hh>/<sha256(key)>.body  +  <hh>/<sha256(key)>.json
+The .json sidecar stores the upstream validators (ETag / Last-Modified), the
+content type, our own strong ETag and when the entry was last validated. The
+sidecar's mtime doubles as the LRU clock; eviction drops the least recently
+used entries once the total body size exceeds `max_bytes`.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import AsyncIterator, Optional
+
+CACHE_ENTRY_VERSION = 1
+
+
+class TooLarge(Exception):
+    pass
+
+
+class DiskCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._total: Optional[int] = None  # lazily computed on first fill
+        self._evicting = False
+
+    # ------------------------------ paths ------------------------------
+
+    def _base(self, key: str) -> str:
+        h = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, h[:2], h)
+
+    def body_path(self, key: str) -> str:
+        return self._base(key) + ".body"
+
+    def _meta_path(self, key: str) -> str:
+        return self._base(key) + ".json"
+
+    # ------------------------------ reads ------------------------------
+
+    def _lookup_sync(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(key), "rb") as f:
+                meta = json.loads(f.read())
+            if meta.get("v") != CACHE_ENTRY_VERSION or not os.path.exists(self.body_path(key)):
+                return None
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    async def lookup(self, key: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._lookup_sync, key)
+
+    def touch(self, key: str) -> None:
+        """Mark as recently used (LRU clock)."""
+        try:
+            os.utime(self._meta_path(key))
+        except OSError:
+            pass
+
+    async def revalidated(self, key: str, meta: dict) -> dict:
+        """Record a successful 304 revalidation."""
+        meta = {**meta, "validatedAt": time.time()}
+        await asyncio.to_thread(self._write_meta, key, meta)
+        return meta
+
+    # ------------------------------ writes ------------------------------
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        path = self._meta_path(key)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8"))
+        os.replace(tmp, path)
+
+    def _open_temp(self, key: str):
+        body = self.body_path(key)
+        os.makedirs(os.path.dirname(body), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(body), suffix=".part")
+        return os.fdopen(fd, "wb"), tmp
+
+    def _commit_sync(self, key: str, tmp: str, meta: dict) -> int:
+        """Rename the body into place and write its sidecar; returns the replaced body's size."""
+        body = self.body_path(key)
+        try:
+            old_size = os.path.getsize(body)
+        except OSError:
+            old_size = 0
+        os.replace(tmp, body)
+        self._write_meta(key, meta)
+        return old_size
+
+    @staticmethod
+    def _discard(tmp: str) -> None:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+    async def fill(self, key: str, chunks: AsyncIterator[bytes], meta: dict, limit: int) -> dict:
+        """
+        Stream `chunks` into the cache, enforcing `limit` once here (raises TooLarge).
+        The body is committed with an atomic rename; returns the stored metadata.
+        All file system work runs off the event loop.
+        """
+        out, tmp = await asyncio.to_thread(self._open_temp, key)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            try:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > limit:
+                        raise TooLarge()
+                    digest.update(chunk)
+                    await asyncio.to_thread(out.write, chunk)
+            finally:
+                await asyncio.to_thread(out.close)
+            meta = {
+                **meta,
+                "v": CACHE_ENTRY_VERSION,
+                "size": size,
+                "etag": f'"{digest.hexdigest()[:32]}"',
+                "validatedAt": time.time(),
+            }
+            old_size = await asyncio.to_thread(self._commit_sync, key, tmp, meta)
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(self._discard, tmp))
+            raise
+
+        if self._total is not None:
+            self._total += size - old_size
+        await self._maybe_evict()
+        return meta
+
+    # ------------------------------ eviction ------------------------------
+
+    def _scan(self):
+        entries = []
+        total = 0
+        for dirpath, _dirs, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                meta_path = os.path.join(dirpath, name)
+                body_path = meta_path[:-5] + ".body"
+                try:
+                    used = os.path.getmtime(meta_path)
+                    size = os.path.getsize(body_path)
+                except OSError:
+                    continue
+                entries.append((used, size, meta_path, body_path))
+                total += size
+        return entries, total
+
+    def _evict_sync(self) -> int:
+        entries, total = self._scan()
+        target = int(self.max_bytes * 0.9)  # leave headroom so we don't evict on every fill
+        if total > self.max_bytes:
+            for _used, size, meta_path, body_path in sorted(entries):
+                if total <= target:
+                    break
+                for p in (meta_path, body_path):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+                total -= size
+        return total
+
+    async def _maybe_evict(self) -> None:
+        if self._evicting:
+            return
+        if self._total is not None and self._total <= self.max_bytes:
+            return
+        self._evicting = True
+        try:
+            self._total = await asyncio.to_thread(self._evict_sync)
+        finally:
+            self._evicting = False
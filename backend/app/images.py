@@ -0,0 +1,237 @@
+# app/images.py
+"""
+Responsive variants for uploaded images.
+
+After an upload is stored (app/storage.py), `schedule_variants(url)` renders
+resized copies (VARIANT_WIDTHS) as WebP, plus AVIF when the installed Pillow
+can encode it, next to the original:
+
+    ab/cd/<digest>.png
+    ab/cd/<digest>.w640.webp   ...
+    ab/cd/<digest>.variants.json      <- manifest
+
+Rendering is CPU-bound, so it runs in a ProcessPoolExecutor. Response builders
+`await load_srcsets(urls)` once (manifests are read on the upload I/O pool), then
+`srcset_for(url)` returns <picture>-ready sources from memory. Variants and
+manifests are written to dot-prefixed `.part` temp files (never served by
+/uploads) and renamed into place.
+Pillow is optional: without it no variants are produced and srcset_for()
+returns None, so callers simply fall back to the original URL.
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+
+from .cache import TTLCache
+from .config import settings
+from . import conditional, response_cache
+from .storage import run_io, upload_root
+
+logger = logging.getLogger("app.images")
+
+try:
+    from PIL import Image, ImageOps, features
+    HAVE_PIL = True
+except ImportError:  # pip install Pillow
+    HAVE_PIL = False
+
+VARIANT_WIDTHS = (320, 640, 1280)
+MANIFEST_SUFFIX = ".variants.json"
+MANIFEST_VERSION = 1
+# Animated GIFs would lose their frames; leave them alone
+SOURCE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+
+_FORMATS = {
+    # format -> (extension, mime, save kwargs)
+    "AVIF": (".avif", "image/avif", {"quality": 50}),
+    "WEBP": (".webp", "image/webp", {"quality": 80, "method": 4}),
+}
+
+
+def _output_formats() -> List[str]:
+    if not HAVE_PIL:
+        return []
+    out = []
+    if features.check("avif"):
+        out.append("AVIF")
+    if features.check("webp"):
+        out.append("WEBP")
+    return out
+
+
+# --------------------------- worker (child process) ---------------------------
+
+def _temp_beside(path: str) -> str:
+    # Unique per writer, and hidden from UploadsApp until the rename
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".part")
+    os.close(fd)
+    return tmp
+
+
+def _render_variants(src: str, formats: List[str]) -> dict:
+    """Runs in the process pool: write every variant plus the manifest, return the manifest."""
+    base, _ext = os.path.splitext(src)
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        width, height = im.size
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or im.mode in ("LA", "P") else "RGB")
+
+        # Never upscale; tiny images get a single re-encode at their own width
+        widths = [w for w in VARIANT_WIDTHS if w < width] or [width]
+        variants = []
+        for w in widths:
+            h = max(1, round(height * w / width))
+            resized = im if w == width else im.resize((w, h), Image.LANCZOS)
+            for fmt in formats:
+                ext, mime, opts = _FORMATS[fmt]
+                path = f"{base}.w{w}{ext}"
+                tmp = _temp_beside(path)
+                try:
+                    resized.save(tmp, fmt, **opts)
+                    os.replace(tmp, path)
+                except BaseException:
+                    os.remove(tmp)
+                    raise
+                variants.append({"file": os.path.basename(path), "width": w, "height": h, "type": mime})
+
+    manifest = {"v": MANIFEST_VERSION, "width": width, "height": height, "variants": variants}
+    tmp = _temp_beside(base + MANIFEST_SUFFIX)
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, base + MANIFEST_SUFFIX)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return manifest
+
+
+# ------------------------------ scheduling ------------------------------
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending: Dict[str, asyncio.Future] = {}
+_background: Set[asyncio.Task] = set()
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, settings.image_workers))
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    p, _executor = _executor, None
+    if p is not None:
+        p.shutdown(wait=False, cancel_futures=True)
+
+
+def _local_path(url: Optional[str]) -> Optional[str]:
+    """Absolute path for an /uploads URL, or None if it isn't one (or escapes the root)."""
+    if not url or not url.startswith("/uploads/"):
+        return None
+    root = upload_root()
+    path = os.path.abspath(os.path.join(root, url[len("/uploads/"):]))
+    if not path.startswith(root + os.sep):
+        return None
+    return path
+
+
+def _manifest_path(src: str) -> str:
+    return os.path.splitext(src)[0] + MANIFEST_SUFFIX
+
+
+async def _generate(url: str, src: str) -> None:
+    try:
+        await asyncio.get_running_loop().run_in_executor(_pool(), _render_variants, src, _output_formats())
+        _manifests.pop(url)
+        # Cached public responses embed srcsets; let them pick the new one up
+        await conditional.touch("profile", "certificates")
+        await response_cache.invalidate_everywhere("profile", "gallery")
+    except Exception as e:
+        logger.warning("[images] variants for %s failed: %s", url, e)
+    finally:
+        _pending.pop(url, None)
+
+
+def schedule_variants(url: Optional[str]) -> None:
+    """Fire-and-forget variant generation for a freshly stored /uploads image."""
+    if not HAVE_PIL or not _output_formats():
+        return
+    src = _local_path(url)
+    if src is None or os.path.splitext(src)[1].lower() not in SOURCE_EXTS:
+        return
+    # Content-addressed files never change: an existing manifest is final
+    if url in _pending or os.path.exists(_manifest_path(src)):
+        return
+    task = asyncio.ensure_future(_generate(url, src))
+    _pending[url] = task
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+# ------------------------------ srcset ------------------------------
+
+# Manifests are immutable once written; misses are re-checked after a minute
+_manifests = TTLCache(maxsize=4096, ttl=24 * 3600)
+MISS_TTL = 60
+
+
+def _read_manifests(srcs: Dict[str, str]) -> Dict[str, Optional[dict]]:
+    """url -> manifest (None if missing/unreadable). Blocking; see load_srcsets()."""
+    out: Dict[str, Optional[dict]] = {}
+    for url, src in srcs.items():
+        try:
+            with open(_manifest_path(src), "rb") as f:
+                m = json.loads(f.read())
+            out[url] = m if m.get("v") == MANIFEST_VERSION else None
+        except (OSError, ValueError):
+            out[url] = None
+    return out
+
+
+def _to_srcset(url: str, m: Optional[dict]) -> Optional[dict]:
+    if not m:
+        return None
+    prefix = url.rsplit("/", 1)[0]
+    by_type: Dict[str, List[str]] = {}
+    for v in m["variants"]:
+        by_type.setdefault(v["type"], []).append(f'{prefix}/{v["file"]} {v["width"]}w')
+    order = [mime for _ext, mime, _opts in _FORMATS.values()]
+    return {
+        "width": m["width"],
+        "height": m["height"],
+        "sources": [{"type": t, "srcset": ", ".join(by_type[t])} for t in order if t in by_type],
+    }
+
+
+async def load_srcsets(urls: Iterable[Optional[str]]) -> None:
+    """Read the manifests `srcset_for()` will need, in one call off the event loop."""
+    todo = {}
+    for url in set(urls):
+        src = _local_path(url)
+        if src is not None and _manifests.get(url) is None:
+            todo[url] = src
+    if not todo:
+        return
+    for url, m in (await run_io(_read_manifests, todo)).items():
+        result = _to_srcset(url, m)
+        _manifests.set(url, result, ttl=None if result else MISS_TTL)
+
+
+def srcset_for(url: Optional[str]) -> Optional[dict]:
+    """
+    {"width", "height", "sources": [{"type", "srcset"}]} for an uploaded image,
+    best format first; None when no variants exist (yet) or `load_srcsets()`
+    wasn't awaited for it. Never touches the disk.
+    """
+    if _local_path(url) is None:
+        return None
+    entry = _manifests.get(url)
+    return entry.value if entry is not None else None
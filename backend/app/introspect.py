@@ -0,0 +1,52 @@
+# app/introspect.py
+"""
+Cached schema introspection.
+
+Column sets are looked up in information_schema once per (pool, migration version)
+and then served from memory. A new pool or a schema version bump naturally
+misses the cache; `invalidate()` (exposed to the owner via /api/_schema/refresh)
+covers out-of-band DDL.
+"""
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from .db import get_pool
+from .migrations import schema_version
+
+_Key = Tuple[int, Optional[int], str]
+_columns: Dict[_Key, FrozenSet[str]] = {}
+
+COLUMNS_SQL = """
+SELECT column_name
+FROM information_schema.columns
+WHERE table_schema = current_schema()
+  AND table_name = $1;
+"""
+
+
+def _key(table: str) -> _Key:
+    return (id(get_pool()), schema_version(), table)
+
+
+async def table_columns(con, table: str) -> FrozenSet[str]:
+    """Return the column names of `table`, hitting information_schema only on a cache miss."""
+    key = _key(table)
+    cols = _columns.get(key)
+    if cols is not None:
+        return cols
+
+    rows = await con.fetch(COLUMNS_SQL, table)
+    cols = frozenset(r["column_name"] for r in rows)
+    if cols:
+        # Drop entries for this table from an older pool/version, then remember.
+        for k in [k for k in _columns if k[2] == table]:
+            del _columns[k]
+        _columns[key] = cols
+    return cols
+
+
+def invalidate(table: Optional[str] = None) -> int:
+    """Forget cached column sets (all tables, or just `table`). Returns how many were dropped."""
+    keys = [k for k in _columns if table is None or k[2] == table]
+    for k in keys:
+        del _columns[k]
+    return len(keys)
@@ -2,30 +2,35 @@
 from fastapi import FastAPI, Request, UploadFile, File, Form, Depends, HTTPException, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, PlainTextResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
 from typing import Optional
 import os
 import re
 import asyncio
-import orjson
 import traceback
 
 from .config import settings
-from .db import init_pool, pool
+from .db import init_pool, close_pool, pool, retry, statement_cache_size
+from .migrations import run_migrations, schema_version
+from . import introspect
+from .responses import ORJSONResponse
+from .storage import upload_root, shutdown_io
+from .upload_server import UploadsApp
+from . import upload_gc
+from . import images
+from . import response_cache
+from . import change_bus
+from . import conditional
 from .auth import create_owner_token, get_current_user, require_owner
 
 from .routes import (
     posts, projects, profile, experience, education, skills, languages,
-    certificates_gallery, contact, proxy, health, upload, home, bim
+    certificates_gallery, contact, proxy, health, upload, home, bootstrap, bim
 )
 
 
-def orjson_dumps(v, *, default):
-    return orjson.dumps(v, default=default).decode()
-
-# Use JSONResponse (you can switch to ORJSONResponse app-wide later)
-app = FastAPI(default_response_class=JSONResponse)
+# orjson for every response (datetime/UUID/Decimal handled in app/responses.py)
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # ----------------------------- CORS ---------------------------------
 _raw = settings.allowed_origins
@@ -72,13 +77,14 @@ else:
         allow_origins=sorted(list(_allowed)) or ["*"],  # fallback to * if nothing configured
         **cors_common,
     )
+
+# Writes drop cached table versions before answering (see app/conditional.py)
+app.add_middleware(conditional.ForgetVersionsOnWrite)
 # --------------------------------------------------------------------
 
-# Web root for uploads
-webroot = settings.web_root or os.path.join(os.path.dirname(__file__), "..", "uploads")
-webroot = os.path.abspath(webroot)
-os.makedirs(webroot, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=webroot), name="uploads")
+# Web root for uploads (immutable caching, ETags, Range; see app/upload_server.py)
+webroot = upload_root()
+app.mount("/uploads", UploadsApp(webroot), name="uploads")
 
 # ----------------------------- Root routes & health -----------------
 @app.api_route("/", methods=["GET", "HEAD"])
@@ -132,6 +138,9 @@ except Exception as e:
 # ----------------------------- Include routes -----------------------
 # Specific routers
 app.include_router(health.router)
+# Proxy before certificates_gallery: GET /api/certificates/{id} would otherwise
+# capture /api/certificates/proxy
+app.include_router(proxy.router)
 app.include_router(posts.router)
 app.include_router(projects.router)
 app.include_router(profile.router)
@@ -143,9 +152,8 @@ app.include_router(certificates_gallery.router)
 app.include_router(contact.router)
 app.include_router(upload.router)
 app.include_router(home.router)
+app.include_router(bootstrap.router)
 
-# Keep proxy LAST (catch-all patterns go here)
-app.include_router(proxy.router)
 # --------------------------------------------------------------------
 
 def _mask_dsn(dsn: str) -> str:
@@ -156,17 +164,28 @@ DB_INIT_TASK = None
 
 async def _init_pool_background():
     attempts = 20
-    delay_sec = 3
-    for i in range(1, attempts + 1):
+    p = await retry(lambda: init_pool(settings.database_url), "DB connect", attempts=attempts, delay_sec=3)
+    if p is None:
+        print("[API] DB init gave up after {} attempts".format(attempts))
+        return
+    print("[API] DB pool initialized ✅")
+
+    # Apply schema once here so request handlers never run DDL
+    try:
+        version = await run_migrations(p)
+        print(f"[API] Schema migrations at version {version} ✅")
+    except Exception as e:
+        # Handlers retry lazily through ensure_migrated()
+        print("[API] Schema migrations failed: {}: {}".format(e.__class__.__name__, e))
+
+    # Block inserts are bulk statements now; fix a lagging id sequence up front
+    if bim_loaded:
         try:
-            await init_pool(settings.database_url)
-            print("[API] DB pool initialized ✅")
-            return
+            from .routes.bim import check_block_sequence
+            if await check_block_sequence():
+                print("[API] BIM block id sequence repaired")
         except Exception as e:
-            print("[API] DB connect attempt {}/{} failed: {}: {}".format(
-                i, attempts, e.__class__.__name__, e))
-            await asyncio.sleep(delay_sec)
-    print("[API] DB init gave up after {} attempts".format(attempts))
+            print("[API] BIM sequence check failed: {}: {}".format(e.__class__.__name__, e))
 
 @app.on_event("startup")
 async def _startup():
@@ -177,12 +196,23 @@ async def _startup():
     if _allowed_regex:
         print(f"[API] Allowed Origin Regex: {_allowed_regex}")
     print(f"[API] Token lifetime (minutes): {settings.token_minutes}")
+    print(f"[API] DB pool mode: {settings.db_pool_mode} (statement cache size {statement_cache_size()})")
     print(f"[API] BIM loaded: {bim_loaded}")
     print(f"[API] Docs: /docs  |  Redoc: /redoc  |  Routes dump: /api/_routes")
 
     global DB_INIT_TASK
     DB_INIT_TASK = asyncio.create_task(_init_pool_background())
 
+    # Shared keep-alive client for the certificate proxy
+    await proxy.open_client()
+    print(f"[API] Proxy client ready (http2={proxy._http2_enabled()}, per-host limit={settings.proxy_per_host_limit})")
+
+    if change_bus.start():
+        print(f"[API] Change bus listening on '{change_bus.CHANNEL}'")
+
+    if upload_gc.start():
+        print(f"[API] Upload GC every {settings.upload_gc_interval_hours}h (grace {settings.upload_gc_grace_hours}h)")
+
     # Print registered routes (helpful in logs)
     for r in app.routes:
         try:
@@ -190,6 +220,15 @@ async def _startup():
         except Exception:
             pass
 
+@app.on_event("shutdown")
+async def _shutdown():
+    await upload_gc.stop()
+    await change_bus.stop()
+    await proxy.close_client()
+    await close_pool()
+    shutdown_io()
+    images.shutdown()
+
 # -------- Health / introspection --------
 @app.get("/api/health/ready", response_class=PlainTextResponse)
 async def _ready():
@@ -211,6 +250,18 @@ async def _routes():
 async def _meta():
     return {"bim_loaded": bim_loaded}
 
+@app.post("/api/_schema/refresh", response_class=JSONResponse)
+async def _schema_refresh(user = Depends(require_owner)):
+    # Drop cached column introspection after out-of-band DDL
+    dropped = introspect.invalidate()
+    await response_cache.invalidate_everywhere(*response_cache.RESOURCES)
+    return {"ok": True, "dropped": dropped, "schemaVersion": schema_version()}
+
+@app.get("/api/_cache", response_class=JSONResponse)
+async def _cache_stats(user = Depends(require_owner)):
+    # Hit/miss counters of the public response cache (app/response_cache.py)
+    return response_cache.stats()
+
 # -------- Auth endpoints (owner) --------
 auth_router = APIRouter()
 
@@ -0,0 +1,539 @@
+# app/migrations.py
+"""
+Ordered, checksummed schema migrations.
+
+The routers used to run their CREATE/ALTER statements on every request. The
+same DDL now lives here, is applied once at startup (see `_init_pool_background`
+in app/main.py) and is recorded in `schema_migrations`, so the per-request
+`_ensure_*` helpers are no-ops once the schema is current.
+
+Rules:
+  - Never edit a migration that has shipped; append a new one instead.
+  - Every statement must stay idempotent (IF NOT EXISTS etc.), because older
+    deployments already have these tables from the per-request DDL era.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .db import pool
+
+logger = logging.getLogger("app.migrations")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+    # Tables provisioned outside this app that must exist first; until they do
+    # the migration stays pending (not recorded) and is retried on every run.
+    requires: Tuple[str, ...] = ()
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.strip().encode("utf-8")).hexdigest()
+
+
+# ------------------------------- Migrations -----------------------------------
+
+BIM_TABLES = ("bim_entries", "bim_blocks")
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "posts", """
+        -- Needed for gen_random_uuid()
+        CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+        -- Base table (includes presentation columns)
+        CREATE TABLE IF NOT EXISTS posts (
+            id                   uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            title                text NOT NULL,
+            slug                 text NOT NULL UNIQUE,
+            excerpt              text,
+            cover_image_url      text,
+            tags                 text[] DEFAULT '{}'::text[],
+            status               text DEFAULT 'draft',
+            published_at         timestamptz,
+            body_html            text,
+            meta                 jsonb,
+            -- Presentation fields
+            accent_color         text,
+            theme_font_family    text,
+            theme_base_px        integer,
+            theme_heading_scale  numeric(6,3),
+            created_at           timestamptz NOT NULL DEFAULT now(),
+            updated_at           timestamptz NOT NULL DEFAULT now()
+        );
+
+        -- Ensure new columns exist on older tables
+        ALTER TABLE IF EXISTS posts
+            ADD COLUMN IF NOT EXISTS accent_color         text,
+            ADD COLUMN IF NOT EXISTS theme_font_family    text,
+            ADD COLUMN IF NOT EXISTS theme_base_px        integer,
+            ADD COLUMN IF NOT EXISTS theme_heading_scale  numeric(6,3);
+
+        -- Helpful indexes
+        CREATE INDEX IF NOT EXISTS posts_status_idx ON posts (status);
+        CREATE INDEX IF NOT EXISTS posts_published_at_idx ON posts (published_at);
+        CREATE INDEX IF NOT EXISTS posts_tags_gin ON posts USING GIN (tags);
+    """),
+    Migration(2, "home", """
+        CREATE TABLE IF NOT EXISTS home_settings (
+            id SMALLINT PRIMARY KEY DEFAULT 1,
+            welcome_html TEXT NOT NULL DEFAULT '',
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+
+        INSERT INTO home_settings (id, welcome_html)
+        VALUES (1, '')
+        ON CONFLICT (id) DO NOTHING;
+
+        -- Create with the superset of columns we support now
+        CREATE TABLE IF NOT EXISTS highlights (
+            id BIGSERIAL PRIMARY KEY,
+            icon TEXT,
+            title_html TEXT NOT NULL DEFAULT '',
+            body_html  TEXT NOT NULL DEFAULT '',
+            sort_order INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            -- legacy/plain fields kept for compatibility
+            title TEXT,
+            description TEXT,
+            url TEXT
+        );
+
+        -- Patch older tables forward safely
+        ALTER TABLE IF EXISTS highlights
+            ADD COLUMN IF NOT EXISTS icon TEXT,
+            ADD COLUMN IF NOT EXISTS title_html TEXT,
+            ADD COLUMN IF NOT EXISTS body_html TEXT,
+            ADD COLUMN IF NOT EXISTS sort_order INT NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            -- legacy/plain columns (nullable)
+            ADD COLUMN IF NOT EXISTS title TEXT,
+            ADD COLUMN IF NOT EXISTS description TEXT,
+            ADD COLUMN IF NOT EXISTS url TEXT;
+
+        -- Defaults + not-null after the columns exist
+        UPDATE highlights
+           SET title_html = COALESCE(title_html, ''),
+               body_html  = COALESCE(body_html,  '')
+         WHERE title_html IS NULL OR body_html IS NULL;
+
+        ALTER TABLE IF EXISTS highlights
+            ALTER COLUMN title_html SET DEFAULT '',
+            ALTER COLUMN body_html  SET DEFAULT '',
+            ALTER COLUMN title_html SET NOT NULL,
+            ALTER COLUMN body_html  SET NOT NULL;
+
+        CREATE INDEX IF NOT EXISTS idx_highlights_sort
+        ON highlights (sort_order, id);
+    """),
+    Migration(3, "certificates", """
+        create table if not exists certificates (
+            id uuid primary key,
+            title text not null,
+            issuer text null,
+            type text null,
+            date_month text null,
+            credential_id text null,
+            credential_url text null,
+            image_url text null,
+            skills text[] not null default '{}',
+            description text null,
+            sort_order int not null default 0,
+            created_at timestamptz not null default now(),
+            updated_at timestamptz null
+        );
+
+        -- Backfill columns for older deployments (safe if already exist)
+        alter table certificates
+            add column if not exists skills text[] not null default '{}',
+            add column if not exists description text,
+            add column if not exists updated_at timestamptz;
+    """),
+    Migration(4, "skills", """
+        -- Flexible schema: keep level as TEXT so you can store "Beginner/Advanced" or "90"
+        create table if not exists skills (
+            id uuid primary key,
+            name text not null,
+            category text null,
+            level text null,
+            sort_order int not null default 0,
+            created_at timestamptz not null default now(),
+            updated_at timestamptz null
+        );
+
+        alter table skills
+            add column if not exists category text,
+            add column if not exists level text,
+            add column if not exists sort_order int not null default 0,
+            add column if not exists created_at timestamptz not null default now(),
+            add column if not exists updated_at timestamptz;
+
+        create index if not exists idx_skills_sort on skills (sort_order asc, name asc);
+        create index if not exists idx_skills_category on skills (category);
+    """),
+    Migration(5, "languages", """
+        create table if not exists languages (
+            id uuid primary key,
+            name text not null,
+            code text not null,
+            level_cefr text null,
+            proficiency_pct int not null default 0,
+            is_primary boolean not null default false,
+            notes text null,
+            sort_order int not null default 0,
+            created_at timestamptz not null default now(),
+            updated_at timestamptz null
+        );
+
+        alter table languages
+            add column if not exists level_cefr text,
+            add column if not exists proficiency_pct int not null default 0,
+            add column if not exists is_primary boolean not null default false,
+            add column if not exists notes text,
+            add column if not exists sort_order int not null default 0,
+            add column if not exists created_at timestamptz not null default now(),
+            add column if not exists updated_at timestamptz;
+    """),
+    Migration(6, "profile", """
+        create table if not exists profile (
+            id uuid primary key,
+            full_name text not null default '',
+            headline text null,
+            bio text null,
+            location text null,
+            email text null,
+            phone text null,
+            avatar_url text null,
+            banner_url text null,
+            socials jsonb null,
+            created_at timestamptz not null default now(),
+            updated_at timestamptz null
+        );
+
+        alter table profile
+            add column if not exists full_name text not null default '',
+            add column if not exists headline text,
+            add column if not exists bio text,
+            add column if not exists location text,
+            add column if not exists email text,
+            add column if not exists phone text,
+            add column if not exists avatar_url text,
+            add column if not exists banner_url text,
+            add column if not exists socials jsonb,
+            add column if not exists updated_at timestamptz;
+    """),
+    Migration(7, "projects_columns", """
+        alter table if exists projects
+            add column if not exists summary_html text,
+            add column if not exists links jsonb,
+            add column if not exists client text,
+            add column if not exists role text,
+            add column if not exists location text,
+            add column if not exists start_date text,
+            add column if not exists end_date text,
+            add column if not exists status text;
+    """),
+    Migration(8, "contact_messages", """
+        -- No extension required; UUID type is built-in.
+        create table if not exists contact_messages (
+            id uuid primary key,
+            name text not null,
+            email text null,
+            message text not null,
+            meta jsonb null,
+            created_at timestamptz not null default now()
+        );
+    """),
+    Migration(9, "bim_index", r"""
+        -- BIM tables are provisioned outside this app; only touch them if present.
+        DO $$
+        BEGIN
+            IF to_regclass('public.bim_entries') IS NULL OR to_regclass('public.bim_blocks') IS NULL THEN
+                RETURN;
+            END IF;
+
+            -- Precomputed listing fields so the index never aggregates blocks
+            ALTER TABLE public.bim_entries
+                ADD COLUMN IF NOT EXISTS preview text NOT NULL DEFAULT '',
+                ADD COLUMN IF NOT EXISTS block_count int NOT NULL DEFAULT 0;
+
+            UPDATE public.bim_entries e
+               SET block_count = s.n,
+                   preview = s.preview
+              FROM (
+                SELECT b.entry_id,
+                       count(*) AS n,
+                       coalesce(left(btrim(regexp_replace(regexp_replace(
+                           string_agg(b.value, ' ' ORDER BY b.idx) FILTER (WHERE b.type IN ('h1', 'h2', 'text')),
+                           '<[^>]*>', ' ', 'g'), '\s+', ' ', 'g')), 240), '') AS preview
+                  FROM public.bim_blocks b
+              GROUP BY b.entry_id
+              ) s
+             WHERE s.entry_id = e.id;
+
+            -- Keyset pagination on (created_at, id)
+            CREATE INDEX IF NOT EXISTS bim_entries_created_id_idx
+                ON public.bim_entries (created_at DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS bim_blocks_entry_idx_idx
+                ON public.bim_blocks (entry_id, idx);
+        END
+        $$;
+    """, requires=BIM_TABLES),
+    Migration(10, "bim_version", """
+        DO $$
+        BEGIN
+            IF to_regclass('public.bim_entries') IS NULL THEN
+                RETURN;
+            END IF;
+
+            -- Optimistic concurrency for editors (bumped on every entry write)
+            ALTER TABLE public.bim_entries
+                ADD COLUMN IF NOT EXISTS version int NOT NULL DEFAULT 1;
+        END
+        $$;
+    """, requires=("bim_entries",)),
+    Migration(11, "bim_search", r"""
+        DO $$
+        BEGIN
+            IF to_regclass('public.bim_entries') IS NULL OR to_regclass('public.bim_blocks') IS NULL THEN
+                RETURN;
+            END IF;
+
+            -- Weighted search document: title/h1 A, tags/h2 B, text C, code D
+            ALTER TABLE public.bim_entries
+                ADD COLUMN IF NOT EXISTS search_tsv tsvector NOT NULL DEFAULT ''::tsvector;
+
+            UPDATE public.bim_entries e
+               SET search_tsv =
+                     setweight(to_tsvector('english', coalesce(e.title, '')), 'A')
+                  || setweight(to_tsvector('english', array_to_string(coalesce(e.tags, '{}'), ' ')), 'B')
+                  || coalesce(s.tsv, ''::tsvector)
+              FROM (
+                SELECT e2.id AS entry_id,
+                       setweight(to_tsvector('english', coalesce(string_agg(regexp_replace(b.value, '<[^>]*>', ' ', 'g'), ' ') FILTER (WHERE b.type = 'h1'), '')), 'A')
+                    || setweight(to_tsvector('english', coalesce(string_agg(regexp_replace(b.value, '<[^>]*>', ' ', 'g'), ' ') FILTER (WHERE b.type = 'h2'), '')), 'B')
+                    || setweight(to_tsvector('english', coalesce(string_agg(regexp_replace(b.value, '<[^>]*>', ' ', 'g'), ' ') FILTER (WHERE b.type = 'text'), '')), 'C')
+                    || setweight(to_tsvector('english', coalesce(string_agg(b.value, ' ') FILTER (WHERE b.type = 'code'), '')), 'D') AS tsv
+                  FROM public.bim_entries e2
+             LEFT JOIN public.bim_blocks b ON b.entry_id = e2.id
+              GROUP BY e2.id
+              ) s
+             WHERE s.entry_id = e.id;
+
+            CREATE INDEX IF NOT EXISTS bim_entries_search_gin
+                ON public.bim_entries USING GIN (search_tsv);
+        END
+        $$;
+    """, requires=BIM_TABLES),
+    Migration(12, "change_counters", r"""
+        -- One row per content table, bumped by a statement-level trigger on every
+        -- write. Cheap validators for conditional GETs (app/conditional.py); the
+        -- trigger also NOTIFYs the table name on the cache invalidation channel.
+        CREATE TABLE IF NOT EXISTS change_counters (
+            table_name  text PRIMARY KEY,
+            version     bigint NOT NULL DEFAULT 1,
+            changed_at  timestamptz NOT NULL DEFAULT now()
+        );
+
+        CREATE OR REPLACE FUNCTION bump_change_counter() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO change_counters AS c (table_name)
+            VALUES (TG_TABLE_NAME)
+            ON CONFLICT (table_name)
+            DO UPDATE SET version = c.version + 1, changed_at = now();
+            PERFORM pg_notify('portfolio_changes', TG_TABLE_NAME);
+            RETURN NULL;
+        END
+        $$;
+
+        DO $$
+        DECLARE
+            t text;
+        BEGIN
+            FOREACH t IN ARRAY ARRAY[
+                'profile', 'skills', 'languages', 'projects', 'experience', 'education',
+                'certificates', 'posts', 'home_settings', 'highlights'
+            ] LOOP
+                -- Tables provisioned outside this app may not exist yet; skip what's missing
+                IF to_regclass('public.' || t) IS NULL THEN
+                    CONTINUE;
+                END IF;
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I', t || '_change_counter', t);
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.%I '
+                    'FOR EACH STATEMENT EXECUTE FUNCTION bump_change_counter()',
+                    t || '_change_counter', t);
+                INSERT INTO change_counters (table_name) VALUES (t) ON CONFLICT DO NOTHING;
+            END LOOP;
+        END
+        $$;
+    """),
+    Migration(13, "posts_feed_index", r"""
+        -- Matches the feed ORDER BY in app/routes/posts.py, so both OFFSET pages
+        -- and keyset cursors (row comparison on the same three keys) read the
+        -- index in order and stop after LIMIT rows instead of sorting the table.
+        CREATE INDEX IF NOT EXISTS posts_feed_idx ON posts (
+            (COALESCE(published_at, created_at)) DESC NULLS LAST,
+            created_at DESC NULLS LAST,
+            id DESC
+        ) WHERE status = 'published';
+    """),
+    Migration(14, "posts_word_count", r"""
+        -- Lets list views show reading time without shipping body_html
+        -- (summary projection in app/routes/posts.py). Kept by Postgres itself:
+        -- strip tags, collapse whitespace, count what's left between spaces.
+        ALTER TABLE posts ADD COLUMN IF NOT EXISTS word_count integer
+            GENERATED ALWAYS AS (
+                COALESCE(array_length(string_to_array(NULLIF(btrim(
+                    regexp_replace(regexp_replace(COALESCE(body_html, ''), '<[^>]*>', ' ', 'g'), '\s+', ' ', 'g')
+                ), ''), ' '), 1), 0)
+            ) STORED;
+    """),
+    Migration(15, "bim_change_counters", r"""
+        -- Same statement triggers as 12, for the BIM tables once they exist
+        DO $$
+        DECLARE
+            t text;
+        BEGIN
+            FOREACH t IN ARRAY ARRAY['bim_entries', 'bim_blocks'] LOOP
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I', t || '_change_counter', t);
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.%I '
+                    'FOR EACH STATEMENT EXECUTE FUNCTION bump_change_counter()',
+                    t || '_change_counter', t);
+                INSERT INTO change_counters (table_name) VALUES (t) ON CONFLICT DO NOTHING;
+            END LOOP;
+        END
+        $$;
+    """, requires=BIM_TABLES),
+]
+
+
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+# ------------------------------- Runner ---------------------------------------
+
+# Arbitrary constant so concurrent workers/replicas migrate one at a time
+_ADVISORY_LOCK_KEY = 0x706F7274  # "port"
+# Transaction-scoped: released at COMMIT/ROLLBACK on whichever server session ran it
+LOCK_SQL = "select pg_advisory_xact_lock($1);"
+
+MISSING_TABLES_SQL = "select t from unnest($1::text[]) as t where to_regclass('public.' || t) is null;"
+
+CREATE_MIGRATIONS_TABLE_SQL = """
+create table if not exists schema_migrations (
+    version    int primary key,
+    name       text not null,
+    checksum   text not null,
+    applied_at timestamptz not null default now()
+);
+"""
+
+# How often ensure_migrated() retries migrations waiting for their tables
+PENDING_RETRY_SEC = 60.0
+
+_applied_version: Optional[int] = None
+_retry_at = 0.0
+_lock = asyncio.Lock()
+
+
+def schema_version() -> Optional[int]:
+    """
+    Highest version such that it and every migration before it are applied,
+    or None if not yet migrated. Stays below LATEST_VERSION while a migration
+    waits for its tables.
+    """
+    return _applied_version
+
+
+async def _apply(con) -> int:
+    """
+    Each migration runs in its own transaction that first takes a
+    transaction-scoped advisory lock and re-checks schema_migrations. Behind
+    PgBouncer transaction pooling a session lock/unlock pair may land on
+    different server sessions; an xact lock lives and dies with the one
+    transaction that holds it.
+    """
+    global _applied_version, _retry_at
+    async with con.transaction():
+        await con.execute(LOCK_SQL, _ADVISORY_LOCK_KEY)
+        await con.execute(CREATE_MIGRATIONS_TABLE_SQL)
+    rows = await con.fetch("select version, checksum from schema_migrations;")
+    applied = {r["version"]: r["checksum"] for r in rows}
+
+    contiguous = 0
+    waiting = False
+    for m in sorted(MIGRATIONS, key=lambda x: x.version):
+        recorded = applied.get(m.version)
+        if recorded is None:
+            async with con.transaction():
+                await con.execute(LOCK_SQL, _ADVISORY_LOCK_KEY)
+                # Another worker may have applied it while we waited for the lock
+                recorded = await con.fetchval(
+                    "select checksum from schema_migrations where version = $1;", m.version,
+                )
+                missing = []
+                if recorded is None and m.requires:
+                    missing = [r["t"] for r in await con.fetch(MISSING_TABLES_SQL, list(m.requires))]
+                if recorded is None and not missing:
+                    await con.execute(m.sql)
+                    await con.execute(
+                        "insert into schema_migrations (version, name, checksum) values ($1, $2, $3);",
+                        m.version, m.name, m.checksum,
+                    )
+            if missing:
+                print(f"[DB] migration {m.version:04d}_{m.name} waits for table(s) {', '.join(missing)}")
+                waiting = True
+                continue
+            if recorded is None:
+                print(f"[DB] applied migration {m.version:04d}_{m.name}")
+                recorded = m.checksum
+        if not waiting:
+            contiguous = m.version
+        if recorded != m.checksum:
+            logger.warning(
+                "[DB] migration %04d_%s checksum differs from the recorded one; "
+                "shipped migrations must not be edited", m.version, m.name,
+            )
+
+    _applied_version = contiguous
+    _retry_at = time.monotonic() + PENDING_RETRY_SEC
+    return _applied_version
+
+
+async def run_migrations(p) -> int:
+    """Apply pending migrations using a connection from pool `p`. Returns the schema version."""
+    async with _lock:
+        async with p.acquire() as con:
+            return await _apply(con)
+
+
+async def ensure_migrated(con=None) -> None:
+    """
+    Hot-path guard for routers. Free once the startup run has finished; if a request
+    races the background init it applies the migrations itself (on `con` if given).
+    Migrations still waiting for their tables are retried every PENDING_RETRY_SEC.
+    """
+    if _applied_version == LATEST_VERSION:
+        return
+    if _applied_version is not None and time.monotonic() < _retry_at:
+        return
+    async with _lock:
+        if _applied_version == LATEST_VERSION:
+            return
+        if _applied_version is not None and time.monotonic() < _retry_at:
+            return
+        if con is not None:
+            await _apply(con)
+        else:
+            async with pool().acquire() as c:
+                await _apply(c)
@@ -0,0 +1,44 @@
+# app/queries.py
+"""
+Named query registry.
+
+Hot statements are declared once at module level through `register()`, so the
+SQL text sent to Postgres is byte-for-byte identical on every call. With
+DB_POOL_MODE=session the pool keeps asyncpg's per-connection statement cache
+on, and each registered statement is parsed/planned once per connection and
+then executed as a cached prepared statement. With the default
+DB_POOL_MODE=transaction (PgBouncer transaction pooling) the cache is off and
+the same text runs as unnamed statements, which poolers handle safely.
+
+`Query` is a `str`, so registered statements drop into `con.fetch(...)` as-is.
+"""
+import textwrap
+from typing import Dict
+
+
+class Query(str):
+    """SQL text that also carries its registry name."""
+    name: str
+
+    def __new__(cls, name: str, sql: str):
+        obj = super().__new__(cls, sql)
+        obj.name = name
+        return obj
+
+
+_registry: Dict[str, Query] = {}
+
+
+def register(name: str, sql: str) -> Query:
+    """Declare a statement once; re-registering the same name with different SQL is a bug."""
+    text = textwrap.dedent(sql).strip()
+    existing = _registry.get(name)
+    if existing is not None and str(existing) != text:
+        raise ValueError(f"query {name!r} already registered with different SQL")
+    q = Query(name, text)
+    _registry[name] = q
+    return q
+
+
+def registered() -> Dict[str, Query]:
+    return dict(_registry)
@@ -0,0 +1,210 @@
+# app/response_cache.py
+"""
+In-process cache of serialized public GET responses.
+
+The public portfolio endpoints (home, profile, skills, ...) only change when
+the owner edits them, so their JSON bodies are kept as bytes per resource,
+keyed by path + query string. A hit never touches the pool.
+
+  - `cached(resource, request, build)` serves a hit, or awaits `build()` once
+    per key (SingleFlight), serializes it and stores the bytes.
+  - `@invalidates(resource, ...)` on the owner-protected write handlers drops
+    that resource's entries when the handler finishes (success or not), and
+    publishes the change on app/change_bus.py so the other workers drop
+    theirs too.
+  - A per-resource generation counter keeps a build that raced a write from
+    storing what it read before the write.
+  - Entries keep the validators (app/conditional.py) they were built under.
+    While the change bus is connected the current versions are in memory, so
+    every request is checked against them first: a matching If-None-Match is
+    a 304 and an entry built under an older ETag is rebuilt.
+  - While the bus is down, reading versions costs a change_counters query, so
+    a hit is served (or 304'd) from the entry and its stored validators with
+    no DB round trip. Writes through this process still invalidate at once;
+    other workers' and out-of-band edits show up within the TTL.
+
+Entries expire after RESPONSE_CACHE_TTL seconds, which bounds that
+staleness. 0 disables caching.
+"""
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from . import change_bus, conditional
+from .cache import SingleFlight, TTLCache
+from .config import settings
+from .responses import dumps
+
+RESOURCES = (
+    "home", "profile", "skills", "languages",
+    "projects", "experience", "education", "gallery",
+    "bootstrap",
+)
+# Responses assembled from other resources; invalidating a part drops them too
+COMPOSITES: Dict[str, Tuple[str, ...]] = {
+    "bootstrap": (
+        "profile", "home", "skills", "languages",
+        "experience", "education", "projects", "gallery",
+    ),
+}
+# Tables each resource is read from (versions in change_counters, NOTIFY payloads)
+TABLES: Dict[str, Tuple[str, ...]] = {
+    "home": ("home_settings", "highlights"),
+    "profile": ("profile",),
+    "skills": ("skills",),
+    "languages": ("languages",),
+    "projects": ("projects",),
+    "experience": ("experience",),
+    "education": ("education",),
+    "gallery": ("certificates",),
+}
+for _r, _parts in COMPOSITES.items():
+    TABLES[_r] = tuple(sorted({t for p in _parts for t in TABLES[p]}))
+_BY_TABLE: Dict[str, Tuple[str, ...]] = {}
+for _r, _tables in TABLES.items():
+    for _t in _tables:
+        _BY_TABLE[_t] = _BY_TABLE.get(_t, ()) + (_r,)
+
+MAX_ENTRIES_PER_RESOURCE = 64
+
+_stores: Dict[str, TTLCache] = {
+    r: TTLCache(maxsize=MAX_ENTRIES_PER_RESOURCE, ttl=settings.response_cache_ttl) for r in RESOURCES
+}
+_generation: Dict[str, int] = {r: 0 for r in RESOURCES}
+_invalidations: Dict[str, int] = {r: 0 for r in RESOURCES}
+_flight = SingleFlight()
+
+
+def enabled() -> bool:
+    return settings.response_cache_ttl > 0
+
+
+def _key(request: Request) -> Hashable:
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def _json(body: bytes, state: str, v: Optional[conditional.Validators]) -> Response:
+    return conditional.apply(Response(body, media_type="application/json", headers={"X-Cache": state}), v)
+
+
+def _serve_entry(request: Request, value: Tuple[bytes, Optional[conditional.Validators]]) -> Response:
+    body, v = value
+    if v is not None:
+        v = conditional.revalidate(request, v)
+        if v.not_modified:
+            return conditional.not_modified(v)
+    return _json(body, "HIT", v)
+
+
+async def cached(resource: str, request: Request, build: Callable[[], Awaitable[Any]]) -> Response:
+    """Serve `resource` from the cache, building and storing it on a miss."""
+    store = _stores[resource]
+    key = _key(request)
+    bus_up = change_bus.connected()
+    if enabled() and not bus_up:
+        # Versions would cost a query; the TTL bounds what this can miss
+        entry = store.get(key)
+        if entry is not None:
+            return _serve_entry(request, entry.value)
+
+    v = await conditional.check(request, TABLES[resource])
+    if v is not None and v.not_modified:
+        return conditional.not_modified(v)
+    if not enabled():
+        return _json(dumps(await build()), "BYPASS", v)
+
+    if bus_up:
+        entry = store.get(key)
+        if entry is not None:
+            _body, built_under = entry.value
+            if v is None or (built_under is not None and built_under.etag == v.etag):
+                return _json(_body, "HIT", v)
+
+    gen = _generation[resource]
+
+    async def fill() -> bytes:
+        body = dumps(await build())
+        # An owner write landed while we were reading: serve it, don't keep it
+        if _generation[resource] == gen:
+            store.set(key, (body, v))
+        return body
+
+    flight_key: Hashable = (resource, gen, key, v.etag if v else None)
+    return _json(await _flight.do(flight_key, fill), "MISS", v)
+
+
+def invalidate(*resources: str) -> None:
+    hit = set(resources)
+    hit.update(c for c, parts in COMPOSITES.items() if hit.intersection(parts))
+    for r in hit:
+        _generation[r] += 1
+        _invalidations[r] += 1
+        _stores[r].clear()
+
+
+def clear() -> None:
+    invalidate(*RESOURCES)
+
+
+async def invalidate_everywhere(*resources: str) -> None:
+    """Invalidate here right away, then tell the other workers."""
+    invalidate(*resources)
+    await change_bus.publish(*resources)
+
+
+def _on_bus_change(names: Optional[List[str]]) -> None:
+    """Payloads are resource names (publish) or table names (change_counters trigger)."""
+    if names is None:
+        clear()
+        return
+    hit = set()
+    for n in names:
+        if n in _stores:
+            hit.add(n)
+        hit.update(_BY_TABLE.get(n, ()))
+    invalidate(*hit)
+
+
+change_bus.subscribe(_on_bus_change)
+
+
+def invalidates(*resources: str):
+    """Decorator for write handlers: drop the resources' cached responses afterwards."""
+    unknown = set(resources) - set(RESOURCES)
+    if unknown:
+        raise ValueError(f"unknown cached resources: {sorted(unknown)}")
+
+    def deco(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                await invalidate_everywhere(*resources)
+        return wrapper
+    return deco
+
+
+def stats() -> dict:
+    per = {}
+    hits = misses = 0
+    for r in RESOURCES:
+        s = _stores[r].stats()
+        hits += s["hits"]
+        misses += s["misses"]
+        per[r] = {
+            "entries": s["size"],
+            "hits": s["hits"],
+            "misses": s["misses"],
+            "invalidations": _invalidations[r],
+        }
+    return {
+        "enabled": enabled(),
+        "ttlSeconds": settings.response_cache_ttl,
+        "hits": hits,
+        "misses": misses,
+        "resources": per,
+        "bus": dict(change_bus.status),
+    }
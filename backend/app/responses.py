@@ -0,0 +1,48 @@
+# app/responses.py
+"""
+orjson-backed JSON responses (the app-wide default response class).
+
+Handlers on hot read paths return `ORJSONResponse(...)` themselves, which
+skips FastAPI's jsonable_encoder pass; datetime/date/UUID are serialized
+natively by orjson, and the types asyncpg hands back that orjson doesn't know
+(Decimal, asyncpg's own UUID subclass) go through `json_default`.
+
+JSON that Postgres already built (json_agg / row_to_json columns arrive as
+text) is wrapped with `raw_json()` and embedded as-is, never decoded and
+re-encoded in Python.
+"""
+import uuid
+from decimal import Decimal
+from typing import Any, Union
+
+import orjson
+from fastapi.responses import JSONResponse
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def json_default(obj: Any) -> Any:
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        # Same rule as FastAPI's decimal_encoder: ints stay ints
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=json_default, option=OPTIONS)
+
+
+def raw_json(value: Union[str, bytes, None], empty: str = "null") -> orjson.Fragment:
+    """Embed JSON text produced by Postgres without parsing it."""
+    return orjson.Fragment(value if value is not None else empty)
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,7 +1,7 @@
 # app/routes/__init__.py
 from . import (
     posts, projects, profile, experience, education, skills, languages,
-    certificates_gallery, contact, proxy, health, upload, home,
+    certificates_gallery, contact, proxy, health, upload, home, bootstrap,
 )
 
 # Try importing bim, but don't fail if it's not there
@@ -13,5 +13,5 @@ except ImportError:
 __all__ = [
     "posts", "projects", "profile", "experience", "education", "skills", 
     "languages", "certificates_gallery", "contact", "proxy", "health", 
-    "upload", "home"
+    "upload", "home", "bootstrap"
 ]
\ No newline at end of file
@@ -6,13 +6,19 @@ from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exception_handlers import request_validation_exception_handler as default_validation_handler
 from pydantic import BaseModel, Field
 from typing import List, Optional, Literal
-from pathlib import Path
-import uuid, shutil, asyncio, base64, os
+from datetime import datetime
+import asyncio, base64, hashlib
 import orjson
 import logging
 
 from .. import db
 from ..config import settings
+from ..migrations import ensure_migrated
+from ..queries import register
+from ..images import schedule_variants
+from ..storage import save_upload
+from ..responses import ORJSONResponse, raw_json
+from .. import conditional
 
 __all__ = ["router"]
 
@@ -77,6 +83,17 @@ async def _get_pool(timeout_sec: float = 5.0):
     # Don't raise here for base routes; callers can decide to fallback
     raise HTTPException(status_code=503, detail=f"Database not ready: {last_err or 'initializing'}")
 
+# Tables behind every BIM read (validators for conditional GETs)
+BIM_TABLES = ("bim_entries", "bim_blocks")
+# Fallback bodies served while the DB is unavailable must never be revalidated
+NO_STORE = {"Cache-Control": "no-store"}
+# Optimistic concurrency for writes (the "version" field of GET /{id} bodies)
+ENTRY_VERSION_HEADER = "X-Entry-Version"
+
+def _variant(request: Request) -> str:
+    # Owners see locked entries/previews: their validators never match a visitor's
+    return "owner" if _is_owner(request) else "visitor"
+
 def _is_owner(request: Request) -> bool:
     """Check if the request has valid owner authentication"""
     auth_header = request.headers.get("Authorization", "")
@@ -110,6 +127,8 @@ class BimUpdate(BaseModel):
     blocks: Optional[List[BimBlock]] = None
     tags: Optional[List[str]] = None
     locked: Optional[bool] = None
+    # Optimistic concurrency: the entry version the editor started from
+    version: Optional[int] = None
 
 _LANG_MAP = {
     None: None,
@@ -132,7 +151,7 @@ def _normalize_blocks(blocks: List[BimBlock]) -> List[dict]:
     return [_normalize_block(b) for b in blocks]
 
 # ------------------------------- SQL ---------------------------------
-LIST_SQL = """
+LIST_SQL = register("bim.list", """
 select
   e.id, e.title, e.created_at,
   coalesce(e.locked, false) as locked,
@@ -148,13 +167,100 @@ from public.bim_entries e
 left join public.bim_blocks b on b.entry_id = e.id
 group by e.id
 order by e.created_at desc;
-"""
+""")
+
+# Paginated index: keyset on (created_at, id), no block aggregation.
+# preview / block_count are maintained by REFRESH_SUMMARY_SQL (migration 9).
+INDEX_SQL = register("bim.index", """
+select
+  e.id, e.title, e.created_at,
+  coalesce(e.locked, false) as locked,
+  coalesce(e.tags, '{}') as tags,
+  e.block_count, e.preview
+from public.bim_entries e
+order by e.created_at desc, e.id desc
+limit $1;
+""")
 
-GET_ONE_SQL = """
+INDEX_AFTER_SQL = register("bim.index_after", """
 select
   e.id, e.title, e.created_at,
   coalesce(e.locked, false) as locked,
   coalesce(e.tags, '{}') as tags,
+  e.block_count, e.preview
+from public.bim_entries e
+where (e.created_at, e.id) < ($2::timestamptz, $3::bigint)
+order by e.created_at desc, e.id desc
+limit $1;
+""")
+
+# Recompute the derived columns of one entry (listing fields + search document).
+# Run after any title/tags/blocks write; search weights: title/h1 A, tags/h2 B, text C, code D.
+REFRESH_SUMMARY_SQL = register("bim.refresh_summary", r"""
+update public.bim_entries e
+set block_count = s.n,
+    preview = s.preview,
+    search_tsv =
+         setweight(to_tsvector('english', coalesce(e.title, '')), 'A')
+      || setweight(to_tsvector('english', array_to_string(coalesce(e.tags, '{}'), ' ')), 'B')
+      || s.tsv
+from (
+  select
+    count(b.id)::int as n,
+    coalesce(left(btrim(regexp_replace(regexp_replace(
+      string_agg(b.value, ' ' order by b.idx) filter (where b.type in ('h1', 'h2', 'text')),
+      '<[^>]*>', ' ', 'g'), '\s+', ' ', 'g')), 240), '') as preview,
+       setweight(to_tsvector('english', coalesce(string_agg(regexp_replace(b.value, '<[^>]*>', ' ', 'g'), ' ') filter (where b.type = 'h1'), '')), 'A')
+    || setweight(to_tsvector('english', coalesce(string_agg(regexp_replace(b.value, '<[^>]*>', ' ', 'g'), ' ') filter (where b.type = 'h2'), '')), 'B')
+    || setweight(to_tsvector('english', coalesce(string_agg(regexp_replace(b.value, '<[^>]*>', ' ', 'g'), ' ') filter (where b.type = 'text'), '')), 'C')
+    || setweight(to_tsvector('english', coalesce(string_agg(b.value, ' ') filter (where b.type = 'code'), '')), 'D') as tsv
+  from public.bim_blocks b
+  where b.entry_id = $1
+) s
+where e.id = $1;
+""")
+
+# Ranked search. Rank/limit use only the GIN-indexed tsvector; snippets are built
+# for the returned rows only. $3 = caller is owner (may see locked entries).
+SEARCH_SQL = register("bim.search", r"""
+with q as (
+  select websearch_to_tsquery('english', $1) as query
+),
+hits as (
+  select
+    e.id, e.title, e.created_at,
+    coalesce(e.locked, false) as locked,
+    coalesce(e.tags, '{}') as tags,
+    e.block_count,
+    ts_rank(e.search_tsv, q.query) as rank
+  from public.bim_entries e, q
+  where e.search_tsv @@ q.query
+    and ($3::bool or not coalesce(e.locked, false))
+  order by rank desc, e.created_at desc, e.id desc
+  limit $2
+)
+select
+  h.*,
+  ts_headline(
+    'english',
+    h.title || ' ' || coalesce((
+      select string_agg(regexp_replace(b.value, '<[^>]*>', ' ', 'g'), ' ' order by b.idx)
+      from public.bim_blocks b
+      where b.entry_id = h.id and b.type in ('h1', 'h2', 'text', 'code')
+    ), ''),
+    q.query,
+    'StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=12, MaxFragments=2'
+  ) as snippet
+from hits h, q
+order by h.rank desc, h.created_at desc, h.id desc;
+""")
+
+GET_ONE_SQL = register("bim.get_one", """
+select
+  e.id, e.title, e.created_at,
+  coalesce(e.locked, false) as locked,
+  coalesce(e.tags, '{}') as tags,
+  e.version,
   coalesce(
     json_agg(
       json_build_object('type', b.type, 'value', b.value, 'language', b.language)
@@ -166,37 +272,61 @@ from public.bim_entries e
 left join public.bim_blocks b on b.entry_id = e.id
 where e.id = $1
 group by e.id;
-"""
+""")
 
-INSERT_ENTRY_SQL = """
+INSERT_ENTRY_SQL = register("bim.insert_entry", """
 insert into public.bim_entries (title, tags, locked) 
 values ($1, $2, $3) 
 returning id, title, created_at, tags, coalesce(locked, false) as locked;
-"""
-
-INSERT_BLOCK_SQL_RETURNING = (
-    "insert into public.bim_blocks (entry_id, idx, type, value, language) "
-    "values ($1, $2, $3, $4, $5) returning id;"
-)
-
-DELETE_BLOCKS_SQL = "delete from public.bim_blocks where entry_id = $1;"
-DELETE_ENTRY_SQL  = "delete from public.bim_entries where id = $1;"
+""")
+
+# Blocks in one round trip; arrays are parallel
+INSERT_BLOCKS_SQL = register("bim.insert_blocks", """
+insert into public.bim_blocks (entry_id, idx, type, value, language)
+select $1, t.idx, t.type, t.value, t.language
+from unnest($2::int[], $3::text[], $4::text[], $5::text[]) as t(idx, type, value, language);
+""")
+
+DELETE_BLOCKS_SQL = register("bim.delete_blocks", "delete from public.bim_blocks where entry_id = $1;")
+
+# ---- diff-based block sync (see _sync_blocks) ----
+STORED_BLOCKS_SQL = register("bim.stored_blocks", """
+select id, idx, type, value, language
+from public.bim_blocks
+where entry_id = $1
+order by idx;
+""")
+
+DELETE_BLOCK_IDS_SQL = register("bim.delete_block_ids", "delete from public.bim_blocks where id = any($1::bigint[]);")
+
+# Phase 1 of a reorder: park moving rows on unique negative idx values
+PARK_BLOCKS_SQL = register("bim.park_blocks", "update public.bim_blocks set idx = -1 - idx where id = any($1::bigint[]);")
+
+UPDATE_BLOCKS_SQL = register("bim.update_blocks", """
+update public.bim_blocks b
+set idx = u.idx, type = u.type, value = u.value, language = u.language
+from unnest($1::bigint[], $2::int[], $3::text[], $4::text[], $5::text[]) as u(id, idx, type, value, language)
+where b.id = u.id;
+""")
+DELETE_ENTRY_SQL  = register("bim.delete_entry", "delete from public.bim_entries where id = $1;")
 
 # Optimized UPDATE query that returns the updated row in one round-trip
-UPDATE_ENTRY_SQL = """
+UPDATE_ENTRY_SQL = register("bim.update_entry", """
 update public.bim_entries 
-set title = $2, tags = $3, locked = $4 
-where id = $1 
-returning id, title, created_at, tags, coalesce(locked, false) as locked;
-"""
+set title = $2, tags = $3, locked = $4, version = version + 1 
+where id = $1 and ($5::int is null or version = $5) 
+returning id, title, created_at, tags, coalesce(locked, false) as locked, version;
+""")
+
+ENTRY_EXISTS_SQL = register("bim.entry_exists", "select id, version from public.bim_entries where id = $1;")
 
 # Minimal UPDATE for just toggling lock (more efficient)
-UPDATE_LOCK_ONLY_SQL = """
+UPDATE_LOCK_ONLY_SQL = register("bim.update_lock", """
 update public.bim_entries 
-set locked = $2 
-where id = $1 
-returning id, coalesce(locked, false) as locked;
-"""
+set locked = $2, version = version + 1 
+where id = $1 and ($3::int is null or version = $3) 
+returning id, coalesce(locked, false) as locked, version;
+""")
 
 from asyncpg import exceptions as pgexc
 
@@ -218,61 +348,170 @@ RESET_SEQ_TO_MAX_SQL = """
 SELECT setval($1, (SELECT COALESCE(MAX(id),0)+1 FROM public.bim_blocks), false);
 """
 
-LOG_BIM_SEQ = os.getenv("LOG_BIM_SEQ", "0") == "1"
+SEQ_STATE_SQL = """
+SELECT COALESCE(MAX(id), 0) AS max_id, pg_sequence_last_value($1::regclass) AS last_value
+FROM public.bim_blocks;
+"""
 
-async def _insert_block_with_retry(conn, entry_id, i, b):
+async def _repair_block_sequence(conn) -> bool:
+    """Move the bim_blocks id sequence past MAX(id) if it fell behind (e.g. after a manual import)."""
+    seqname = await conn.fetchval(FIND_ATTACHED_SEQ_SQL)
+    if not seqname:
+        return False
+    state = await conn.fetchrow(SEQ_STATE_SQL, seqname)
+    if state["last_value"] is not None and state["last_value"] >= state["max_id"]:
+        return False
+    await conn.execute(RESET_SEQ_TO_MAX_SQL, seqname)
+    logger.warning("[BIM] %s was behind MAX(id)=%s; reset", seqname, state["max_id"])
+    return True
+
+async def check_block_sequence() -> bool:
+    """One-time startup check (called from app.main after migrations)."""
+    pool = await _get_pool()
+    async with pool.acquire() as conn:
+        return await _repair_block_sequence(conn)
+
+async def _insert_blocks(conn, entry_id, blocks: List[dict], idxs: Optional[List[int]] = None) -> None:
+    """Insert normalized blocks (at positions `idxs`, default 0..n-1) with a single statement."""
+    if not blocks:
+        return
+    args = (
+        entry_id,
+        idxs if idxs is not None else list(range(len(blocks))),
+        [b["type"] for b in blocks],
+        [b["value"] for b in blocks],
+        [b["language"] for b in blocks],
+    )
     try:
-        row = await conn.fetchrow(INSERT_BLOCK_SQL_RETURNING, entry_id, i, b["type"], b["value"], b["language"])
-        if LOG_BIM_SEQ:
-            logger.debug("[bim] insert ok -> id %s", row["id"])
+        # Savepoint: a pkey clash must not abort the caller's transaction
+        async with conn.transaction():
+            await conn.execute(INSERT_BLOCKS_SQL, *args)
         return
     except pgexc.UniqueViolationError as e:
         if 'bim_blocks_pkey' not in str(e):
             raise
-        if LOG_BIM_SEQ:
-            logger.debug("[bim] duplicate on first try; attempting seq reset")
-
-    seqname = await conn.fetchval(FIND_ATTACHED_SEQ_SQL)
-    if seqname:
-        await conn.execute(RESET_SEQ_TO_MAX_SQL, seqname)
-        try:
-            row = await conn.fetchrow(INSERT_BLOCK_SQL_RETURNING, entry_id, i, b["type"], b["value"], b["language"])
-            if LOG_BIM_SEQ:
-                logger.debug("[bim] after reset -> id %s", row["id"])
-            return
-        except pgexc.UniqueViolationError as e2:
-            if 'bim_blocks_pkey' not in str(e2):
-                raise
-            if LOG_BIM_SEQ:
-                logger.debug("[bim] duplicate even after reset; falling back")
-
-    await conn.execute("SELECT pg_advisory_xact_lock(hashtext('public.bim_blocks.id'));")
-    next_id_row = await conn.fetchrow(
-        "SELECT GREATEST(COALESCE(MAX(id),0)+1, (SELECT last_value FROM public.bim_blocks_id_seq)+1) AS nid "
-        "FROM public.bim_blocks;"
+    # Sequence drifted since the startup check; repair once and retry
+    await _repair_block_sequence(conn)
+    await conn.execute(INSERT_BLOCKS_SQL, *args)
+
+def _block_hash(b) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for part in (b["type"], b["language"] or "", b["value"] or ""):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.digest()
+
+def _plan_block_sync(stored: List[dict], blocks: List[dict]):
+    """
+    Diff stored rows against the new block list. Returns (delete_ids, updates, inserts):
+      - rows whose content hash and idx both match are left alone,
+      - same content at another idx -> idx-only update (reorder),
+      - leftover rows are reused for edited blocks (same idx first), then deleted,
+      - whatever is still unmatched is inserted.
+    updates: [(id, idx, block, moved)], inserts: [(idx, block)].
+    """
+    by_idx = {r["idx"]: r for r in stored}
+    new_hashes = [_block_hash(b) for b in blocks]
+    used = set()
+    pending = []
+
+    for i, (b, h) in enumerate(zip(blocks, new_hashes)):
+        r = by_idx.get(i)
+        if r is not None and _block_hash(r) == h:
+            used.add(r["id"])
+        else:
+            pending.append(i)
+
+    free_by_hash = {}
+    for r in stored:
+        if r["id"] not in used:
+            free_by_hash.setdefault(_block_hash(r), []).append(r)
+
+    updates, unmatched = [], []
+    for i in pending:
+        candidates = free_by_hash.get(new_hashes[i])
+        if candidates:
+            r = candidates.pop(0)
+            used.add(r["id"])
+            updates.append((r["id"], i, blocks[i], True))
+        else:
+            unmatched.append(i)
+
+    leftovers = [r for r in stored if r["id"] not in used]
+    leftover_at = {r["idx"]: r for r in leftovers}
+    inserts, still = [], []
+    for i in unmatched:
+        r = leftover_at.pop(i, None)
+        if r is not None:
+            used.add(r["id"])
+            updates.append((r["id"], i, blocks[i], False))
+        else:
+            still.append(i)
+    spare = [r for r in leftovers if r["id"] not in used]
+    for i in still:
+        if spare:
+            r = spare.pop(0)
+            updates.append((r["id"], i, blocks[i], True))
+        else:
+            inserts.append((i, blocks[i]))
+    delete_ids = [r["id"] for r in spare]
+    return delete_ids, updates, inserts
+
+async def _sync_blocks(conn, entry_id, blocks: List[dict]) -> int:
+    """Bring an entry's stored blocks to `blocks` with minimal writes. Returns rows touched."""
+    stored = [dict(r) for r in await conn.fetch(STORED_BLOCKS_SQL, entry_id)]
+    delete_ids, updates, inserts = _plan_block_sync(stored, blocks)
+
+    if delete_ids:
+        await conn.execute(DELETE_BLOCK_IDS_SQL, delete_ids)
+    if updates:
+        moved = [u[0] for u in updates if u[3]]
+        if moved:
+            # Two-phase reorder so a unique (entry_id, idx) never sees a duplicate
+            await conn.execute(PARK_BLOCKS_SQL, moved)
+        await conn.execute(
+            UPDATE_BLOCKS_SQL,
+            [u[0] for u in updates],
+            [u[1] for u in updates],
+            [u[2]["type"] for u in updates],
+            [u[2]["value"] for u in updates],
+            [u[2]["language"] for u in updates],
+        )
+    if inserts:
+        await _insert_blocks(conn, entry_id, [b for _i, b in inserts], [i for i, _b in inserts])
+
+    touched = len(delete_ids) + len(updates) + len(inserts)
+    logger.debug("[BIM] entry %s block sync: -%d ~%d +%d", entry_id, len(delete_ids), len(updates), len(inserts))
+    return touched
+
+def _expected_version(request: Request, payload: BimUpdate) -> Optional[int]:
+    """
+    Version from the payload, else from an X-Entry-Version header. If-Match is
+    left alone: GET's ETag is a cache validator (app/conditional.py), not this.
+    """
+    if payload.version is not None:
+        return payload.version
+    header = request.headers.get(ENTRY_VERSION_HEADER, "").strip()
+    if not header:
+        return None
+    try:
+        return int(header)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{ENTRY_VERSION_HEADER} must be an integer entry version")
+
+async def _version_conflict(conn, entry_id):
+    """Called when a versioned UPDATE matched no row: 404 if gone, else 409."""
+    row = await conn.fetchrow(ENTRY_EXISTS_SQL, entry_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Not found")
+    raise HTTPException(
+        status_code=409,
+        detail={"error": "version_conflict", "currentVersion": row["version"]},
     )
-    next_id = int(next_id_row["nid"])
-    for bump in (0, 10, 100):
-        try:
-            nid = next_id + bump
-            await conn.execute(
-                "INSERT INTO public.bim_blocks (id, entry_id, idx, type, value, language) "
-                "VALUES ($1, $2, $3, $4, $5, $6);",
-                nid, entry_id, i, b["type"], b["value"], b["language"]
-            )
-            if LOG_BIM_SEQ:
-                logger.debug("[bim] fallback explicit id -> %s", nid)
-            return
-        except pgexc.UniqueViolationError as e3:
-            if 'bim_blocks_pkey' not in str(e3):
-                raise
-            continue
-    raise HTTPException(status_code=500, detail="Could not allocate unique id for bim_blocks")
 
 # ----------------------------- uploads --------------------------------
-DEFAULT_UPLOAD_ROOT = Path(__file__).resolve().parents[1] / "uploads"
-UPLOAD_DIR = Path(settings.web_root or DEFAULT_UPLOAD_ROOT)
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Same pipeline (size cap, magic-byte sniffing, off-loop writes) as profile images
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
 
 @router.post("/upload-image")
 @router.post("/upload-image/")
@@ -284,59 +523,101 @@ async def upload_image(
     if up is None:
         raise HTTPException(status_code=400, detail="No file provided. Use form field 'file' (or 'image').")
 
-    ctype = (up.content_type or "").lower()
-    ext = Path(up.filename or "").suffix.lower()
-    if ext not in {".png", ".jpg", ".jpeg", ".gif", ".webp"}:
-        if   ctype == "image/jpeg": ext = ".jpg"
-        elif ctype == "image/png":  ext = ".png"
-        elif ctype == "image/gif":  ext = ".gif"
-        elif ctype == "image/webp": ext = ".webp"
-        else:                       ext = ".png"
-
-    name = f"{uuid.uuid4().hex}{ext}"
-    dest = UPLOAD_DIR / name
-    try:
-        with dest.open("wb") as out:
-            shutil.copyfileobj(up.file, out)
-    finally:
-        try: up.file.close()
-        except Exception: pass
-
-    return {"url": f"/uploads/{name}", "filename": name, "content_type": ctype}
+    stored = await save_upload(up, max_bytes=MAX_UPLOAD_BYTES)
+    schedule_variants(stored.url)
+    return {"url": stored.url, "filename": stored.filename, "content_type": stored.content_type}
 
 # ------------------------------- API ---------------------------------
-# Helper to parse JSON fields coming from SQL
+# Helper for rows carrying json_agg'd blocks: the JSON text Postgres built is
+# embedded as-is in the response (orjson Fragment), never parsed here.
 
 def _row_to_dict_with_parsed_blocks(row) -> dict:
     d = dict(row)
-    if isinstance(d.get("blocks"), str):
-        d["blocks"] = orjson.loads(d["blocks"])
+    if "blocks" in d:
+        d["blocks"] = raw_json(d["blocks"], "[]")
     # Ensure locked is a boolean
     d["locked"] = bool(d.get("locked", False))
     return d
 
+INDEX_DEFAULT_LIMIT = 20
+INDEX_MAX_LIMIT = 100
+
+def _encode_cursor(created_at, entry_id) -> str:
+    raw = orjson.dumps([created_at.isoformat(), entry_id])
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, entry_id = orjson.loads(raw)
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _index_item(row, owner: bool) -> dict:
+    d = dict(row)
+    d["locked"] = bool(d.get("locked", False))
+    d["block_count"] = int(d.get("block_count") or 0)
+    # Locked entries only expose their title/tags to visitors
+    d["preview"] = "" if d["locked"] and not owner else (d.get("preview") or "")
+    return d
+
 # ✅ Base routes so /api/bim and /api/bim/ NEVER 404
-@router.get("", summary="BIM root — minimal index (safe if DB down)")
-@router.get("/", summary="BIM root — minimal index (safe if DB down)")
-async def bim_root():
-    """Return the FULL list of BIM entries including blocks (previous behavior).
-    - If the DB is temporarily unavailable, return an **empty list** (same shape)
-      so the frontend doesn't break waiting for an array.
+@router.get("", summary="BIM root — paginated index (safe if DB down)")
+@router.get("/", summary="BIM root — paginated index (safe if DB down)")
+async def bim_root(request: Request, full: bool = False, limit: int = INDEX_DEFAULT_LIMIT, cursor: Optional[str] = None):
+    """Return one page of the BIM index: {"items": [...], "nextCursor": str|None}.
+    - Items carry id/title/tags/locked/created_at/block_count/preview only;
+      blocks are loaded per entry via GET /api/bim/{id}.
+    - `?full=1` returns the FULL list including blocks (previous behavior).
+    - If the DB is temporarily unavailable, return an **empty** result of the
+      same shape so the frontend doesn't break.
+    - Answers If-None-Match with 304 from the tables' change counters.
     """
+    return await conditional.respond(
+        request, BIM_TABLES, lambda: _bim_index(request, full, limit, cursor), variant=_variant(request),
+    )
+
+async def _bim_index(request: Request, full: bool, limit: int, cursor: Optional[str]):
+    if full:
+        return await _bim_full_list()
+
+    limit = max(1, min(limit, INDEX_MAX_LIMIT))
+    after = _decode_cursor(cursor) if cursor else None
+    try:
+        pool = await _get_pool()
+        async with pool.acquire() as conn:
+            await ensure_migrated(conn)
+            # Fetch one extra row to know whether another page exists
+            if after is None:
+                rows = await conn.fetch(INDEX_SQL, limit + 1)
+            else:
+                rows = await conn.fetch(INDEX_AFTER_SQL, limit + 1, after[0], after[1])
+    except Exception as e:
+        logger.error("[BIM] Error loading index: %s", e)
+        return ORJSONResponse({"items": [], "nextCursor": None}, headers=NO_STORE)
+
+    owner = _is_owner(request)
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = _encode_cursor(last["created_at"], last["id"])
+    return ORJSONResponse({"items": [_index_item(r, owner) for r in page], "nextCursor": next_cursor})
+
+async def _bim_full_list() -> list:
     try:
         pool = await _get_pool()
         async with pool.acquire() as conn:
             rows = await conn.fetch(LIST_SQL)
             result = [_row_to_dict_with_parsed_blocks(r) for r in rows]
             logger.debug("[BIM] Returning %d entries", len(result))
-            if result:
-                logger.debug("[BIM] Sample entry locked status: id=%s, locked=%s", result[0]['id'], result[0].get('locked'))
-            return result
+            return ORJSONResponse(result)
     except Exception as e:
         # Keep this as error, but it will be hidden if your global level is WARNING
         logger.error("[BIM] Error loading entries: %s", e)
         # Preserve response shape expected by the UI (list/array)
-        return []
+        return ORJSONResponse([], headers=NO_STORE)
 
 @router.get("/health", summary="Readiness for BIM router")
 async def bim_health():
@@ -369,8 +650,45 @@ async def bim_meta():
         return {"ok": False, "error": str(e)}
     return {"ok": True}
 
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+# Declared before /{entry_id} so "search" isn't parsed as an id
+@router.get("/search", summary="Full-text search over BIM entries")
+async def bim_search(request: Request, q: str = "", limit: int = SEARCH_DEFAULT_LIMIT):
+    """Ranked matches with highlighted snippets; locked entries are owner-only."""
+    return await conditional.respond(
+        request, BIM_TABLES, lambda: _bim_search(request, q, limit), variant=_variant(request),
+    )
+
+async def _bim_search(request: Request, q: str, limit: int):
+    q = q.strip()
+    if not q:
+        return {"items": []}
+    if len(q) > 200:
+        raise HTTPException(status_code=400, detail="Query too long")
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+    pool = await _get_pool()
+    async with pool.acquire() as conn:
+        await ensure_migrated(conn)
+        rows = await conn.fetch(SEARCH_SQL, q, limit, _is_owner(request))
+
+    items = []
+    for r in rows:
+        d = dict(r)
+        d["locked"] = bool(d.get("locked", False))
+        d["rank"] = float(d["rank"])
+        items.append(d)
+    return ORJSONResponse({"items": items})
+
 @router.get("/{entry_id}")
 async def get_entry(entry_id: int, request: Request):
+    return await conditional.respond(
+        request, BIM_TABLES, lambda: _get_entry(entry_id, request), variant=_variant(request),
+    )
+
+async def _get_entry(entry_id: int, request: Request):
     pool = await _get_pool()
     async with pool.acquire() as conn:
         row = await conn.fetchrow(GET_ONE_SQL, entry_id)
@@ -387,7 +705,7 @@ async def get_entry(entry_id: int, request: Request):
                     detail="🔒 This entry is locked and can only be viewed by the owner."
                 )
         
-        return d
+        return ORJSONResponse(d)
 
 @router.post("", status_code=201)
 @router.post("/", status_code=201)
@@ -404,13 +722,14 @@ async def create_entry(payload: BimCreate):
             entry_id = e["id"]
             logger.debug("[BIM] Created entry %s, locked=%s", entry_id, e.get("locked"))
             
-            for i, b in enumerate(_normalize_blocks(payload.blocks)):
-                await _insert_block_with_retry(conn, entry_id, i, b)
+            await _insert_blocks(conn, entry_id, _normalize_blocks(payload.blocks))
+            await conn.execute(REFRESH_SUMMARY_SQL, entry_id)
         
         row = await conn.fetchrow(GET_ONE_SQL, entry_id)
         d = _row_to_dict_with_parsed_blocks(row)
         logger.debug("[BIM] Final entry %s locked status: %s", entry_id, d.get("locked"))
-        return d
+        # blocks is an orjson Fragment, which jsonable_encoder can't walk
+        return ORJSONResponse(d, status_code=201)
 
 @router.put("/{entry_id}")
 @router.put("/{entry_id}/")
@@ -428,27 +747,25 @@ async def update_entry(entry_id: int, payload: BimUpdate, request: Request):
     tags  = payload.tags or []
     locked = payload.locked if payload.locked is not None else False
     norm  = _normalize_blocks(payload.blocks)
+    expected = _expected_version(request, payload)
 
     logger.debug("[BIM] PUT entry %s with locked=%s", entry_id, locked)
 
     pool = await _get_pool()
     async with pool.acquire() as conn:
-        exists = await conn.fetchrow("select id from public.bim_entries where id = $1;", entry_id)
-        if not exists:
-            raise HTTPException(status_code=404, detail="Not found")
-
         async with conn.transaction():
-            update_result = await conn.fetchrow(UPDATE_ENTRY_SQL, entry_id, title, tags, locked)
+            update_result = await conn.fetchrow(UPDATE_ENTRY_SQL, entry_id, title, tags, locked, expected)
             logger.debug("[BIM] Update result: %s", update_result)
-            
-            await conn.execute(DELETE_BLOCKS_SQL, entry_id)
-            for i, b in enumerate(norm):
-                await _insert_block_with_retry(conn, entry_id, i, b)
+            if update_result is None:
+                await _version_conflict(conn, entry_id)
+
+            await _sync_blocks(conn, entry_id, norm)
+            await conn.execute(REFRESH_SUMMARY_SQL, entry_id)
         
         row = await conn.fetchrow(GET_ONE_SQL, entry_id)
         d = _row_to_dict_with_parsed_blocks(row)
         logger.debug("[BIM] Final PUT result locked: %s", d.get("locked"))
-        return d
+        return ORJSONResponse(d)
 
 @router.patch("/{entry_id}")
 @router.patch("/{entry_id}/")
@@ -480,38 +797,42 @@ async def patch_entry(entry_id: int, payload: BimUpdate, request: Request):
         
         if isinstance(new_tags, str):
             new_tags = orjson.loads(new_tags)
+        expected = _expected_version(request, payload)
 
         async with conn.transaction():
             # Use optimized query that returns the updated row
             if payload.blocks is None and payload.title is None and payload.tags is None and payload.locked is not None:
                 # Only updating lock status - use minimal query
                 logger.debug("[BIM] 🔧 Using optimized lock-only UPDATE")
-                result = await conn.fetchrow(UPDATE_LOCK_ONLY_SQL, entry_id, new_locked)
+                result = await conn.fetchrow(UPDATE_LOCK_ONLY_SQL, entry_id, new_locked, expected)
                 logger.debug("[BIM] 🔧 Lock update result: %s", result)
             else:
                 # Full update
                 logger.debug("[BIM] 🔧 Executing full UPDATE with: id=%s, title=%s, tags=%s, locked=%s", entry_id, new_title, new_tags, new_locked)
-                result = await conn.fetchrow(UPDATE_ENTRY_SQL, entry_id, new_title, new_tags, new_locked)
+                result = await conn.fetchrow(UPDATE_ENTRY_SQL, entry_id, new_title, new_tags, new_locked, expected)
                 logger.debug("[BIM] 🔧 Update SQL result: %s", result)
+            if result is None:
+                await _version_conflict(conn, entry_id)
             
             # Update blocks if provided
             if payload.blocks is not None:
                 if not payload.blocks:
                     raise HTTPException(status_code=400, detail="If 'blocks' is provided, it cannot be empty")
                 norm = _normalize_blocks(payload.blocks)
-                await conn.execute(DELETE_BLOCKS_SQL, entry_id)
-                for i, b in enumerate(norm):
-                    await _insert_block_with_retry(conn, entry_id, i, b)
+                await _sync_blocks(conn, entry_id, norm)
+            if payload.blocks is not None or payload.title is not None or payload.tags is not None:
+                # Derived columns (preview, search document) follow title/tags/blocks
+                await conn.execute(REFRESH_SUMMARY_SQL, entry_id)
         
         # Get final state
         row = await conn.fetchrow(GET_ONE_SQL, entry_id)
         d = _row_to_dict_with_parsed_blocks(row)
         
         logger.debug("[BIM] 🔧 Final response locked: %s", d.get("locked"))
-        logger.debug("[BIM] 🔧 Returning full entry with %d blocks", len(d.get("blocks", [])))
+        logger.debug("[BIM] 🔧 Returning full entry %s (version %s)", entry_id, d.get("version"))
         logger.debug("%s", "="*60)
         
-        return d
+        return ORJSONResponse(d)
 
 @router.post("/{entry_id}")
 @router.post("/{entry_id}/")
@@ -524,7 +845,7 @@ async def method_override(entry_id: int, payload: dict, request: Request):
         data = BimUpdate(**payload)
         return await patch_entry(entry_id, data, request)
     elif override == "DELETE":
-        return await delete_entry(entry_id)
+        return await delete_entry(entry_id, request)
     raise HTTPException(status_code=405, detail="Method Not Allowed")
 
 @router.delete("/{entry_id}", status_code=204)
@@ -0,0 +1,88 @@
+# app/routes/bootstrap.py
+"""
+GET /api/bootstrap: everything the public pages need for first paint in one
+response, so a cold load makes one API round trip instead of eight.
+
+The whole blob is one statement on one pool connection: json_build_object()
+wraps each section's own list query (profile.GET_SQL, skills.LIST_SQL, ...) in
+json_agg / row_to_json, and the decoded rows go through the same row adapters
+as their own endpoints, so the shapes match /api/profile, /api/home, ...
+The blob is cached and revalidated like any other public resource (see
+app/response_cache.py, app/conditional.py).
+"""
+from functools import lru_cache
+
+import orjson
+from fastapi import APIRouter, Request
+
+from ..db import pool
+from ..images import load_srcsets
+from ..migrations import ensure_migrated
+from .. import response_cache
+from . import (
+    certificates_gallery, education, experience, home, languages, profile, projects, skills,
+)
+
+router = APIRouter()
+
+
+def _subquery(sql: str) -> str:
+    # Newline-terminated so a trailing -- comment can't swallow the wrapper
+    return sql.strip().rstrip(";") + "\n"
+
+
+def _one(sql: str) -> str:
+    return f"(select row_to_json(t) from ({_subquery(sql)}) t)"
+
+
+def _all(sql: str) -> str:
+    # Rows keep the ORDER BY of the wrapped query
+    return f"(select coalesce(json_agg(t), '[]'::json) from ({_subquery(sql)}) t)"
+
+
+@lru_cache(maxsize=16)
+def _bootstrap_sql(education_sql: str) -> str:
+    # education's SELECT depends on its introspected columns, hence the cache key
+    parts = (
+        ("profile", _one(profile.GET_SQL)),
+        ("welcome", f"({_subquery(home.WELCOME_SQL)})"),
+        ("highlights", _all(home.HIGHLIGHTS_SQL)),
+        ("skills", _all(skills.LIST_SQL)),
+        ("languages", _all(languages.LIST_SQL)),
+        ("experience", _all(experience.LIST_SQL)),
+        ("education", _all(education_sql)),
+        ("projects", _all(projects.LIST_SQL)),
+        ("gallery", _all(certificates_gallery.GALLERY_SQL)),
+    )
+    return "select json_build_object({})::text;".format(
+        ", ".join(f"'{key}', {sql}" for key, sql in parts)
+    )
+
+
+async def _load_bootstrap() -> dict:
+    async with pool().acquire() as con:
+        await ensure_migrated(con)
+        sql = await education._statements(con)
+        d = orjson.loads(await con.fetchval(_bootstrap_sql(sql.select_all)))
+
+    urls = [r["image_url"] for r in d["gallery"]]
+    if d["profile"]:
+        urls += [d["profile"]["avatar_url"], d["profile"]["banner_url"]]
+    await load_srcsets(urls)
+
+    # Same order the pages render
+    return {
+        "profile": profile._read_profile_row(d["profile"]) if d["profile"] else None,
+        "home": home._read_home(d["welcome"], d["highlights"]),
+        "skills": [skills._read_row(r) for r in d["skills"]],
+        "languages": [languages._read_row(r) for r in d["languages"]],
+        "experience": [experience._read_row(r) for r in d["experience"]],
+        "education": [education._read_row(r) for r in d["education"]],
+        "projects": [projects._read_project_row(r) for r in d["projects"]],
+        "gallery": [certificates_gallery._read_gallery_row(r) for r in d["gallery"]],
+    }
+
+
+@router.get("/api/bootstrap")
+async def get_bootstrap(request: Request):
+    return await response_cache.cached("bootstrap", request, _load_bootstrap)
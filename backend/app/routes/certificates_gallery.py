@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.datastructures import UploadFile as StarletteUploadFile
 from ..db import pool
+from ..migrations import ensure_migrated
+from ..queries import register
 from ..auth import require_owner
-from ..utils import save_data_url_image
-import os
+from .. import conditional, response_cache
+from ..images import load_srcsets, schedule_variants, srcset_for
+from ..storage import save_data_url, save_upload
+import json
 import uuid
 
 router = APIRouter()
@@ -19,6 +24,7 @@ def _read_cert_row(r) -> dict:
         "credentialId": r["credential_id"],
         "credentialUrl": r["credential_url"],
         "imageUrl": r["image_url"],
+        "imageSrcset": srcset_for(r["image_url"]),
         "skills": r["skills"] or [],
         "description": r["description"],
         "sortOrder": r["sort_order"],
@@ -29,155 +35,231 @@ def _read_cert_row(r) -> dict:
 
 # --------------------------- Schema bootstrap -------------------------------
 async def _ensure_table(con):
-    ddl = """
-    create table if not exists certificates (
-        id uuid primary key,
-        title text not null,
-        issuer text null,
-        type text null,
-        date_month text null,
-        credential_id text null,
-        credential_url text null,
-        image_url text null,
-        skills text[] not null default '{}',
-        description text null,
-        sort_order int not null default 0,
-        created_at timestamptz not null default now(),
-        updated_at timestamptz null
-    );
-
-    -- Backfill columns for older deployments (safe if already exist)
-    alter table certificates
-        add column if not exists skills text[] not null default '{}',
-        add column if not exists description text,
-        add column if not exists updated_at timestamptz;
-    """
-    await con.execute(ddl)
+    # Schema lives in app/migrations.py; no-op once startup has migrated.
+    await ensure_migrated(con)
+
+
+# ---------------------------------- SQL -------------------------------------
+CERT_LIST_SQL = register("certificates.list", """
+    select id, title, issuer, type, date_month, credential_id, credential_url,
+           image_url, skills, description, sort_order, created_at, updated_at
+    from certificates
+    order by sort_order asc, created_at desc;
+""")
+
+CERT_GET_SQL = register("certificates.get_one", """
+    select id, title, issuer, type, date_month, credential_id, credential_url,
+           image_url, skills, description, sort_order, created_at, updated_at
+    from certificates
+    where id = $1;
+""")
+
+GALLERY_SQL = register("certificates.gallery", """
+    select
+        id,
+        title,
+        issuer,
+        type,
+        date_month,
+        credential_id,
+        credential_url,
+        image_url,
+        skills,
+        description as raw_description,
+        sort_order,
+        -- legacy computed description kept for gallery cards:
+        coalesce(issuer,'') ||
+        case when date_month is not null then ' • '||date_month else '' end as legacy_description
+    from certificates
+    order by sort_order asc, created_at desc;
+""")
 
 
 # --------------------------- Read endpoints ---------------------------------
-@router.get("/api/certificates")
-async def list_certificates():
-    """
-    Full certificate rows (used by editor to prefill).
-    """
+async def _load_certificates() -> list:
     async with pool().acquire() as con:
         await _ensure_table(con)
-        rows = await con.fetch(
-            """
-            select id, title, issuer, type, date_month, credential_id, credential_url,
-                   image_url, skills, description, sort_order, created_at, updated_at
-            from certificates
-            order by sort_order asc, created_at desc;
-            """
-        )
+        rows = await con.fetch(CERT_LIST_SQL)
+    await load_srcsets(r["image_url"] for r in rows)
     return [_read_cert_row(r) for r in rows]
 
 
-@router.get("/api/certificates/{id}")
-async def get_certificate(id: str):
-    """
-    Get a single certificate by id.
-    """
+async def _load_certificate(id: str) -> dict:
     async with pool().acquire() as con:
         await _ensure_table(con)
-        r = await con.fetchrow(
-            """
-            select id, title, issuer, type, date_month, credential_id, credential_url,
-                   image_url, skills, description, sort_order, created_at, updated_at
-            from certificates
-            where id = $1;
-            """,
-            id,
-        )
+        r = await con.fetchrow(CERT_GET_SQL, id)
     if not r:
         raise HTTPException(status_code=404, detail="Not found")
+    await load_srcsets((r["image_url"],))
     return _read_cert_row(r)
 
 
-@router.get("/api/gallery")
-async def list_gallery():
+@router.get("/api/certificates")
+async def list_certificates(request: Request):
+    """
+    Full certificate rows (used by editor to prefill).
+    """
+    return await conditional.respond(request, ("certificates",), _load_certificates)
+
+
+@router.get("/api/certificates/{id}")
+async def get_certificate(id: str, request: Request):
+    """
+    Get a single certificate by id.
+    """
+    return await conditional.respond(request, ("certificates",), lambda: _load_certificate(id))
+
+
+def _read_gallery_row(r) -> dict:
+    return {
+        # minimal, legacy fields expected by existing gallery views
+        "id": r["id"],
+        "title": r["title"],
+        "description": r["legacy_description"],  # (kept for backward-compat)
+        "imageUrl": r["image_url"],
+        "imageSrcset": srcset_for(r["image_url"]),
+        "tags": [],  # unchanged
+        "sortOrder": r["sort_order"],
+        "published": True,
+
+        # ✅ extra structured fields for editors / prefills
+        "issuer": r["issuer"],
+        "type": r["type"],
+        "dateMonth": r["date_month"],
+        "credentialId": r["credential_id"],
+        "credentialUrl": r["credential_url"],
+        "skills": r["skills"] or [],
+        "rawDescription": r["raw_description"],  # the real description column
+    }
+
+
+async def fetch_gallery(con) -> list:
     """
     Lightweight gallery list used by the public grid.  Historically this only
     returned a computed 'description'. To keep backward compatibility we keep
     that field *and* include the structured fields your editor needs so editing
     a 'Course' doesn't fall back to 'Certificate'.
     """
+    await _ensure_table(con)
+    rows = await con.fetch(GALLERY_SQL)
+    await load_srcsets(r["image_url"] for r in rows)
+    return [_read_gallery_row(r) for r in rows]
+
+
+async def _load_gallery() -> list:
     async with pool().acquire() as con:
-        await _ensure_table(con)
-        rows = await con.fetch(
-            """
-            select
-                id,
-                title,
-                issuer,
-                type,
-                date_month,
-                credential_id,
-                credential_url,
-                image_url,
-                skills,
-                description as raw_description,
-                sort_order,
-                -- legacy computed description kept for gallery cards:
-                coalesce(issuer,'') ||
-                case when date_month is not null then ' • '||date_month else '' end as legacy_description
-            from certificates
-            order by sort_order asc, created_at desc;
-            """
-        )
+        return await fetch_gallery(con)
 
-    items = []
-    for r in rows:
-        items.append(
-            {
-                # minimal, legacy fields expected by existing gallery views
-                "id": r["id"],
-                "title": r["title"],
-                "description": r["legacy_description"],  # (kept for backward-compat)
-                "imageUrl": r["image_url"],
-                "tags": [],  # unchanged
-                "sortOrder": r["sort_order"],
-                "published": True,
-
-                # ✅ extra structured fields for editors / prefills
-                "issuer": r["issuer"],
-                "type": r["type"],
-                "dateMonth": r["date_month"],
-                "credentialId": r["credential_id"],
-                "credentialUrl": r["credential_url"],
-                "skills": r["skills"] or [],
-                "rawDescription": r["raw_description"],  # the real description column
-            }
-        )
-    return items
+
+@router.get("/api/gallery")
+async def list_gallery(request: Request):
+    return await response_cache.cached("gallery", request, _load_gallery)
 
 
 # --------------------------- Create / Update / Delete -----------------------
+_FORM_FIELDS = (
+    "title", "issuer", "type", "dateMonth", "credentialId",
+    "credentialUrl", "imageUrl", "skills", "description", "sortOrder",
+)
+
+
+def _form_to_body(form) -> dict:
+    """Multipart fields -> the JSON body shape. A `data` field may carry the whole body as JSON."""
+    body = {}
+    if isinstance(form.get("data"), str):
+        try:
+            body = json.loads(form["data"]) or {}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Field 'data' must be JSON")
+    for key in _FORM_FIELDS:
+        val = form.get(key)
+        if isinstance(val, str):
+            body[key] = val
+    if isinstance(body.get("skills"), str):
+        raw = body["skills"].strip()
+        if raw.startswith("["):
+            try:
+                body["skills"] = json.loads(raw)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Field 'skills' must be a JSON array or a comma list")
+        else:
+            body["skills"] = [x.strip() for x in raw.split(",") if x.strip()]
+    if isinstance(body.get("sortOrder"), str):
+        try:
+            body["sortOrder"] = int(body["sortOrder"] or 0)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="sortOrder must be an integer")
+    return body
+
+
+def _is_data_url(value) -> bool:
+    return isinstance(value, str) and value[:5].lower() == "data:"
+
+
+async def _store_data_url(data_url: str) -> str:
+    """Save a data URL image under /uploads and return its URL; never let one reach the row."""
+    saved = await save_data_url(data_url)
+    if not saved:
+        raise HTTPException(status_code=415, detail="Image data URL is not a supported, valid image")
+    schedule_variants(saved.url)
+    return saved.url
+
+
+async def _read_gallery_body(request: Request):
+    """
+    Parse a create/update request into (body, image_url).
+
+    multipart/form-data: scalar fields (or a JSON `data` field) plus the image as
+    a `file`/`image` part, streamed through the shared upload pipeline.
+    application/json (legacy): `image` or `imageUrl` may be a base64 data URL; it
+    is size-checked up front and decoded in chunks off the event loop.
+    A data URL that can't be stored as an image is a 415, so it never ends up
+    in certificates.image_url.
+    """
+    ctype = request.headers.get("content-type", "")
+    if ctype.startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+        form = await request.form()
+        try:
+            body = _form_to_body(form)
+            image_url = body.get("imageUrl")
+            part = form.get("file") or form.get("image")
+            if isinstance(part, StarletteUploadFile):
+                stored = await save_upload(part)
+                image_url = stored.url
+                schedule_variants(image_url)
+            elif _is_data_url(image_url):
+                image_url = await _store_data_url(image_url)
+        finally:
+            await form.close()
+        return body, image_url
+
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Body must be an object")
+
+    image_url = body.get("imageUrl")
+    data_url = next((v for v in (body.get("image"), image_url) if _is_data_url(v)), None)
+    if data_url:
+        image_url = await _store_data_url(data_url)
+    return body, image_url
+
+
 @router.post("/api/gallery")
-async def create_gallery(body: dict, user=Depends(require_owner)):
+@response_cache.invalidates("gallery")
+async def create_gallery(request: Request, user=Depends(require_owner)):
     """
     Create a new certificate row.
 
-    Accepts either:
+    Accepts either multipart/form-data (fields + `file` part) or JSON with:
       - image: data URL string
       - imageUrl: data URL string or an existing URL
-    In both cases, if a data URL is provided it will be saved under /uploads
-    and imageUrl will point to the saved file.
+    In all cases an uploaded/data-URL image is saved under /uploads and
+    imageUrl will point to the saved file.
     """
-    webroot = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "..", "..", "uploads")
-    )
-    os.makedirs(webroot, exist_ok=True)
-
-    image_url = body.get("imageUrl")
-    data_url = body.get("image") or (
-        image_url if (image_url or "").startswith("data:image/") else None
-    )
-    if data_url:
-        saved = save_data_url_image(data_url, webroot)
-        if saved:
-            image_url = saved
+    body, image_url = await _read_gallery_body(request)
 
     new_id = str(uuid.uuid4())
 
@@ -216,23 +298,12 @@ async def create_gallery(body: dict, user=Depends(require_owner)):
 
 
 @router.put("/api/gallery/{id}")
-async def update_gallery(id: str, body: dict, user=Depends(require_owner)):
+@response_cache.invalidates("gallery")
+async def update_gallery(id: str, request: Request, user=Depends(require_owner)):
     """
-    Update an existing certificate by ID. Same image semantics as create.
+    Update an existing certificate by ID. Same body/image semantics as create.
     """
-    webroot = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "..", "..", "uploads")
-    )
-    os.makedirs(webroot, exist_ok=True)
-
-    image_url = body.get("imageUrl")
-    data_url = body.get("image") or (
-        image_url if (image_url or "").startswith("data:image/") else None
-    )
-    if data_url:
-        saved = save_data_url_image(data_url, webroot)
-        if saved:
-            image_url = saved
+    body, image_url = await _read_gallery_body(request)
 
     async with pool().acquire() as con:
         await _ensure_table(con)
@@ -272,6 +343,7 @@ async def update_gallery(id: str, body: dict, user=Depends(require_owner)):
 
 
 @router.delete("/api/gallery/{id}")
+@response_cache.invalidates("gallery")
 async def delete_gallery(id: str, user=Depends(require_owner)):
     async with pool().acquire() as con:
         await _ensure_table(con)
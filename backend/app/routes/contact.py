@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from ..db import pool
+from ..migrations import ensure_migrated
 import json
 import uuid
 
@@ -7,19 +8,8 @@ router = APIRouter()
 
 
 async def _ensure_table(con):
-    # No extension required; UUID type is built-in.
-    await con.execute(
-        """
-        create table if not exists contact_messages (
-            id uuid primary key,
-            name text not null,
-            email text null,
-            message text not null,
-            meta jsonb null,
-            created_at timestamptz not null default now()
-        );
-        """
-    )
+    # Schema lives in app/migrations.py; no-op once startup has migrated.
+    await ensure_migrated(con)
 
 
 @router.post("/contact")
@@ -1,24 +1,23 @@
 # app/routes/education.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any, Dict, Set, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Tuple
 from uuid import uuid4
 import re
 
 from ..db import pool
+from .. import response_cache
 from ..auth import require_owner
+from ..introspect import table_columns
 
 router = APIRouter()
 
 # --------------------------- helpers ---------------------------
 
-async def _education_columns(con) -> Set[str]:
-    rows = await con.fetch("""
-        SELECT column_name
-        FROM information_schema.columns
-        WHERE table_schema = current_schema()
-          AND table_name = 'education';
-    """)
-    return {r["column_name"] for r in rows}
+async def _education_columns(con) -> FrozenSet[str]:
+    # Cached per pool/schema version; see app/introspect.py
+    return await table_columns(con, "education")
 
 def _as_int(x):
     try:
@@ -71,22 +70,32 @@ def _read_row(r) -> dict:
         "gpa": r["gpa"],
     }
 
-def _select_piece(cols: Set[str], name: str, alias: str, null_cast: str) -> str:
+def _select_piece(cols: FrozenSet[str], name: str, alias: str, null_cast: str) -> str:
     """Return 'name as alias' if the column exists, else 'NULL::<type> as alias'."""
     return f"{name} AS {alias}" if name in cols else f"NULL::{null_cast} AS {alias}"
 
-# --------------------------- queries ---------------------------
+# --------------------------- statements ---------------------------
 
-async def _select_row_by_id(con, row_id: str) -> Dict[str, Any]:
-    cols = await _education_columns(con)
+# Always-present columns, in placeholder order for INSERT/UPDATE
+_BASE_FIELDS = ("school", "degree", "field", "start_year", "end_year", "sort_order")
 
+@dataclass(frozen=True)
+class _EducationSQL:
+    """Statements compiled once for a concrete set of education columns."""
+    select_all: str
+    insert: str
+    update: str
+    # logical fields written after _BASE_FIELDS (placeholder order)
+    fields: Tuple[str, ...]
+
+    def params(self, values: Dict[str, Any]) -> list:
+        return [values[f] for f in _BASE_FIELDS + self.fields]
+
+@lru_cache(maxsize=16)
+def _compile_sql(cols: FrozenSet[str]) -> _EducationSQL:
     # details can be in either details_html or details
-    if "details_html" in cols:
-        select_details = "details_html AS details"
-    elif "details" in cols:
-        select_details = "details AS details"
-    else:
-        select_details = "NULL::text AS details"
+    details_col = "details_html" if "details_html" in cols else ("details" if "details" in cols else None)
+    select_details = f"{details_col} AS details" if details_col else "NULL::text AS details"
 
     # optional columns
     sel_thesis = _select_piece(cols, "thesis", "thesis", "text")
@@ -98,58 +107,57 @@ async def _select_row_by_id(con, row_id: str) -> Dict[str, Any]:
     sel_start_month = _select_piece(cols, "start_month", "start_month", "int2")
     sel_end_month = _select_piece(cols, "end_month", "end_month", "int2")
 
-    row = await con.fetchrow(f"""
-        SELECT id, school, degree, field,
+    projection = f"""id, school, degree, field,
                start_year, end_year,
                {sel_start_month}, {sel_end_month},
                {select_details},
                {sel_thesis}, {sel_description}, {sel_level}, {sel_gpa},
-               sort_order
-        FROM education
-        WHERE id = $1
-        LIMIT 1;
-    """, row_id)
-    return row
-
-# --------------------------- routes ---------------------------
-
-@router.get("/api/education")
-async def list_education():
-    async with pool().acquire() as con:
-        cols = await _education_columns(con)
-
-        if "details_html" in cols:
-            select_details = "details_html AS details"
-        elif "details" in cols:
-            select_details = "details AS details"
-        else:
-            select_details = "NULL::text AS details"
-
-        sel_thesis = _select_piece(cols, "thesis", "thesis", "text")
-        sel_description = _select_piece(cols, "description", "description", "text")
-        sel_level = _select_piece(cols, "level", "level", "text")
-        sel_gpa = _select_piece(cols, "gpa", "gpa", "numeric")
-
-        # months as-is (no COALESCE)
-        sel_start_month = _select_piece(cols, "start_month", "start_month", "int2")
-        sel_end_month = _select_piece(cols, "end_month", "end_month", "int2")
-
-        rows = await con.fetch(f"""
-            SELECT id, school, degree, field,
-                   start_year, end_year,
-                   {sel_start_month}, {sel_end_month},
-                   {select_details},
-                   {sel_thesis}, {sel_description}, {sel_level}, {sel_gpa},
-                   sort_order
+               sort_order"""
+
+    # Only write the optional columns that exist: (column, logical field)
+    writable = [(c, c) for c in ("start_month", "end_month") if c in cols]
+    if details_col:
+        writable.append((details_col, "details"))
+    writable += [(c, c) for c in ("thesis", "description", "level", "gpa") if c in cols]
+
+    write_cols = list(_BASE_FIELDS) + [c for c, _ in writable]
+    insert_cols = ["id"] + write_cols
+    placeholders = ", ".join(f"${i}" for i in range(1, len(insert_cols) + 1))
+    sets = ", ".join(f"{c}=${i}" for i, c in enumerate(write_cols, start=1))
+
+    return _EducationSQL(
+        select_all=f"""
+            SELECT {projection}
             FROM education
             ORDER BY sort_order ASC,
                      COALESCE(end_year, 9999) DESC,
                      COALESCE(start_year, 0) DESC;
-        """)
+        """,
+        insert=f"INSERT INTO education ({', '.join(insert_cols)}) VALUES ({placeholders}) RETURNING {projection};",
+        update=f"UPDATE education SET {sets} WHERE id=${len(write_cols) + 1} RETURNING {projection};",
+        fields=tuple(f for _, f in writable),
+    )
 
+async def _statements(con) -> _EducationSQL:
+    return _compile_sql(await _education_columns(con))
+
+# --------------------------- routes ---------------------------
+
+async def fetch_education(con) -> list:
+    sql = await _statements(con)
+    rows = await con.fetch(sql.select_all)
     return [_read_row(r) for r in rows]
 
+async def _load_education() -> list:
+    async with pool().acquire() as con:
+        return await fetch_education(con)
+
+@router.get("/api/education")
+async def list_education(request: Request):
+    return await response_cache.cached("education", request, _load_education)
+
 @router.post("/api/education")
+@response_cache.invalidates("education")
 async def create_education(body: dict, user=Depends(require_owner)):
     # Normalized inputs
     school = (body.get("school") or "").strip()
@@ -189,53 +197,23 @@ async def create_education(body: dict, user=Depends(require_owner)):
 
     new_id = str(uuid4())
 
+    values = {
+        "school": school, "degree": degree, "field": field,
+        "start_year": start_year, "end_year": end_year, "sort_order": sort_order,
+        "start_month": start_month, "end_month": end_month, "details": details_val,
+        "thesis": thesis, "description": description, "level": level, "gpa": gpa,
+    }
+
     async with pool().acquire() as con:
-        cols = await _education_columns(con)
-
-        # Build dynamic INSERT with only existing columns
-        insert_cols = ["id", "school", "degree", "field", "start_year", "end_year", "sort_order"]
-        insert_vals = [new_id, school, degree, field, start_year, end_year, sort_order]
-
-        if "start_month" in cols:
-            insert_cols.append("start_month")
-            insert_vals.append(start_month)
-        if "end_month" in cols:
-            insert_cols.append("end_month")
-            insert_vals.append(end_month)
-
-        details_col = "details_html" if "details_html" in cols else ("details" if "details" in cols else None)
-        if details_col:
-            insert_cols.append(details_col)
-            insert_vals.append(details_val)
-
-        if "thesis" in cols:
-            insert_cols.append("thesis")
-            insert_vals.append(thesis)
-        if "description" in cols:
-            insert_cols.append("description")
-            insert_vals.append(description)
-        if "level" in cols:
-            insert_cols.append("level")
-            insert_vals.append(level)
-        if "gpa" in cols:
-            insert_cols.append("gpa")
-            insert_vals.append(gpa)
-
-        placeholders = ", ".join(f"${i}" for i in range(1, len(insert_vals) + 1))
-        collist = ", ".join(insert_cols)
-
-        await con.execute(
-            f"INSERT INTO education ({collist}) VALUES ({placeholders});",
-            *insert_vals
-        )
-
-        row = await _select_row_by_id(con, new_id)
+        sql = await _statements(con)
+        row = await con.fetchrow(sql.insert, new_id, *sql.params(values))
 
     if not row:
         raise HTTPException(status_code=400, detail="Insert failed")
     return _read_row(row)
 
 @router.put("/api/education/{id}")
+@response_cache.invalidates("education")
 async def update_education(id: str, body: dict, user=Depends(require_owner)):
     school = (body.get("school") or "").strip()
     degree = body.get("degree")
@@ -272,49 +250,23 @@ async def update_education(id: str, body: dict, user=Depends(require_owner)):
     if end_month is not None and not (1 <= int(end_month) <= 12):
         end_month = None
 
-    async with pool().acquire() as con:
-        cols = await _education_columns(con)
-
-        sets = ["school=$1", "degree=$2", "field=$3", "start_year=$4", "end_year=$5", "sort_order=$6"]
-        vals = [school, degree, field, start_year, end_year, sort_order]
-        n = 6
-
-        if "start_month" in cols:
-            n += 1; sets.append(f"start_month=${n}"); vals.append(start_month)
-        if "end_month" in cols:
-            n += 1; sets.append(f"end_month=${n}"); vals.append(end_month)
-
-        details_col = "details_html" if "details_html" in cols else ("details" if "details" in cols else None)
-        if details_col:
-            n += 1; sets.append(f"{details_col}=${n}"); vals.append(details_val)
-
-        if "thesis" in cols:
-            n += 1; sets.append(f"thesis=${n}"); vals.append(thesis)
-        if "description" in cols:
-            n += 1; sets.append(f"description=${n}"); vals.append(description)
-        if "level" in cols:
-            n += 1; sets.append(f"level=${n}"); vals.append(level)
-        if "gpa" in cols:
-            n += 1; sets.append(f"gpa=${n}"); vals.append(gpa)
-
-        n += 1
-        vals.append(id)
-
-        res = await con.execute(
-            f"UPDATE education SET {', '.join(sets)} WHERE id=${n};",
-            *vals
-        )
-
-        if res.endswith("0"):
-            raise HTTPException(status_code=404, detail="Not found")
+    values = {
+        "school": school, "degree": degree, "field": field,
+        "start_year": start_year, "end_year": end_year, "sort_order": sort_order,
+        "start_month": start_month, "end_month": end_month, "details": details_val,
+        "thesis": thesis, "description": description, "level": level, "gpa": gpa,
+    }
 
-        row = await _select_row_by_id(con, id)
+    async with pool().acquire() as con:
+        sql = await _statements(con)
+        row = await con.fetchrow(sql.update, *sql.params(values), id)
 
     if not row:
         raise HTTPException(status_code=404, detail="Not found")
     return _read_row(row)
 
 @router.delete("/api/education/{id}")
+@response_cache.invalidates("education")
 async def delete_education(id: str, user=Depends(require_owner)):
     async with pool().acquire() as con:
         res = await con.execute("DELETE FROM education WHERE id=$1;", id)
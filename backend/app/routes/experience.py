@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from ..db import pool
 from ..auth import require_owner
+from ..queries import register
+from .. import response_cache
 from ..utils import try_parse_date_flexible, to_year_month, to_year_month_or_none
 
 import json
@@ -120,23 +122,34 @@ def _read_row(r) -> dict:
         "sortOrder": r["sort_order"],
     }
 
+# ---------- SQL ----------
+
+LIST_SQL = register("experience.list", """
+    select
+        id, company, role, project, location,
+        start_date, end_date,
+        description, description_html,
+        tech_tags, sort_order
+    from experience
+    order by sort_order asc, start_date desc nulls last;
+""")
+
 # ---------- routes ----------
 
-@router.get("/api/experience")
-async def list_experience():
-    async with pool().acquire() as con:
-        rows = await con.fetch("""
-            select
-                id, company, role, project, location,
-                start_date, end_date,
-                description, description_html,
-                tech_tags, sort_order
-            from experience
-            order by sort_order asc, start_date desc nulls last;
-        """)
+async def fetch_experience(con) -> list:
+    rows = await con.fetch(LIST_SQL)
     return [_read_row(r) for r in rows]
 
+async def _load_experience() -> list:
+    async with pool().acquire() as con:
+        return await fetch_experience(con)
+
+@router.get("/api/experience")
+async def list_experience(request: Request):
+    return await response_cache.cached("experience", request, _load_experience)
+
 @router.post("/api/experience")
+@response_cache.invalidates("experience")
 async def create_experience(body: dict, user=Depends(require_owner)):
     ok, start, err = try_parse_date_flexible(body.get("startDate"))
     if not ok:
@@ -199,6 +212,7 @@ async def create_experience(body: dict, user=Depends(require_owner)):
     return _read_row(row)
 
 @router.put("/api/experience/{id}")
+@response_cache.invalidates("experience")
 async def update_experience(id: str, body: dict, user=Depends(require_owner)):
     ok, start, err = try_parse_date_flexible(body.get("startDate"))
     if not ok:
@@ -264,6 +278,7 @@ async def update_experience(id: str, body: dict, user=Depends(require_owner)):
     return _read_row(row)
 
 @router.delete("/api/experience/{id}")
+@response_cache.invalidates("experience")
 async def delete_experience(id: str, user=Depends(require_owner)):
     async with pool().acquire() as con:
         res = await con.execute("delete from experience where id=$1;", id)
@@ -6,124 +6,27 @@ import re
 
 from ..db import pool
 from ..auth import require_owner
+from ..migrations import ensure_migrated
+from ..queries import register
+from .. import conditional, response_cache
 
 router = APIRouter()
 
-# ---------------- Schema DDL ----------------
-
-CREATE_HOME_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS home_settings (
-    id SMALLINT PRIMARY KEY DEFAULT 1,
-    welcome_html TEXT NOT NULL DEFAULT '',
-    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
-);
-"""
-
-ENSURE_HOME_ROW_SQL = """
-INSERT INTO home_settings (id, welcome_html)
-VALUES (1, '')
-ON CONFLICT (id) DO NOTHING;
-"""
-
-# Create with the superset of columns we support now
-CREATE_HI_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS highlights (
-    id BIGSERIAL PRIMARY KEY,
-    icon TEXT,
-    title_html TEXT NOT NULL DEFAULT '',
-    body_html  TEXT NOT NULL DEFAULT '',
-    sort_order INT NOT NULL DEFAULT 0,
-    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
-    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
-    -- legacy/plain fields kept for compatibility
-    title TEXT,
-    description TEXT,
-    url TEXT
-);
-"""
-
-# Patch older tables forward safely
-ALTER_HI_ADD_ICON_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS icon TEXT;
-"""
-ALTER_HI_ADD_TITLE_HTML_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS title_html TEXT;
-"""
-ALTER_HI_ADD_BODY_HTML_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS body_html TEXT;
-"""
-ALTER_HI_ADD_SORT_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS sort_order INT NOT NULL DEFAULT 0;
-"""
-ALTER_HI_ADD_CREATED_AT_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT now();
-"""
-ALTER_HI_ADD_UPDATED_AT_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
-"""
-# legacy/plain columns (nullable)
-ALTER_HI_ADD_TITLE_LEGACY_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS title TEXT;
-"""
-ALTER_HI_ADD_DESC_LEGACY_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS description TEXT;
-"""
-ALTER_HI_ADD_URL_LEGACY_SQL = """
-ALTER TABLE IF EXISTS highlights
-  ADD COLUMN IF NOT EXISTS url TEXT;
-"""
-
-# Defaults + not-null after the columns exist
-BACKFILL_HI_HTML_DEFAULTS_SQL = """
-UPDATE highlights
-   SET title_html = COALESCE(title_html, ''),
-       body_html  = COALESCE(body_html,  '')
- WHERE title_html IS NULL OR body_html IS NULL;
-"""
-
-SET_HI_HTML_NOT_NULL_DEFAULT_SQL = """
-ALTER TABLE IF EXISTS highlights
-    ALTER COLUMN title_html SET DEFAULT '',
-    ALTER COLUMN body_html  SET DEFAULT '';
--- SET NOT NULL guarded: only if no NULLs remain
-"""
-
-CREATE_HI_INDEX_SQL = """
-CREATE INDEX IF NOT EXISTS idx_highlights_sort
-ON highlights (sort_order, id);
-"""
+# ---------------- Schema ----------------
 
 async def _ensure_schema():
-    async with pool().acquire() as con:
-        await con.execute(CREATE_HOME_TABLE_SQL)
-        await con.execute(ENSURE_HOME_ROW_SQL)
-
-        await con.execute(CREATE_HI_TABLE_SQL)
-        await con.execute(ALTER_HI_ADD_ICON_SQL)
-        await con.execute(ALTER_HI_ADD_TITLE_HTML_SQL)
-        await con.execute(ALTER_HI_ADD_BODY_HTML_SQL)
-        await con.execute(ALTER_HI_ADD_SORT_SQL)
-        await con.execute(ALTER_HI_ADD_CREATED_AT_SQL)
-        await con.execute(ALTER_HI_ADD_UPDATED_AT_SQL)
-        await con.execute(ALTER_HI_ADD_TITLE_LEGACY_SQL)
-        await con.execute(ALTER_HI_ADD_DESC_LEGACY_SQL)
-        await con.execute(ALTER_HI_ADD_URL_LEGACY_SQL)
-
-        await con.execute(BACKFILL_HI_HTML_DEFAULTS_SQL)
-        await con.execute(SET_HI_HTML_NOT_NULL_DEFAULT_SQL)
-        # enforce NOT NULL only if safe
-        await con.execute("ALTER TABLE IF EXISTS highlights ALTER COLUMN title_html SET NOT NULL;")
-        await con.execute("ALTER TABLE IF EXISTS highlights ALTER COLUMN body_html  SET NOT NULL;")
-
-        await con.execute(CREATE_HI_INDEX_SQL)
+    # DDL lives in app/migrations.py; this is a no-op once startup migrated it.
+    await ensure_migrated()
+
+# ---------------- SQL ----------------
+
+WELCOME_SQL = register("home.welcome", "SELECT welcome_html FROM home_settings WHERE id = 1")
+
+HIGHLIGHTS_SQL = register("home.highlights", """
+    SELECT id, icon, title_html, body_html, sort_order, title, description, url
+      FROM highlights
+  ORDER BY sort_order ASC, id ASC
+""")
 
 # ---------------- Models for responses ----------------
 
@@ -225,22 +128,26 @@ def _normalize_highlight_payload(data: Dict[str, Any]) -> Dict[str, Any]:
 
 # ---------------- Routes ----------------
 
-@router.get("/api/home", response_model=HomeOut)
-async def get_home():
+def _read_home(welcome, rows) -> dict:
+    highlights = [HighlightOut(**dict(r)) for r in rows]
+    return HomeOut(welcome_html=welcome or "", highlights=highlights).model_dump()
+
+async def fetch_home(con) -> dict:
+    welcome = await con.fetchval(WELCOME_SQL)
+    rows = await con.fetch(HIGHLIGHTS_SQL)
+    return _read_home(welcome, rows)
+
+async def _load_home() -> dict:
     await _ensure_schema()
     async with pool().acquire() as con:
-        welcome = await con.fetchval("SELECT welcome_html FROM home_settings WHERE id = 1")
-        rows = await con.fetch(
-            """
-            SELECT id, icon, title_html, body_html, sort_order, title, description, url
-              FROM highlights
-          ORDER BY sort_order ASC, id ASC
-            """
-        )
-        highlights = [HighlightOut(**dict(r)) for r in rows]
-        return HomeOut(welcome_html=welcome or "", highlights=highlights)
+        return await fetch_home(con)
+
+@router.get("/api/home", response_model=HomeOut)
+async def get_home(request: Request):
+    return await response_cache.cached("home", request, _load_home)
 
 @router.put("/api/home", response_model=dict)
+@response_cache.invalidates("home")
 async def update_home(request: Request, _=Depends(require_owner)):
     """
     Accepts any of these keys for the welcome editor:
@@ -263,20 +170,18 @@ async def update_home(request: Request, _=Depends(require_owner)):
         )
     return {"ok": True, "welcome_html": html}
 
-@router.get("/api/highlights", response_model=List[HighlightOut])
-async def list_highlights():
+async def _load_highlights() -> list:
     await _ensure_schema()
     async with pool().acquire() as con:
-        rows = await con.fetch(
-            """
-            SELECT id, icon, title_html, body_html, sort_order, title, description, url
-              FROM highlights
-          ORDER BY sort_order ASC, id ASC
-            """
-        )
-        return [HighlightOut(**dict(r)) for r in rows]
+        rows = await con.fetch(HIGHLIGHTS_SQL)
+        return [HighlightOut(**dict(r)).model_dump() for r in rows]
+
+@router.get("/api/highlights", response_model=List[HighlightOut])
+async def list_highlights(request: Request):
+    return await conditional.respond(request, ("highlights",), _load_highlights)
 
 @router.post("/api/highlights", response_model=HighlightOut)
+@response_cache.invalidates("home")
 async def create_highlight(request: Request, _=Depends(require_owner)):
     """
     Accepts these aliases:
@@ -309,6 +214,7 @@ async def create_highlight(request: Request, _=Depends(require_owner)):
     return HighlightOut(**dict(row))
 
 @router.delete("/api/highlights/{hid}", response_model=dict)
+@response_cache.invalidates("home")
 async def delete_highlight(hid: str, _=Depends(require_owner)):
     await _ensure_schema()
     real_id = _parse_hid(hid)
@@ -322,6 +228,7 @@ async def delete_highlight(hid: str, _=Depends(require_owner)):
 
 # (Optional) Update endpoint if you need it from the UI:
 @router.put("/api/highlights/{hid}", response_model=HighlightOut)
+@response_cache.invalidates("home")
 async def update_highlight(hid: str, request: Request, _=Depends(require_owner)):
     await _ensure_schema()
     real_id = _parse_hid(hid)
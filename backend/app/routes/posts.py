@@ -1,61 +1,31 @@
 # app/routes/posts.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Optional, List, Any, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import Optional, List, Any, NamedTuple, Tuple
 from datetime import datetime
+from uuid import UUID
+import base64
 import json
+import logging
+import re
+
+import orjson
 
 from ..db import pool
 from ..auth import require_owner
 from ..utils import slugify, compute_excerpt
+from ..migrations import ensure_migrated
+from ..queries import register
+from ..cache import TTLCache
+from .. import change_bus, conditional
 
 router = APIRouter()
+logger = logging.getLogger("app.posts")
 
 # ------------------------------- Schema helpers -------------------------------
 
-async def _ensure_schema(con):
-    # Needed for gen_random_uuid()
-    await con.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto;")
-    # Base table (includes presentation columns)
-    await con.execute(
-        """
-        CREATE TABLE IF NOT EXISTS posts (
-            id                   uuid PRIMARY KEY DEFAULT gen_random_uuid(),
-            title                text NOT NULL,
-            slug                 text NOT NULL UNIQUE,
-            excerpt              text,
-            cover_image_url      text,
-            tags                 text[] DEFAULT '{}'::text[],
-            status               text DEFAULT 'draft',
-            published_at         timestamptz,
-            body_html            text,
-            meta                 jsonb,
-            -- Presentation fields
-            accent_color         text,
-            theme_font_family    text,
-            theme_base_px        integer,
-            theme_heading_scale  numeric(6,3),
-            created_at           timestamptz NOT NULL DEFAULT now(),
-            updated_at           timestamptz NOT NULL DEFAULT now()
-        );
-        """
-    )
-    # Ensure new columns exist on older tables
-    await con.execute(
-        """
-        ALTER TABLE IF EXISTS posts
-            ADD COLUMN IF NOT EXISTS accent_color         text,
-            ADD COLUMN IF NOT EXISTS theme_font_family    text,
-            ADD COLUMN IF NOT EXISTS theme_base_px        integer,
-            ADD COLUMN IF NOT EXISTS theme_heading_scale  numeric(6,3);
-        """
-    )
-    # Helpful indexes
-    await con.execute("CREATE INDEX IF NOT EXISTS posts_status_idx ON posts (status);")
-    await con.execute("CREATE INDEX IF NOT EXISTS posts_published_at_idx ON posts (published_at);")
-    await con.execute("CREATE INDEX IF NOT EXISTS posts_tags_gin ON posts USING GIN (tags);")
-
 async def _ensure_ready(con):
-    await _ensure_schema(con)
+    # Schema lives in app/migrations.py; this is a no-op once startup migrated it.
+    await ensure_migrated(con)
 
 # ------------------------------- Row helpers ----------------------------------
 
@@ -133,6 +103,23 @@ def _decode_meta(value: Any) -> dict:
     except Exception:
         return {}
 
+def _read_post_summary(r) -> dict:
+    """List item: card fields only, no body/meta/theme (see SUMMARY_FIELDS)."""
+    return {
+        "id": str(r["id"]) if r["id"] is not None else None,
+        "title": r["title"],
+        "slug": r["slug"],
+        "excerpt": r["excerpt"],
+        "coverImageUrl": r["cover_image_url"],
+        "tags": r["tags"] or [],
+        "status": r["status"],
+        "publishedAt": r["published_at"],
+        "color": r["color"],
+        "wordCount": r["word_count"],
+        "createdAt": r["created_at"],
+        "updatedAt": r["updated_at"],
+    }
+
 def _read_post_row(r) -> dict:
     # asyncpg.Record supports dict-style indexing for selected columns
     meta = _decode_meta(r["meta"])
@@ -170,67 +157,306 @@ def _read_post_row(r) -> dict:
         "meta": meta,          # keep exposing meta for compatibility
         "color": color,        # NEW: top-level
         "theme": theme,        # NEW: top-level
+        "wordCount": r["word_count"] if "word_count" in r else None,
         "createdAt": r["created_at"] if "created_at" in r else None,
         "updatedAt": r["updated_at"] if "updated_at" in r else None,
     }
 
-# --------------------------------- Routes -------------------------------------
+# ---------------------------------- SQL ---------------------------------------
+
+_POST_COLUMNS = """
+    id, title, slug, excerpt, cover_image_url, tags, status,
+    published_at, body_html, meta,
+    accent_color, theme_font_family, theme_base_px, theme_heading_scale,
+    word_count, created_at, updated_at
+"""
+
+# List cards never need the body: skip reading (and detoasting) it altogether.
+# Colour falls back to meta in SQL, the same rule _read_post_row applies.
+_SUMMARY_COLUMNS = """
+    id, title, slug, excerpt, cover_image_url, tags, status,
+    published_at, COALESCE(accent_color, meta->>'color') AS color,
+    word_count, created_at, updated_at
+"""
+
+# Keyset order; id breaks ties. Matches posts_feed_idx (migration 13) exactly.
+_LIST_ORDER = """
+    ORDER BY COALESCE(published_at, created_at) DESC NULLS LAST,
+             created_at DESC NULLS LAST,
+             id DESC
+"""
+_AFTER = "(COALESCE(published_at, created_at), created_at, id) < ($1::timestamptz, $2::timestamptz, $3::uuid)"
+
+COUNT_SQL = register("posts.count", "SELECT COUNT(*) FROM posts WHERE status = 'published';")
+COUNT_BY_TAG_SQL = register(
+    "posts.count_by_tag",
+    "SELECT COUNT(*) FROM posts WHERE status = 'published' AND $1 = ANY(tags);",
+)
+
+
+class ListQueries(NamedTuple):
+    page: str           # LIMIT $1 OFFSET $2
+    page_by_tag: str    # $1 tag, LIMIT $2 OFFSET $3
+    after: str          # $1..$3 cursor, LIMIT $4
+    after_by_tag: str   # $1..$3 cursor, $4 tag, LIMIT $5
+
+
+def _list_queries(suffix: str, columns: str) -> ListQueries:
+    def q(name: str, where: str, limit: str) -> str:
+        return register(f"posts.{name}{suffix}", f"""
+            SELECT {columns}
+            FROM posts
+            WHERE status = 'published'{where}
+            {_LIST_ORDER}
+            {limit};
+        """)
+
+    return ListQueries(
+        page=q("list", "", "LIMIT $1 OFFSET $2"),
+        page_by_tag=q("list_by_tag", " AND $1 = ANY(tags)", "LIMIT $2 OFFSET $3"),
+        after=q("list_after", f" AND {_AFTER}", "LIMIT $4"),
+        after_by_tag=q("list_by_tag_after", f" AND {_AFTER} AND $4 = ANY(tags)", "LIMIT $5"),
+    )
+
+
+# projection -> (statements, row reader)
+PROJECTIONS = {
+    "summary": (_list_queries("", _SUMMARY_COLUMNS), _read_post_summary),
+    "full": (_list_queries("_full", _POST_COLUMNS), _read_post_row),
+}
+
+# Planner row estimates (no scan); EXPLAIN can't be a cached prepared statement
+ESTIMATE_SQL = "EXPLAIN (FORMAT JSON) SELECT 1 FROM posts WHERE status = 'published';"
+ESTIMATE_BY_TAG_SQL = "EXPLAIN (FORMAT JSON) SELECT 1 FROM posts WHERE status = 'published' AND $1 = ANY(tags);"
+
+# Separate statements so each probes its own unique index (id::text can't use the pkey)
+GET_BY_ID_SQL = register("posts.get_by_id", f"""
+    SELECT {_POST_COLUMNS}
+    FROM posts
+    WHERE id = $1::uuid;
+""")
+GET_BY_SLUG_SQL = register("posts.get_by_slug", f"""
+    SELECT {_POST_COLUMNS}
+    FROM posts
+    WHERE slug = $1;
+""")
+
+# ------------------------------ Pagination ------------------------------------
+
+TOTAL_MODES = ("exact", "cached", "estimate", "none")
+TOTAL_CACHE_TTL = 300
+
+SLUG_CACHE_TTL = 300
+
+# tag ("" = all) -> exact published count; dropped on any posts write
+_totals = TTLCache(maxsize=256, ttl=TOTAL_CACHE_TTL)
+# slug -> post id, so repeat reads by slug go through the primary key
+_slug_ids = TTLCache(maxsize=1024, ttl=SLUG_CACHE_TTL)
+
+
+def _forget_caches() -> None:
+    _totals.clear()
+    _slug_ids.clear()
+
+
+def _on_posts_change(names: Optional[List[str]]) -> None:
+    if names is None or "posts" in names:
+        _forget_caches()
+
+
+change_bus.subscribe(_on_posts_change)
+
+
+def _encode_cursor(r) -> str:
+    sort_at = r["published_at"] or r["created_at"]
+    raw = orjson.dumps([sort_at.isoformat(), r["created_at"].isoformat(), str(r["id"])])
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
 
-@router.get("/api/posts")
-async def list_posts(page: int = 1, pageSize: int = 10, tag: Optional[str] = None):
-    page = max(1, page)
-    pageSize = max(1, min(50, pageSize))
-    offset = (page - 1) * pageSize
 
-    where = "WHERE status = 'published'"
-    params: List[Any] = []
+def _decode_cursor(cursor: str) -> Tuple[datetime, datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_at, created_at, post_id = orjson.loads(raw)
+        return datetime.fromisoformat(sort_at), datetime.fromisoformat(created_at), UUID(post_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
+async def _exact_total(con, tag: Optional[str]) -> int:
     if tag:
-        where += f" AND ${len(params)+1} = ANY(tags)"
-        params.append(tag)
+        return await con.fetchval(COUNT_BY_TAG_SQL, tag)
+    return await con.fetchval(COUNT_SQL)
+
+
+async def _estimated_total(con, tag: Optional[str]) -> int:
+    plan = await con.fetchval(ESTIMATE_BY_TAG_SQL, tag) if tag else await con.fetchval(ESTIMATE_SQL)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def _total(con, tag: Optional[str], mode: str) -> Tuple[Optional[int], str]:
+    """(total, mode actually used). An estimate that fails falls back to the cached count."""
+    if mode == "none":
+        return None, mode
+    if mode == "estimate":
+        try:
+            return await _estimated_total(con, tag), mode
+        except Exception as e:
+            logger.warning("[posts] total estimate failed, counting: %s", e)
+            mode = "cached"
+    if mode == "cached":
+        entry = _totals.get(tag or "")
+        if entry is not None:
+            return entry.value, mode
+    total = await _exact_total(con, tag)
+    _totals.set(tag or "", total)
+    return total, mode
+
+
+# ------------------------------ Projection ------------------------------------
+
+SUMMARY_FIELDS = (
+    "id", "title", "slug", "excerpt", "coverImageUrl", "tags", "status",
+    "publishedAt", "color", "wordCount", "createdAt", "updatedAt",
+)
+FULL_FIELDS = (
+    "id", "title", "slug", "excerpt", "coverImageUrl", "tags", "status",
+    "publishedAt", "bodyHtml", "meta", "color", "theme", "wordCount", "createdAt", "updatedAt",
+)
+
+
+def _parse_fields(fields: Optional[str]) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    """
+    ?fields= -> (projection, keys to keep or None for all).
+    Omitted/"summary": list cards; "full": the single-post shape; otherwise a
+    comma list of FULL_FIELDS, read from the summary projection when it can be.
+    """
+    if not fields or fields == "summary":
+        return "summary", None
+    if fields == "full":
+        return "full", None
+    keys = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [k for k in keys if k not in FULL_FIELDS]
+    if unknown or not keys:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown) or '(none)'}; use summary, full or a list of {', '.join(FULL_FIELDS)}",
+        )
+    projection = "summary" if all(k in SUMMARY_FIELDS for k in keys) else "full"
+    return projection, keys
+
+# --------------------------------- Routes -------------------------------------
+
+async def _load_posts(page: Optional[int], pageSize: int, tag: Optional[str],
+                      cursor: Optional[str], total_mode: str, fields: Optional[str]) -> dict:
+    after = _decode_cursor(cursor) if cursor else None
+    projection, keys = _parse_fields(fields)
+    queries, read_row = PROJECTIONS[projection]
 
     async with pool().acquire() as con:
         await _ensure_ready(con)
 
-        total_sql = f"SELECT COUNT(*) FROM posts {where};"
-        total = await con.fetchval(total_sql, *params)
+        # One extra row tells whether there is a next page
+        if after is not None:
+            if tag:
+                rows = await con.fetch(queries.after_by_tag, *after, tag, pageSize + 1)
+            else:
+                rows = await con.fetch(queries.after, *after, pageSize + 1)
+        else:
+            offset = (page - 1) * pageSize
+            if tag:
+                rows = await con.fetch(queries.page_by_tag, tag, pageSize + 1, offset)
+            else:
+                rows = await con.fetch(queries.page, pageSize + 1, offset)
+        total, total_mode = await _total(con, tag, total_mode)
+
+    page_rows = rows[:pageSize]
+    next_cursor = _encode_cursor(page_rows[-1]) if len(rows) > pageSize else None
+    items = [read_row(r) for r in page_rows]
+    if keys is not None:
+        items = [{k: item[k] for k in keys} for item in items]
+    return {
+        "page": page if after is None else None,
+        "pageSize": pageSize,
+        "total": total,
+        "totalMode": total_mode,
+        "items": items,
+        "nextCursor": next_cursor,
+    }
 
-        data_sql = f"""
-            SELECT id, title, slug, excerpt, cover_image_url, tags, status,
-                   published_at, body_html, meta,
-                   accent_color, theme_font_family, theme_base_px, theme_heading_scale,
-                   created_at, updated_at
-            FROM posts
-            {where}
-            ORDER BY COALESCE(published_at, created_at) DESC NULLS LAST,
-                     created_at DESC NULLS LAST
-            LIMIT ${len(params)+1} OFFSET ${len(params)+2};
-        """
-        rows = await con.fetch(data_sql, *params, pageSize, offset)
+# ------------------------------ Single post -----------------------------------
 
-    items = [_read_post_row(r) for r in rows]
-    return {"page": page, "pageSize": pageSize, "total": total, "items": items}
+_UUID_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
 
-@router.get("/api/posts/{slug_or_id}")
-async def get_post_by_slug_or_id(slug_or_id: str):
+
+def _parse_id(value: str) -> Optional[UUID]:
+    """The post id if `value` is a canonical UUID string, else None."""
+    return UUID(value) if _UUID_RE.match(value) else None
+
+
+async def _fetch_post(con, slug_or_id: str):
+    post_id = _parse_id(slug_or_id)
+    if post_id is not None:
+        row = await con.fetchrow(GET_BY_ID_SQL, post_id)
+        if row is not None:
+            return row
+        # A slug may still look like a UUID
+
+    entry = _slug_ids.get(slug_or_id)
+    if entry is not None:
+        row = await con.fetchrow(GET_BY_ID_SQL, entry.value)
+        if row is not None and row["slug"] == slug_or_id:
+            return row
+        _slug_ids.pop(slug_or_id)
+
+    row = await con.fetchrow(GET_BY_SLUG_SQL, slug_or_id)
+    if row is not None:
+        _slug_ids.set(slug_or_id, row["id"])
+    return row
+
+
+async def _load_post(slug_or_id: str) -> dict:
     async with pool().acquire() as con:
         await _ensure_ready(con)
-        row = await con.fetchrow(
-            """
-            SELECT id, title, slug, excerpt, cover_image_url, tags, status,
-                   published_at, body_html, meta,
-                   accent_color, theme_font_family, theme_base_px, theme_heading_scale,
-                   created_at, updated_at
-            FROM posts
-            WHERE slug=$1 OR id::text=$1
-            LIMIT 1;
-            """,
-            slug_or_id,
-        )
+        row = await _fetch_post(con, slug_or_id)
     if not row:
         raise HTTPException(status_code=404, detail="Not found")
     return _read_post_row(row)
 
+@router.get("/api/posts")
+async def list_posts(
+    request: Request,
+    page: int = 1,
+    pageSize: int = 10,
+    tag: Optional[str] = None,
+    cursor: Optional[str] = None,
+    total: str = "cached",
+    fields: Optional[str] = None,
+):
+    """
+    Published posts, newest first: {page, pageSize, total, totalMode, items, nextCursor}.
+    - `page`/`pageSize` (OFFSET) keep working for existing clients.
+    - `cursor` (a previous nextCursor) seeks by keyset instead, at constant cost
+      however deep; `page` is then ignored and returned as null.
+    - `total`: exact (COUNT every time), cached (default; exact count kept
+      until the next posts write), estimate (planner rows, no scan) or none.
+    - `fields`: items are summaries (no bodyHtml/meta/theme) by default;
+      `full` restores the single-post shape, or name the fields wanted.
+    """
+    page = max(1, page)
+    pageSize = max(1, min(50, pageSize))
+    if total not in TOTAL_MODES:
+        raise HTTPException(status_code=400, detail=f"total must be one of {', '.join(TOTAL_MODES)}")
+    # 304 straight from the posts version, before the count and page queries
+    return await conditional.respond(
+        request, ("posts",), lambda: _load_posts(page, pageSize, tag, cursor, total, fields),
+    )
+
+@router.get("/api/posts/{slug_or_id}")
+async def get_post_by_slug_or_id(slug_or_id: str, request: Request):
+    return await conditional.respond(request, ("posts",), lambda: _load_post(slug_or_id))
+
 @router.post("/api/posts")
 async def create_post(body: dict, user=Depends(require_owner)):
     title = (body.get("title") or "").strip()
@@ -277,7 +503,7 @@ async def create_post(body: dict, user=Depends(require_owner)):
                 RETURNING id, title, slug, excerpt, cover_image_url, tags, status,
                           published_at, body_html, meta,
                           accent_color, theme_font_family, theme_base_px, theme_heading_scale,
-                          created_at, updated_at;
+                          word_count, created_at, updated_at;
                 """,
                 title,
                 slug,
@@ -294,10 +520,14 @@ async def create_post(body: dict, user=Depends(require_owner)):
                 float(theme.get("headingScale") or 1.15),
             )
 
+    _forget_caches()
     return _read_post_row(row)
 
 @router.put("/api/posts/{id}")
 async def update_post(id: str, body: dict, user=Depends(require_owner)):
+    post_id = _parse_id(id)
+    if post_id is None:
+        raise HTTPException(status_code=404, detail="Not found")
     title = (body.get("title") or "").strip()
     if not title:
         raise HTTPException(status_code=400, detail="Title is required")
@@ -325,7 +555,7 @@ async def update_post(id: str, body: dict, user=Depends(require_owner)):
     async with pool().acquire() as con:
         await _ensure_ready(con)
         async with con.transaction():
-            slug = await _ensure_unique_slug(con, desired_slug, current_id_text=id)
+            slug = await _ensure_unique_slug(con, desired_slug, current_id=post_id)
 
             row = await con.fetchrow(
                 """
@@ -344,11 +574,11 @@ async def update_post(id: str, body: dict, user=Depends(require_owner)):
                     theme_base_px=$12,
                     theme_heading_scale=$13,
                     updated_at=now()
-                WHERE id::text=$14
+                WHERE id=$14
                 RETURNING id, title, slug, excerpt, cover_image_url, tags, status,
                           published_at, body_html, meta,
                           accent_color, theme_font_family, theme_base_px, theme_heading_scale,
-                          created_at, updated_at;
+                          word_count, created_at, updated_at;
                 """,
                 title,
                 slug,
@@ -363,25 +593,30 @@ async def update_post(id: str, body: dict, user=Depends(require_owner)):
                 (theme.get("fontFamily") or None),
                 int(theme.get("basePx") or 16),
                 float(theme.get("headingScale") or 1.15),
-                id,
+                post_id,
             )
 
+    _forget_caches()
     if not row:
         raise HTTPException(status_code=404, detail="Not found")
     return _read_post_row(row)
 
 @router.delete("/api/posts/{id}")
 async def delete_post(id: str, user=Depends(require_owner)):
+    post_id = _parse_id(id)
+    if post_id is None:
+        raise HTTPException(status_code=404, detail="Not found")
     async with pool().acquire() as con:
         await _ensure_ready(con)
-        res = await con.execute("DELETE FROM posts WHERE id::text=$1;", id)
+        res = await con.execute("DELETE FROM posts WHERE id=$1;", post_id)
+    _forget_caches()
     if res.endswith("0"):
         raise HTTPException(status_code=404, detail="Not found")
     return {}
 
 # ------------------------------- Slug helper ----------------------------------
 
-async def _ensure_unique_slug(con, base_slug: str, current_id_text: Optional[str] = None) -> str:
+async def _ensure_unique_slug(con, base_slug: str, current_id: Optional[UUID] = None) -> str:
     candidate = base_slug
     n = 1
     while True:
@@ -390,11 +625,11 @@ async def _ensure_unique_slug(con, base_slug: str, current_id_text: Optional[str
             SELECT 1
             FROM posts
             WHERE slug=$1
-              AND (COALESCE(id::text,'') <> COALESCE($2,''))  -- exclude current row on updates
+              AND id IS DISTINCT FROM $2::uuid  -- exclude current row on updates
             LIMIT 1;
             """,
             candidate,
-            current_id_text or "",
+            current_id,
         )
         if not row:
             return candidate
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from ..db import pool
+from ..migrations import ensure_migrated
+from ..queries import register
+from .. import response_cache
 from ..auth import require_owner
+from ..images import load_srcsets, srcset_for
 import json
 
 router = APIRouter()
@@ -41,50 +45,38 @@ def _read_profile_row(r) -> dict:
         "phone": r["phone"],
         "avatarUrl": r["avatar_url"],
         "bannerUrl": r["banner_url"],
+        # Responsive variants (None until generated / for external URLs)
+        "avatarSrcset": srcset_for(r["avatar_url"]),
+        "bannerSrcset": srcset_for(r["banner_url"]),
         "socials": {**socials, "extras": extras},
     }
 
 async def _ensure_table(con):
-    ddl = """
-    create table if not exists profile (
-        id uuid primary key,
-        full_name text not null default '',
-        headline text null,
-        bio text null,
-        location text null,
-        email text null,
-        phone text null,
-        avatar_url text null,
-        banner_url text null,
-        socials jsonb null,
-        created_at timestamptz not null default now(),
-        updated_at timestamptz null
-    );
-    alter table profile
-        add column if not exists full_name text not null default '',
-        add column if not exists headline text,
-        add column if not exists bio text,
-        add column if not exists location text,
-        add column if not exists email text,
-        add column if not exists phone text,
-        add column if not exists avatar_url text,
-        add column if not exists banner_url text,
-        add column if not exists socials jsonb,
-        add column if not exists updated_at timestamptz;
-    """
-    await con.execute(ddl)
+    # Schema lives in app/migrations.py; no-op once startup has migrated.
+    await ensure_migrated(con)
+
+GET_SQL = register("profile.get", """
+    select id, full_name, headline, bio, location, email, phone, avatar_url, banner_url, socials
+    from profile
+    order by id asc
+    limit 1;
+""")
+
+async def fetch_profile(con):
+    await _ensure_table(con)
+    row = await con.fetchrow(GET_SQL)
+    if not row:
+        return None
+    await load_srcsets((row["avatar_url"], row["banner_url"]))
+    return _read_profile_row(row)
+
+async def _load_profile():
+    async with pool().acquire() as con:
+        return await fetch_profile(con)
 
 @router.get("/api/profile")
-async def get_profile():
-    async with pool().acquire() as con:
-        await _ensure_table(con)
-        row = await con.fetchrow("""
-            select id, full_name, headline, bio, location, email, phone, avatar_url, banner_url, socials
-            from profile
-            order by id asc
-            limit 1;
-        """)
-    return _read_profile_row(row) if row else None
+async def get_profile(request: Request):
+    return await response_cache.cached("profile", request, _load_profile)
 
 def _merge_socials(current_socials: dict, incoming: dict, body: dict) -> dict:
     """
@@ -116,6 +108,7 @@ def _merge_socials(current_socials: dict, incoming: dict, body: dict) -> dict:
     return merged
 
 @router.api_route("/api/profile", methods=["POST", "PUT"])
+@response_cache.invalidates("profile")
 async def upsert_profile(body: dict, user=Depends(require_owner)):
     """
     Accept both POST and PUT to solve 405 for clients that POST first.
@@ -166,4 +159,5 @@ async def upsert_profile(body: dict, user=Depends(require_owner)):
     if not saved:
         raise HTTPException(status_code=500, detail="Failed to save profile")
 
+    await load_srcsets((saved["avatar_url"], saved["banner_url"]))
     return _read_profile_row(saved)
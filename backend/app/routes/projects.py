@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from ..db import pool
+from ..migrations import ensure_migrated
+from ..queries import register
+from .. import response_cache
 from ..auth import require_owner
 import json
 
@@ -41,32 +44,30 @@ def _read_project_row(r) -> dict:
     }
 
 async def _ensure_columns(con):
-    ddl = """
-    alter table if exists projects
-        add column if not exists summary_html text,
-        add column if not exists links jsonb,
-        add column if not exists client text,
-        add column if not exists role text,
-        add column if not exists location text,
-        add column if not exists start_date text,
-        add column if not exists end_date text,
-        add column if not exists status text;
-    """
-    await con.execute(ddl)
+    # Schema lives in app/migrations.py; no-op once startup has migrated.
+    await ensure_migrated(con)
+
+LIST_SQL = register("projects.list", """
+    select id, name, slug, summary_html, tech_stack, images,
+           coalesce(links,'{}'::jsonb) as links,
+           featured, sort_order,
+           client, role, location, start_date, end_date, status
+    from projects
+    order by sort_order asc, name asc;
+""")
+
+async def fetch_projects(con) -> list:
+    await _ensure_columns(con)
+    rows = await con.fetch(LIST_SQL)
+    return [_read_project_row(r) for r in rows]
 
-@router.get("/api/projects")
-async def list_projects():
+async def _load_projects() -> list:
     async with pool().acquire() as con:
-        await _ensure_columns(con)
-        rows = await con.fetch("""
-            select id, name, slug, summary_html, tech_stack, images,
-                   coalesce(links,'{}'::jsonb) as links,
-                   featured, sort_order,
-                   client, role, location, start_date, end_date, status
-            from projects
-            order by sort_order asc, name asc;
-        """)
-    return [_read_project_row(r) for r in rows]
+        return await fetch_projects(con)
+
+@router.get("/api/projects")
+async def list_projects(request: Request):
+    return await response_cache.cached("projects", request, _load_projects)
 
 def _incoming_links_from_body(body: dict):
     """
@@ -82,6 +83,7 @@ def _incoming_links_from_body(body: dict):
     return None
 
 @router.post("/api/projects")
+@response_cache.invalidates("projects")
 async def create_project(body: dict, user=Depends(require_owner)):
     name = (body.get("name") or "").strip()
     final_slug = (body.get("slug") or None) or (name.lower().replace(" ", "-") if name else None)
@@ -127,6 +129,7 @@ async def create_project(body: dict, user=Depends(require_owner)):
     return _read_project_row(row)
 
 @router.put("/api/projects/{id}")
+@response_cache.invalidates("projects")
 async def update_project(id: str, body: dict, user=Depends(require_owner)):
     name = (body.get("name") or "").strip()
     final_slug = (body.get("slug") or None) or (name.lower().replace(" ", "-") if name else None)
@@ -186,6 +189,7 @@ async def update_project(id: str, body: dict, user=Depends(require_owner)):
     return _read_project_row(row)
 
 @router.delete("/api/projects/{id}")
+@response_cache.invalidates("projects")
 async def delete_project(id: str, user=Depends(require_owner)):
     async with pool().acquire() as con:
         res = await con.execute("delete from projects where id=$1;", id)
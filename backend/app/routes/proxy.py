@@ -1,8 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Body, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional, Set
+import asyncio
+import os
+import time
 import httpx
+import orjson
 import urllib.parse as up
 
+from ..cache import SingleFlight, TTLCache
+from ..config import settings
+from ..disk_cache import DiskCache, TooLarge
+from ..static_files import file_response
+from ..storage import upload_root
+
 router = APIRouter()
 
 # Strict allow-list to guard against SSRF
@@ -18,6 +29,110 @@ UA = "Mozilla/5.0 (PortfolioBot/1.1)"
 MAX_BYTES = 6 * 1024 * 1024  # 6 MB cap for proxy to avoid huge downloads
 TIMEOUT = httpx.Timeout(15.0)  # connect/read/write total timeout
 
+# One keep-alive pool for the whole app instead of a handshake per call
+LIMITS = httpx.Limits(
+    max_connections=settings.proxy_max_connections,
+    max_keepalive_connections=max(1, settings.proxy_max_connections // 2),
+    keepalive_expiry=30.0,
+)
+
+
+# Resolve results: fresh for 6h, then served stale (and refreshed) for up to a day
+RESOLVE_TTL = 6 * 3600
+RESOLVE_STALE_TTL = 24 * 3600
+RESOLVE_NEGATIVE_TTL = 5 * 60
+
+# Batch resolve guards
+MAX_BATCH = 100
+BATCH_CONCURRENCY = 8
+
+# Proxied bodies are served from disk without revalidation for this long
+PROXY_CACHE_TTL = 3600
+PROXY_CACHE_DIRNAME = "_proxy_cache"
+
+# --------------------------- Shared upstream client ---------------------------
+
+_client: Optional[httpx.AsyncClient] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def _http2_enabled() -> bool:
+    if not settings.proxy_http2:
+        return False
+    try:
+        import h2  # noqa: F401  (pip install httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+
+def get_client() -> httpx.AsyncClient:
+    """Application-lifetime client; created lazily if startup didn't open it."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=TIMEOUT,
+            limits=LIMITS,
+            http2=_http2_enabled(),
+            headers={"User-Agent": UA},
+        )
+    return _client
+
+
+async def open_client() -> httpx.AsyncClient:
+    return get_client()
+
+
+async def close_client():
+    global _client
+    c, _client = _client, None
+    if c is not None and not c.is_closed:
+        await c.aclose()
+
+
+_resolve_cache = TTLCache(maxsize=2048, ttl=RESOLVE_TTL, stale_ttl=RESOLVE_STALE_TTL)
+_resolve_flight = SingleFlight()
+_background: Set[asyncio.Task] = set()
+
+
+def _host_slot(host: str) -> asyncio.Semaphore:
+    # Per-host cap so a burst of gallery views can't fan out into hundreds of sockets
+    sem = _host_slots.get(host)
+    if sem is None:
+        sem = _host_slots[host] = asyncio.Semaphore(max(1, settings.proxy_per_host_limit))
+    return sem
+
+
+_disk_cache: Optional[DiskCache] = None
+_fill_flight = SingleFlight()
+
+
+def _proxy_cache() -> DiskCache:
+    global _disk_cache
+    if _disk_cache is None:
+        _disk_cache = DiskCache(
+            os.path.join(upload_root(), PROXY_CACHE_DIRNAME),
+            max_bytes=settings.proxy_cache_max_mb * 1024 * 1024,
+        )
+    return _disk_cache
+
+
+# ------------------------------- Helpers --------------------------------------
+
+def _normalize_url(raw_url: str) -> str:
+    """
+    Canonical cache key: lower-case scheme/host, no default port or fragment, sorted query.
+    Only ever a key: upstream is fetched with the caller's URL (signed URLs may depend on order).
+    """
+    u = up.urlparse(raw_url.strip())
+    scheme = u.scheme.lower()
+    host = (u.hostname or "").lower()
+    port = u.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    query = up.urlencode(sorted(up.parse_qsl(u.query, keep_blank_values=True)))
+    return up.urlunparse((scheme, netloc, u.path or "/", u.params, query, ""))
+
 
 def _validate_url(raw_url: str) -> up.ParseResult:
     try:
@@ -35,18 +150,15 @@ def _validate_url(raw_url: str) -> up.ParseResult:
     return u
 
 
-@router.post("/api/certificates/resolve")
-async def resolve_cert(url: str = Query(..., max_length=2048)):
-    """
-    Resolve a URL on an allow-list, following redirects,
-    and return headers/metadata without downloading the full body.
-    """
-    _validate_url(url)
+# ------------------------------- Routes ---------------------------------------
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=TIMEOUT) as client:
+async def _resolve_upstream(url: str) -> dict:
+    u = up.urlparse(url)
+    client = get_client()
+    async with _host_slot(u.hostname):
         try:
-            # Use stream=True so body is not preloaded
-            r = await client.get(url, headers={"User-Agent": UA}, stream=True)
+            # Stream so the body is not preloaded
+            r = await client.send(client.build_request("GET", url), stream=True)
             ct = r.headers.get("content-type")
             ln = r.headers.get("content-length")
             # Close the stream since we don't need the body
@@ -64,50 +176,181 @@ async def resolve_cert(url: str = Query(..., max_length=2048)):
             return {"ok": False, "status": 502, "error": str(ex)}
 
 
-@router.get("/api/certificates/proxy")
-async def proxy_cert(url: str = Query(..., max_length=2048)):
+def _transient(result: dict) -> bool:
+    # Timeouts, transport errors, 5xx and 429 say nothing about the URL itself
+    return "error" in result or result.get("status", 0) >= 500 or result.get("status") == 429
+
+
+async def _resolve_and_store(key: str, url: str, previous: Optional[dict] = None) -> dict:
+    result = await _resolve_upstream(url)
+    if result.get("ok"):
+        _resolve_cache.set(key, result)
+    elif previous is not None and previous.get("ok") and _transient(result):
+        # stale-if-error: keep serving the last good answer, retry after the negative TTL
+        _resolve_cache.set(key, previous, ttl=RESOLVE_NEGATIVE_TTL, stale_ttl=RESOLVE_STALE_TTL)
+        return previous
+    else:
+        # Negative caching: don't hammer upstream for URLs that keep failing
+        _resolve_cache.set(key, result, ttl=RESOLVE_NEGATIVE_TTL, stale_ttl=0)
+    return result
+
+
+def _revalidate_in_background(key: str, url: str, previous: dict) -> None:
+    if key in _resolve_flight:
+        return
+    task = asyncio.ensure_future(_resolve_flight.do(key, lambda: _resolve_and_store(key, url, previous)))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def resolve_cached(url: str) -> dict:
     """
-    Stream the (small) remote resource through this server for CORS reasons.
-    Only allow-listed hosts are permitted. Enforces a size cap.
+    Resolve through the TTL cache: fresh hits return immediately, stale hits return
+    immediately and refresh in the background, misses share one upstream request.
+    """
+    url = url.strip()
+    key = _normalize_url(url)
+    entry = _resolve_cache.get(key)
+    if entry is not None:
+        if not entry.fresh:
+            _revalidate_in_background(key, url, entry.value)
+        return entry.value
+    return await _resolve_flight.do(key, lambda: _resolve_and_store(key, url))
+
+
+@router.post("/api/certificates/resolve")
+async def resolve_cert(url: str = Query(..., max_length=2048)):
+    """
+    Resolve a URL on an allow-list, following redirects,
+    and return headers/metadata without downloading the full body.
     """
     _validate_url(url)
+    return await resolve_cached(url)
+
+
+@router.post("/api/certificates/resolve:batch")
+async def resolve_cert_batch(body: Any = Body(...)):
+    """
+    Resolve many URLs in one request. Body: {"urls": [...]} (or a bare list).
+    Every URL is checked against the allow-list individually; results stream
+    back as NDJSON lines ({"index", "url", ...resolve fields}) as they finish.
+    """
+    urls = body.get("urls") if isinstance(body, dict) else body
+    if not isinstance(urls, list) or not urls:
+        raise HTTPException(status_code=400, detail="urls must be a non-empty list")
+    if len(urls) > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH} urls per batch")
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=TIMEOUT) as client:
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _one(i: int, raw: Any):
+        if not isinstance(raw, str) or not raw.strip() or len(raw) > 2048:
+            return i, raw, {"ok": False, "status": 400, "error": "invalid url"}
         try:
-            r = await client.get(url, headers={"User-Agent": UA}, stream=True)
+            _validate_url(raw)
+        except HTTPException as ex:
+            return i, raw, {"ok": False, "status": ex.status_code, "error": ex.detail}
+        async with sem:
+            return i, raw, await resolve_cached(raw)
 
-            # Size guard (if server provides length)
-            content_length = r.headers.get("content-length")
-            if content_length and content_length.isdigit():
-                if int(content_length) > MAX_BYTES:
-                    await r.aclose()
-                    raise HTTPException(status_code=413, detail="Upstream content too large")
-
-            media_type = r.headers.get("content-type") or "application/octet-stream"
-
-            async def _iter():
-                total = 0
-                async for chunk in r.aiter_bytes(chunk_size=65536):
-                    total += len(chunk)
-                    if total > MAX_BYTES:
-                        # Stop streaming and close upstream; client receives partial body.
-                        # Prefer guarding via content-length above where possible.
-                        await r.aclose()
-                        raise HTTPException(status_code=413, detail="Upstream content too large")
-                    yield chunk
-                await r.aclose()
-
-            headers = {
-                "Cache-Control": "public, max-age=3600",
-                "X-Content-Type-Options": "nosniff",
-            }
+    async def _stream():
+        tasks = [asyncio.ensure_future(_one(i, u)) for i, u in enumerate(urls)]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                i, raw, result = await fut
+                yield orjson.dumps({"index": i, "url": raw, **result}) + b"\n"
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
 
-            return StreamingResponse(_iter(), media_type=media_type, headers=headers)
 
-        except HTTPException:
-            # Re-raise our size guard errors
-            raise
+async def _refresh_cached(key: str, url: str, meta: Optional[dict]) -> dict:
+    """
+    Fetch `url` into the disk cache under `key`, revalidating with the stored validators when
+    we already hold a copy. Serves the old copy if upstream fails (stale-if-error).
+    """
+    client = get_client()
+    headers = {}
+    if meta:
+        if meta.get("upstreamEtag"):
+            headers["If-None-Match"] = meta["upstreamEtag"]
+        if meta.get("upstreamLastModified"):
+            headers["If-Modified-Since"] = meta["upstreamLastModified"]
+
+    async with _host_slot(up.urlparse(url).hostname):
+        try:
+            r = await client.send(client.build_request("GET", url, headers=headers), stream=True)
         except httpx.TimeoutException as ex:
+            if meta:
+                return meta
             raise HTTPException(status_code=504, detail=f"Upstream timeout: {ex}")
         except httpx.HTTPError as ex:
+            if meta:
+                return meta
             raise HTTPException(status_code=502, detail=f"Upstream fetch failed: {ex}")
+
+        try:
+            if r.status_code == 304 and meta:
+                return await _proxy_cache().revalidated(key, meta)
+            if not r.is_success:
+                if meta:
+                    return meta
+                raise HTTPException(status_code=502, detail=f"Upstream returned {r.status_code}")
+
+            # Size guard (if server provides length); the fill enforces it for the rest
+            content_length = r.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Upstream content too large")
+
+            fresh = {
+                "url": url,
+                "contentType": r.headers.get("content-type") or "application/octet-stream",
+                "upstreamEtag": r.headers.get("etag"),
+                "upstreamLastModified": r.headers.get("last-modified"),
+            }
+            try:
+                return await _proxy_cache().fill(key, r.aiter_bytes(chunk_size=65536), fresh, MAX_BYTES)
+            except TooLarge:
+                raise HTTPException(status_code=413, detail="Upstream content too large")
+        finally:
+            await r.aclose()
+
+
+@router.get("/api/certificates/proxy")
+async def proxy_cert(request: Request, url: str = Query(..., max_length=2048)):
+    """
+    Serve the (small) remote resource through this server for CORS reasons.
+    Only allow-listed hosts are permitted. Bodies are cached on disk under the
+    web root and revalidated upstream with If-None-Match once PROXY_CACHE_TTL
+    has passed; the size cap is enforced when the cache is filled.
+    """
+    _validate_url(url)
+    url = url.strip()
+    key = _normalize_url(url)
+    cache = _proxy_cache()
+
+    headers = {
+        "Cache-Control": "public, max-age=3600",
+        "X-Content-Type-Options": "nosniff",
+    }
+
+    for _attempt in range(2):
+        meta = await cache.lookup(key)
+        if meta is None or time.time() - meta.get("validatedAt", 0) > PROXY_CACHE_TTL:
+            meta = await _fill_flight.do(key, lambda m=meta: _refresh_cached(key, url, m))
+        else:
+            cache.touch(key)
+        try:
+            return file_response(
+                request,
+                cache.body_path(key),
+                media_type=meta.get("contentType"),
+                etag=meta.get("etag"),
+                headers=headers,
+            )
+        except FileNotFoundError:
+            # Evicted between lookup and send; fetch again once
+            continue
+    raise HTTPException(status_code=503, detail="Proxy cache unavailable")
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from ..db import pool
+from ..migrations import ensure_migrated
+from ..queries import register
+from .. import response_cache
 from ..auth import require_owner
 
 router = APIRouter()
@@ -18,31 +21,8 @@ def _read_row(r) -> dict:
 
 
 async def _ensure_table(con):
-    # Flexible schema: keep level as TEXT so you can store "Beginner/Advanced" or "90"
-    ddl = """
-    create table if not exists skills (
-        id uuid primary key,
-        name text not null,
-        category text null,
-        level text null,
-        sort_order int not null default 0,
-        created_at timestamptz not null default now(),
-        updated_at timestamptz null
-    );
-
-    -- Idempotent "add column if not exists" to evolve older DBs
-    alter table skills
-        add column if not exists category text,
-        add column if not exists level text,
-        add column if not exists sort_order int not null default 0,
-        add column if not exists created_at timestamptz not null default now(),
-        add column if not exists updated_at timestamptz;
-
-    -- Helpful indexes
-    create index if not exists idx_skills_sort on skills (sort_order asc, name asc);
-    create index if not exists idx_skills_category on skills (category);
-    """
-    await con.execute(ddl)
+    # Schema lives in app/migrations.py; no-op once startup has migrated.
+    await ensure_migrated(con)
 
 
 def _no_rows(res: str) -> bool:
@@ -53,21 +33,31 @@ def _no_rows(res: str) -> bool:
         return res.endswith("0")
 
 
-@router.get("/api/skills")
-async def list_skills():
-    async with pool().acquire() as con:
-        await _ensure_table(con)
-        rows = await con.fetch(
-            """
-            select id, name, category, level, sort_order, created_at, updated_at
-            from skills
-            order by sort_order asc, name asc;
-            """
-        )
+LIST_SQL = register("skills.list", """
+    select id, name, category, level, sort_order, created_at, updated_at
+    from skills
+    order by sort_order asc, name asc;
+""")
+
+
+async def fetch_skills(con) -> list:
+    await _ensure_table(con)
+    rows = await con.fetch(LIST_SQL)
     return [_read_row(r) for r in rows]
 
 
+async def _load_skills() -> list:
+    async with pool().acquire() as con:
+        return await fetch_skills(con)
+
+
+@router.get("/api/skills")
+async def list_skills(request: Request):
+    return await response_cache.cached("skills", request, _load_skills)
+
+
 @router.post("/api/skills")
+@response_cache.invalidates("skills")
 async def create_skill(body: dict, user=Depends(require_owner)):
     name = (body.get("name") or "").strip()
     if not name:
@@ -97,6 +87,7 @@ async def create_skill(body: dict, user=Depends(require_owner)):
 
 
 @router.put("/api/skills/{id}")
+@response_cache.invalidates("skills")
 async def update_skill(id: str, body: dict, user=Depends(require_owner)):
     name = (body.get("name") or "").strip()
     if not name:
@@ -130,6 +121,7 @@ async def update_skill(id: str, body: dict, user=Depends(require_owner)):
 
 
 @router.delete("/api/skills/{id}")
+@response_cache.invalidates("skills")
 async def delete_skill(id: str, user=Depends(require_owner)):
     async with pool().acquire() as con:
         await _ensure_table(con)
@@ -1,56 +1,15 @@
-import os
-import secrets
 from typing import Optional
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from .. import upload_gc
 from ..auth import require_owner
-from ..config import settings
+from ..images import schedule_variants
+from ..storage import save_upload
 
 router = APIRouter()
 
-# Limits & allow list
-MAX_BYTES = 10 * 1024 * 1024  # 10MB hard cap for profile images
-# We intentionally disallow SVG for profile images (XSS vector in some renderers)
-ALLOWED_DETECTED = {"jpeg": ".jpg", "png": ".png", "gif": ".gif", "webp": ".webp"}
-ALLOWED_CONTENT_TYPES = {
-    "image/jpeg",
-    "image/png",
-    "image/gif",
-    "image/webp",
-}
-
-CHUNK_SIZE = 1024 * 1024  # 1MB
-
-
-def _resolve_upload_root() -> str:
-    # Prefer configured root; else use local /uploads next to backend
-    webroot = settings.web_root or os.path.join(
-        os.path.dirname(__file__), "..", "..", "uploads"
-    )
-    webroot = os.path.abspath(webroot)
-    os.makedirs(webroot, exist_ok=True)
-    return webroot
-
-
-def _sniff_image_ext(first_bytes: bytes) -> Optional[str]:
-    """
-    Try to determine image type from header.
-    Returns a safe extension (including dot) or None.
-    """
-    try:
-        import imghdr
-
-        kind = imghdr.what(None, h=first_bytes)
-        if kind in ALLOWED_DETECTED:
-            return ALLOWED_DETECTED[kind]
-    except Exception:
-        # imghdr failure — fall through
-        pass
-    return None
-
-
-def _content_type_ok(ct: Optional[str]) -> bool:
-    return (ct or "").lower() in ALLOWED_CONTENT_TYPES
+# 10MB hard cap for profile images; type checks/sniffing live in app/storage.py
+MAX_BYTES = 10 * 1024 * 1024
 
 
 @router.post("/api/upload/profile-image")
@@ -60,93 +19,39 @@ async def upload_profile_image(
     if not file:
         raise HTTPException(status_code=400, detail="No file provided.")
 
-    # Read a small header to validate type and also start counting size
-    head = await file.read(512)
-    if not head:
-        raise HTTPException(status_code=400, detail="Empty file.")
-
-    # Validate content type (from client) AND try to sniff
-    client_ct = (file.content_type or "").lower()
-    if not _content_type_ok(client_ct):
-        # Some browsers may send generic types; allow if we can sniff safely
-        sniff_ext = _sniff_image_ext(head)
-        if not sniff_ext:
-            raise HTTPException(
-                status_code=400,
-                detail="Unsupported image type. Allowed: JPEG, PNG, GIF, WEBP.",
-            )
-        # Map sniffed type back to a content type for response
-        ct_by_ext = {
-            ".jpg": "image/jpeg",
-            ".png": "image/png",
-            ".gif": "image/gif",
-            ".webp": "image/webp",
-        }
-        server_ct = ct_by_ext.get(sniff_ext, "application/octet-stream")
-    else:
-        # Content type looks fine; still prefer sniffed ext if we can
-        sniff_ext = _sniff_image_ext(head)
-        if not sniff_ext:
-            # If sniffing failed, fall back to CT-derived extension
-            sniff_ext = {
-                "image/jpeg": ".jpg",
-                "image/png": ".png",
-                "image/gif": ".gif",
-                "image/webp": ".webp",
-            }.get(client_ct, ".bin")
-        server_ct = client_ct
-
-    # Generate safe name with our own extension (ignore user-supplied name/ext)
-    fname = f"{secrets.token_hex(16)}{sniff_ext}"
-
-    # Write stream to disk with limit enforcement
-    webroot = _resolve_upload_root()
-    full_path = os.path.join(webroot, fname)
-
-    bytes_written = 0
     try:
-        with open(full_path, "wb") as out:
-            # write head we already read
-            out.write(head)
-            bytes_written += len(head)
-            if bytes_written > MAX_BYTES:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File too large (> {MAX_BYTES // (1024*1024)}MB).",
-                )
-
-            while True:
-                chunk = await file.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-                out.write(chunk)
-                bytes_written += len(chunk)
-                if bytes_written > MAX_BYTES:
-                    raise HTTPException(
-                        status_code=413,
-                        detail=f"File too large (> {MAX_BYTES // (1024*1024)}MB).",
-                    )
+        stored = await save_upload(file, max_bytes=MAX_BYTES)
     except HTTPException:
-        # Remove partial file on limit/type errors
-        try:
-            if os.path.exists(full_path):
-                os.remove(full_path)
-        finally:
-            raise
+        raise
     except Exception as ex:
-        # Clean up and return 500-ish
-        try:
-            if os.path.exists(full_path):
-                os.remove(full_path)
-        finally:
-            raise HTTPException(status_code=500, detail=f"Upload failed: {ex}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {ex}")
 
-    # Build public URL; your static server should map /uploads -> webroot
-    public_url = f"/uploads/{fname}"
+    # Resized WebP/AVIF copies are rendered in the background
+    schedule_variants(stored.url)
 
+    # Static server maps /uploads -> upload_root()
     return {
-        "url": public_url,
-        "filename": fname,
-        "size": bytes_written,
-        "contentType": server_ct,
+        "url": stored.url,
+        "filename": stored.filename,
+        "size": stored.size,
+        "contentType": stored.content_type,
     }
+
+
+# ------------------------------ GC (owner) ------------------------------
+
+@router.get("/api/upload/gc/report")
+async def upload_gc_report(
+    grace_hours: Optional[float] = Query(None, alias="graceHours", ge=0),
+    user=Depends(require_owner),
+):
+    """Dry run: what the sweeper would delete right now (nothing is removed)."""
+    try:
+        return await upload_gc.sweep(dry_run=True, grace_hours=grace_hours)
+    except RuntimeError as ex:
+        raise HTTPException(status_code=503, detail=str(ex))
+
+
+@router.get("/api/upload/gc/metrics")
+async def upload_gc_metrics(user=Depends(require_owner)):
+    return upload_gc.metrics
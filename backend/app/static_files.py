@@ -0,0 +1,164 @@
+# app/static_files.py
+"""
+File responses with validators and byte ranges.
+
+Starlette's FileResponse (0.38) has no Range support, so cached/static files
+are served through `file_response()` here:
+
+  - If-None-Match / If-Modified-Since  -> 304
+  - Range: bytes=a-b (single range)    -> 206, or 416 when unsatisfiable
+  - body via the ASGI "http.response.zerocopysend" extension (sendfile) when
+    the server offers it, otherwise chunked reads off the event loop.
+"""
+import os
+import stat as stat_mod
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 64 * 1024
+
+
+def http_date(ts: float) -> str:
+    return formatdate(ts, usegmt=True)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into an inclusive (start, end).
+    Returns None when the header is absent/ignorable (multi-range, other units),
+    raises ValueError when it is unsatisfiable.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            # suffix range: last N bytes
+            n = int(last)
+            if n <= 0:
+                raise ValueError("empty suffix range")
+            start, end = max(0, size - n), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+            end = min(end, size - 1)
+    except (TypeError, ValueError):
+        raise ValueError("invalid range")
+    if start < 0 or start > end or start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # weak comparison is fine for GET/HEAD
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((t[2:] if t.startswith("W/") else t) == bare for t in tags)
+
+
+def not_modified(request_headers: Mapping[str, str], etag: Optional[str], mtime: Optional[float]) -> bool:
+    inm = request_headers.get("if-none-match")
+    if inm is not None:
+        return bool(etag) and _etag_matches(inm, etag)
+    ims = request_headers.get("if-modified-since")
+    if ims and mtime is not None:
+        try:
+            return int(mtime) <= int(parsedate_to_datetime(ims).timestamp())
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class _FileBodyResponse(Response):
+    """Sends `length` bytes of `path` starting at `offset` (headers prepared by the caller)."""
+
+    def __init__(self, path: str, offset: int, length: int, status_code: int, headers: dict, media_type: Optional[str]):
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in scope.get("extensions", {}):
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            finally:
+                os.close(fd)
+        else:
+            async with await anyio.open_file(self.path, "rb") as f:
+                await f.seek(self.offset)
+                remaining = self.length
+                while remaining > 0:
+                    chunk = await f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+def file_response(
+    request: Request,
+    path: str,
+    *,
+    media_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    headers: Optional[dict] = None,
+    st: Optional[os.stat_result] = None,
+) -> Response:
+    """Build a 200/206/304/416 response for `path` honouring validators and Range."""
+    st = st or os.stat(path)
+    if not stat_mod.S_ISREG(st.st_mode):
+        return Response(status_code=404)
+    size = st.st_size
+    base = {
+        "accept-ranges": "bytes",
+        "last-modified": http_date(st.st_mtime),
+        **(headers or {}),
+    }
+    if etag:
+        base["etag"] = etag
+
+    if not_modified(request.headers, etag, st.st_mtime):
+        return Response(status_code=304, headers=base)
+
+    # If-Range: only honour the range when the validator still matches
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range.strip() != (etag or "") and if_range.strip() != base["last-modified"]:
+        range_header = None
+
+    try:
+        rng = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**base, "content-range": f"bytes */{size}"})
+
+    if rng is None:
+        return _FileBodyResponse(path, 0, size, 200, base, media_type)
+    start, end = rng
+    base["content-range"] = f"bytes {start}-{end}/{size}"
+    return _FileBodyResponse(path, start, end - start + 1, 206, base, media_type)
@@ -0,0 +1,261 @@
+# app/storage.py
+"""
+Upload storage shared by every route that writes under /uploads.
+
+  - upload_root():  the single directory served at /uploads (WEB_ROOT, else
+                    backend/uploads). Routes must not compute their own.
+  - detect_image(): magic-byte sniffing (imghdr is deprecated and removed in 3.13).
+  - save_upload():  streams an UploadFile to disk with a size cap. File I/O runs
+                    on a small dedicated thread pool so a multi-MB upload never
+                    blocks the event loop; the file is written to a temp name,
+                    optionally fsynced, and committed with an atomic rename.
+
+Files are content-addressed: the sha256 is computed while streaming and the
+file lands at <root>/ab/cd/<sha256><ext>. Identical bytes are stored once (the
+existing URL is returned) and a URL never changes meaning, so it can be cached
+forever.
+"""
+import asyncio
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from .config import settings
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+SNIFF_BYTES = 512
+B64_CHUNK_CHARS = 4 * 64 * 1024  # decodes to 192KB per step
+MAX_IMAGE_BYTES = 10 * 1024 * 1024  # 10MB default cap for images
+
+# We intentionally disallow SVG (XSS vector in some renderers)
+IMAGE_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+_root: Optional[str] = None
+_io_pool: Optional[ThreadPoolExecutor] = None
+
+
+def upload_root() -> str:
+    global _root
+    if _root is None:
+        root = settings.web_root or os.path.join(os.path.dirname(__file__), "..", "uploads")
+        root = os.path.abspath(root)
+        os.makedirs(root, exist_ok=True)
+        _root = root
+    return _root
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.upload_io_workers),
+            thread_name_prefix="upload-io",
+        )
+    return _io_pool
+
+
+async def run_io(fn, *args):
+    """Run blocking file I/O on the bounded upload pool."""
+    return await asyncio.get_running_loop().run_in_executor(_pool(), fn, *args)
+
+
+def shutdown_io() -> None:
+    global _io_pool
+    p, _io_pool = _io_pool, None
+    if p is not None:
+        p.shutdown(wait=False)
+
+
+# ------------------------------ sniffing ------------------------------
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Content type from magic bytes, or None if not an allowed image."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def detect_image(head: bytes, client_ct: Optional[str]) -> Tuple[str, str]:
+    """
+    (extension, content type) for an image upload. Sniffed bytes win; a declared
+    allowed content type is accepted as a fallback. Raises 400 otherwise.
+    """
+    ct = sniff_image_type(head)
+    if ct is None:
+        ct = (client_ct or "").lower()
+        if ct not in IMAGE_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail="Unsupported image type. Allowed: JPEG, PNG, GIF, WEBP.",
+            )
+    return IMAGE_TYPES[ct], ct
+
+
+# ------------------------------ writing ------------------------------
+
+def content_path(digest: str, ext: str) -> str:
+    """Sharded relative path for a digest (keeps directories small)."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+class HashingFile:
+    """Temp file under `root` that hashes what it writes; committed under its digest."""
+
+    def __init__(self, root: str):
+        self.root = root
+        fd, self.tmp = tempfile.mkstemp(dir=root, prefix=".", suffix=".part")
+        self._f = os.fdopen(fd, "wb")
+        self._sha = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+        self._sha.update(data)
+
+    def commit(self, ext: str, fsync: bool = False) -> str:
+        """Rename into the content-addressed location; returns the relative path."""
+        self._f.close()
+        rel = content_path(self._sha.hexdigest(), ext)
+        dest = os.path.join(self.root, rel)
+        if os.path.exists(dest):
+            # Identical bytes already stored. Touch it: the upload GC only spares
+            # unreferenced files younger than its grace period, and this one
+            # is about to be handed out again.
+            os.remove(self.tmp)
+            os.utime(dest)
+            return rel
+        if fsync:
+            with open(self.tmp, "rb") as f:
+                os.fsync(f.fileno())
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(self.tmp, dest)
+        return rel
+
+    def abort(self) -> None:
+        try:
+            self._f.close()
+        finally:
+            try:
+                os.remove(self.tmp)
+            except OSError:
+                pass
+
+
+@dataclass
+class StoredFile:
+    filename: str
+    url: str
+    size: int
+    content_type: str
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large (> {max_bytes // (1024 * 1024)}MB).")
+
+
+async def save_upload(up: UploadFile, *, max_bytes: int = MAX_IMAGE_BYTES) -> StoredFile:
+    """Validate, stream and commit an uploaded image under upload_root()."""
+    try:
+        head = await up.read(SNIFF_BYTES)
+        if not head:
+            raise HTTPException(status_code=400, detail="Empty file.")
+        ext, ct = detect_image(head, up.content_type)
+
+        # Name comes from the content digest; the user-supplied filename is ignored
+        out = await run_io(HashingFile, upload_root())
+        size = 0
+        try:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                await run_io(out.write, chunk)
+                chunk = await up.read(CHUNK_SIZE)
+            name = await run_io(out.commit, ext, settings.upload_fsync)
+        except BaseException:
+            await asyncio.shield(run_io(out.abort))
+            raise
+    finally:
+        await up.close()
+
+    return StoredFile(filename=name, url=f"/uploads/{name}", size=size, content_type=ct)
+
+
+# Only the header is matched; the payload is never run through a regex
+_DATA_URL_HEAD = re.compile(r"^data:(image/[a-zA-Z0-9.+-]+);base64,")
+
+
+def store_data_url(data_url: str, root: Optional[str] = None, max_bytes: int = MAX_IMAGE_BYTES) -> Optional[StoredFile]:
+    """
+    Decode a base64 image data URL into the store in fixed-size chunks (no full
+    decoded copy in memory). Returns None if it isn't a valid image data URL
+    (strict base64, non-empty, magic bytes of an allowed image: unlike uploads the
+    declared type is not trusted) and raises 413 if the decoded size would exceed
+    `max_bytes` (checked before decoding).
+    Blocking; call through run_io() / save_data_url() from async code.
+    """
+    m = _DATA_URL_HEAD.match(data_url[:128] if data_url else "")
+    if not m:
+        return None
+    start = m.end()
+    # Upper bound of the decoded size, before spending any work on it
+    if (len(data_url) - start) // 4 * 3 > max_bytes + 2:
+        raise _too_large(max_bytes)
+
+    out = HashingFile(root or upload_root())
+    size = 0
+    ext = ct = None
+    try:
+        carry = ""
+        for i in range(start, len(data_url), B64_CHUNK_CHARS):
+            piece = carry + data_url[i:i + B64_CHUNK_CHARS]
+            if any(ws in piece for ws in "\r\n\t "):
+                piece = "".join(piece.split())  # tolerate wrapped base64
+            cut = len(piece) - len(piece) % 4
+            carry = piece[cut:]
+            raw = binascii.a2b_base64(piece[:cut], strict_mode=True)
+            if ext is None:
+                ct = sniff_image_type(raw[:SNIFF_BYTES])
+                if ct is None:
+                    out.abort()
+                    return None
+                ext = IMAGE_TYPES[ct]
+            size += len(raw)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            out.write(raw)
+        if carry or ext is None or size == 0:
+            out.abort()
+            return None
+        rel = out.commit(ext, settings.upload_fsync)
+    except binascii.Error:
+        out.abort()
+        return None
+    except BaseException:
+        out.abort()
+        raise
+    return StoredFile(filename=rel, url=f"/uploads/{rel}", size=size, content_type=ct)
+
+
+async def save_data_url(data_url: str, max_bytes: int = MAX_IMAGE_BYTES) -> Optional[StoredFile]:
+    """Async wrapper: decode + write happen on the upload I/O pool."""
+    return await run_io(store_data_url, data_url, None, max_bytes)
+
@@ -0,0 +1,274 @@
+# app/upload_gc.py
+"""
+Garbage collection for the uploads directory.
+
+Nothing else ever deletes uploads, so replaced avatars, edited certificate
+images, deleted BIM entries and abandoned upload-image calls accumulate. A
+sweep:
+
+  1. builds the live set: every `/uploads/...` reference in the columns listed
+     in SOURCES. The regex runs in Postgres and rows are streamed through a
+     server-side cursor, so only the matched paths reach Python;
+  2. walks the upload root one directory at a time (listing and deletes off
+     the event loop), skipping _proxy_cache/ and dotfiles other than stale
+     `.part` temp files;
+  3. treats a file as live if its key is referenced. The key is the digest
+     for content-addressed files (so variants, manifests and .br/.gz siblings
+     follow their original), else the relative path;
+  4. removes unreferenced files older than the grace period (unless dry-run).
+
+A sweep never deletes anything unless the whole live set was built; any DB
+error aborts it. `start()` runs it every UPLOAD_GC_INTERVAL_HOURS. Every
+worker schedules it, so the sweep runs inside one transaction holding
+pg_try_advisory_xact_lock: the workers that don't get the lock skip the pass
+(a transaction-scoped lock, since a session lock/unlock pair may land on
+different server sessions behind PgBouncer transaction pooling).
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from .config import settings
+from .db import get_pool
+from .introspect import table_columns
+from .storage import upload_root
+
+logger = logging.getLogger("app.upload_gc")
+
+# table -> text-ish columns that may reference uploads (missing ones are skipped)
+SOURCES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("profile", ("avatar_url", "banner_url", "socials")),
+    ("certificates", ("image_url", "description")),
+    ("projects", ("images", "summary_html")),
+    ("posts", ("cover_image_url", "body_html")),
+    ("home_settings", ("welcome_html",)),
+    ("highlights", ("body_html", "icon")),
+    ("bim_blocks", ("value",)),
+)
+
+# Everything after /uploads/ up to a quote, whitespace, query, or HTML/CSS/srcset delimiter
+REF_PATTERN = r"""/uploads/([^"'[:space:]?#)<>,\\]+)"""
+
+CURSOR_PREFETCH = 500
+SKIP_DIRS = {"_proxy_cache"}
+REPORT_SAMPLE = 200
+
+_CONTENT_KEY = re.compile(r"^([0-9a-f]{64})(?:\.|$)")
+
+# Arbitrary constant, distinct from the migrations' lock key
+_ADVISORY_LOCK_KEY = 0x75706763  # "upgc"
+TRY_LOCK_SQL = "select pg_try_advisory_xact_lock($1);"
+
+_lock = asyncio.Lock()
+_task: Optional[asyncio.Task] = None
+
+metrics: Dict[str, object] = {
+    "runs": 0,
+    "running": False,
+    "lastRunAt": None,
+    "lastDurationMs": None,
+    "lastDryRun": None,
+    "lastOrphans": None,
+    "lastOrphanBytes": None,
+    "filesDeletedTotal": 0,
+    "bytesReclaimedTotal": 0,
+    "lastError": None,
+    "skipped": 0,
+}
+
+
+def file_key(rel: str) -> str:
+    """Liveness key: digest for content-addressed files (incl. variants/siblings), else the path."""
+    base = os.path.basename(rel)
+    for suffix in (".br", ".gz"):
+        if base.endswith(suffix):
+            base = base[: -len(suffix)]
+    m = _CONTENT_KEY.match(base)
+    return m.group(1) if m else rel
+
+
+# ------------------------------ live set ------------------------------
+
+async def _live_keys(con) -> Tuple[Set[str], int]:
+    """Call inside a transaction (server-side cursors need one)."""
+    keys: Set[str] = set()
+    refs = 0
+    for table, wanted in SOURCES:
+        cols = [c for c in wanted if c in await table_columns(con, table)]
+        if not cols:
+            continue
+        doc = ", ".join(f"t.{c}::text" for c in cols)
+        sql = (
+            f"select m[1] as path from {table} t, "
+            f"regexp_matches(concat_ws(' ', {doc}), $1, 'g') as m;"
+        )
+        async for r in con.cursor(sql, REF_PATTERN, prefetch=CURSOR_PREFETCH):
+            refs += 1
+            keys.add(file_key(unquote(r["path"]).lstrip("/")))
+    return keys, refs
+
+
+# ------------------------------ scanning ------------------------------
+
+def _list_dir(path: str):
+    dirs, files = [], []
+    with os.scandir(path) as it:
+        for e in it:
+            if e.is_dir(follow_symlinks=False):
+                if e.name not in SKIP_DIRS and not e.name.startswith("."):
+                    dirs.append(e.path)
+            elif e.is_file(follow_symlinks=False):
+                if e.name.startswith(".") and not e.name.endswith(".part"):
+                    continue  # .gitkeep and friends
+                st = e.stat(follow_symlinks=False)
+                files.append((e.path, st.st_size, st.st_mtime))
+    return dirs, files
+
+
+def _remove(paths: List[str]) -> int:
+    freed = 0
+    for p in paths:
+        try:
+            size = os.path.getsize(p)
+            os.remove(p)
+            freed += size
+        except OSError:
+            continue
+    return freed
+
+
+def _prune_empty(path: str, root: str) -> None:
+    while path != root and path.startswith(root + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+async def sweep(dry_run: bool = True, grace_hours: Optional[float] = None) -> dict:
+    """Run one GC pass and return a report. Only one sweep runs at a time."""
+    grace = settings.upload_gc_grace_hours if grace_hours is None else grace_hours
+    async with _lock:
+        metrics["running"] = True
+        started = time.time()
+        try:
+            report = await _sweep(dry_run, grace, started)
+            metrics["lastError"] = None
+            return report
+        except Exception as e:
+            metrics["lastError"] = f"{e.__class__.__name__}: {e}"
+            raise
+        finally:
+            metrics["running"] = False
+            metrics["runs"] += 1
+            metrics["lastRunAt"] = started
+            metrics["lastDurationMs"] = round((time.time() - started) * 1000)
+            metrics["lastDryRun"] = dry_run
+
+
+async def _sweep(dry_run: bool, grace_hours: float, started: float) -> dict:
+    p = get_pool()
+    if p is None:
+        raise RuntimeError("database not ready")
+    # The lock lives as long as this transaction, i.e. for the whole pass
+    async with p.acquire() as con, con.transaction(readonly=True):
+        if not await con.fetchval(TRY_LOCK_SQL, _ADVISORY_LOCK_KEY):
+            metrics["skipped"] += 1
+            return {"dryRun": dry_run, "skipped": True, "reason": "another worker is sweeping"}
+        live, refs = await _live_keys(con)
+        return await _scan(live, refs, dry_run, grace_hours, started)
+
+
+async def _scan(live: Set[str], refs: int, dry_run: bool, grace_hours: float, started: float) -> dict:
+    root = upload_root()
+    cutoff = started - grace_hours * 3600
+    scanned = scanned_bytes = orphans = orphan_bytes = deleted = freed = 0
+    sample = []
+
+    pending = [root]
+    while pending:
+        d = pending.pop()
+        try:
+            subdirs, files = await asyncio.to_thread(_list_dir, d)
+        except OSError:
+            continue
+        pending.extend(subdirs)
+
+        doomed = []
+        for path, size, mtime in files:
+            scanned += 1
+            scanned_bytes += size
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if file_key(rel) in live or mtime > cutoff:
+                continue
+            orphans += 1
+            orphan_bytes += size
+            if len(sample) < REPORT_SAMPLE:
+                sample.append({"path": rel, "size": size, "ageHours": round((started - mtime) / 3600, 1)})
+            doomed.append(path)
+
+        if doomed and not dry_run:
+            freed_here = await asyncio.to_thread(_remove, doomed)
+            deleted += len(doomed)
+            freed += freed_here
+            if d != root:
+                await asyncio.to_thread(_prune_empty, d, root)
+
+    metrics["lastOrphans"] = orphans
+    metrics["lastOrphanBytes"] = orphan_bytes
+    metrics["filesDeletedTotal"] += deleted
+    metrics["bytesReclaimedTotal"] += freed
+    if not dry_run and deleted:
+        logger.warning("[uploads-gc] removed %d files, %d bytes", deleted, freed)
+
+    return {
+        "dryRun": dry_run,
+        "graceHours": grace_hours,
+        "liveReferences": refs,
+        "liveKeys": len(live),
+        "filesScanned": scanned,
+        "bytesScanned": scanned_bytes,
+        "orphans": orphans,
+        "orphanBytes": orphan_bytes,
+        "deleted": deleted,
+        "bytesReclaimed": freed,
+        "durationMs": round((time.time() - started) * 1000),
+        "sample": sample,
+    }
+
+
+# ------------------------------ scheduling ------------------------------
+
+async def _loop(interval_sec: float) -> None:
+    # First pass after a short delay so startup and migrations settle
+    await asyncio.sleep(min(interval_sec, 600))
+    while True:
+        try:
+            await sweep(dry_run=False)
+        except Exception as e:
+            print("[API] Upload GC failed: {}: {}".format(e.__class__.__name__, e))
+        await asyncio.sleep(interval_sec)
+
+
+def start() -> bool:
+    global _task
+    if settings.upload_gc_interval_hours <= 0 or _task is not None:
+        return False
+    _task = asyncio.create_task(_loop(settings.upload_gc_interval_hours * 3600))
+    return True
+
+
+async def stop() -> None:
+    global _task
+    t, _task = _task, None
+    if t is not None:
+        t.cancel()
+        try:
+            await t
+        except asyncio.CancelledError:
+            pass
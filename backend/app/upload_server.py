@@ -0,0 +1,166 @@
+# app/upload_server.py
+"""
+ASGI app serving /uploads (replaces the plain StaticFiles mount).
+
+  - Content-addressed files (<sha256>[.wNNN].<ext>, see app/storage.py) never
+    change, so they get `Cache-Control: public, max-age=31536000, immutable`
+    and their digest as a strong ETag, for free.
+  - Other (legacy, random-named) files get `no-cache` plus a strong sha256 ETag
+    computed once per (path, size, mtime) and kept in memory.
+  - Range / If-None-Match / If-Range via app.static_files (sendfile when the
+    server supports the zerocopysend extension).
+  - For compressible types a precompressed `<file>.br` / `<file>.gz` sibling is
+    served when the client accepts it.
+  - Temp files (dot-prefixed) and the proxy cache directory are not served.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import stat as stat_mod
+from typing import Optional, Tuple
+from urllib.parse import unquote
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from .cache import TTLCache
+from .static_files import file_response
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_CONTENT_NAME = re.compile(r"^([0-9a-f]{64})(?:\.w\d+)?\.[a-z0-9]+$")
+
+COMPRESSIBLE_PREFIXES = ("text/",)
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+# Preference order when the client accepts several
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+HIDDEN_DIRS = {"_proxy_cache"}
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+def _compressible(media_type: Optional[str]) -> bool:
+    if not media_type:
+        return False
+    return media_type.startswith(COMPRESSIBLE_PREFIXES) or media_type in COMPRESSIBLE_TYPES
+
+
+def _accepts(header: str, coding: str) -> bool:
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def _hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _route_path(scope: Scope) -> str:
+    """Path below the mount point (Mount keeps the full path and extends root_path)."""
+    path, root = scope.get("path", ""), scope.get("root_path", "")
+    return path[len(root):] if root and path.startswith(root) else path
+
+
+class UploadsApp:
+    def __init__(self, directory: str, etag_cache_size: int = 8192):
+        self.root = os.path.realpath(directory)
+        # (path, size, mtime_ns) -> strong etag; entries never go stale by key
+        self._etags = TTLCache(maxsize=etag_cache_size, ttl=float("inf"))
+
+    # ------------------------------ lookup ------------------------------
+
+    def _resolve(self, rel: str) -> Optional[str]:
+        parts = [p for p in unquote(rel).split("/") if p]
+        if not parts or any(p.startswith(".") or p in HIDDEN_DIRS for p in parts):
+            return None
+        path = os.path.realpath(os.path.join(self.root, *parts))
+        if not path.startswith(self.root + os.sep):
+            return None
+        return path
+
+    async def _etag(self, path: str, st: os.stat_result) -> str:
+        m = _CONTENT_NAME.match(os.path.basename(path))
+        if m:
+            return f'"{m.group(1)}"'
+        key = (path, st.st_size, st.st_mtime_ns)
+        entry = self._etags.get(key)
+        if entry is not None:
+            return entry.value
+        etag = f'"{(await anyio.to_thread.run_sync(_hash_file, path))[:32]}"'
+        self._etags.set(key, etag)
+        return etag
+
+    @staticmethod
+    def _stat(path: str) -> Optional[os.stat_result]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st if stat_mod.S_ISREG(st.st_mode) else None
+
+    def _encoded_sibling(self, request: Request, path: str) -> Optional[Tuple[str, str, os.stat_result]]:
+        accept = request.headers.get("accept-encoding", "")
+        if not accept:
+            return None
+        for coding, suffix in ENCODINGS:
+            if _accepts(accept, coding):
+                st = self._stat(path + suffix)
+                if st is not None:
+                    return coding, path + suffix, st
+        return None
+
+    # ------------------------------ ASGI ------------------------------
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        request = Request(scope, receive)
+        response = await self._respond(request)
+        await response(scope, receive, send)
+
+    async def _respond(self, request: Request) -> Response:
+        if request.method not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+
+        path = self._resolve(_route_path(request.scope))
+        st = self._stat(path) if path else None
+        if st is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        immutable = bool(_CONTENT_NAME.match(os.path.basename(path)))
+        headers = {
+            "cache-control": IMMUTABLE if immutable else REVALIDATE,
+            "x-content-type-options": "nosniff",
+        }
+        etag = await self._etag(path, st)
+
+        if _compressible(media_type):
+            headers["vary"] = "Accept-Encoding"
+            encoded = self._encoded_sibling(request, path)
+            if encoded is not None:
+                coding, enc_path, enc_st = encoded
+                headers["content-encoding"] = coding
+                # Distinct representation -> distinct strong validator
+                return file_response(
+                    request, enc_path, media_type=media_type,
+                    etag=f'{etag[:-1]}-{coding}"', headers=headers, st=enc_st,
+                )
+
+        return file_response(request, path, media_type=media_type, etag=etag, headers=headers, st=st)
@@ -1,6 +1,5 @@
 \
 import re
-import base64
 import os
 from datetime import datetime, timezone
 from typing import Optional, Tuple
@@ -54,27 +53,3 @@ def to_year_month(dt: datetime) -> str:
 
 def to_year_month_or_none(dt: Optional[datetime]) -> Optional[str]:
     return dt.strftime("%Y-%m") if dt else None
-
-def save_data_url_image(data_url: str, folder_abs: str) -> Optional[str]:
-    m = re.match(r"^data:(image/[a-zA-Z0-9.+-]+);base64,(.+)$", data_url or "")
-    if not m:
-        return None
-    mime = m.group(1).lower()
-    b64 = m.group(2)
-    try:
-        raw = base64.b64decode(b64)
-    except Exception:
-        return None
-    ext = {
-        "image/png": ".png",
-        "image/jpeg": ".jpg",
-        "image/jpg": ".jpg",
-        "image/webp": ".webp",
-        "image/gif": ".gif",
-    }.get(mime, ".bin")
-    os.makedirs(folder_abs, exist_ok=True)
-    name = f"{os.urandom(16).hex()}{ext}"
-    path = os.path.join(folder_abs, name)
-    with open(path, "wb") as f:
-        f.write(raw)
-    return f"/uploads/{name}"
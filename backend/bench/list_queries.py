@@ -0,0 +1,104 @@
+"""
+Before/after benchmark for the prepared-statement pool mode.
+
+Runs the registered list/read statements behind the public list endpoints
+against DATABASE_URL, once with the pooler-safe pool (statement cache off, the
+old behaviour) and once with DB_POOL_MODE=session (cached prepared statements),
+and prints per-query latency.
+
+    cd backend
+    python -m bench.list_queries --iterations 500 --concurrency 8
+
+Point it at a direct/session-pooled connection; behind PgBouncer in
+transaction mode only the "transaction" column is meaningful.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import asyncpg
+
+from app.config import settings
+from app.db import _sslctx
+from app.queries import registered
+# Importing the routers registers their statements.
+from app.routes import (  # noqa: F401
+    posts, projects, profile, experience, skills, languages, certificates_gallery, home, bim,
+)
+
+# (registry name, args) for the statements behind GET list endpoints
+CASES = [
+    ("bim.list", ()),
+    ("posts.count", ()),
+    ("posts.list", (10, 0)),
+    ("certificates.gallery", ()),
+    ("certificates.list", ()),
+    ("projects.list", ()),
+    ("experience.list", ()),
+    ("skills.list", ()),
+    ("languages.list", ()),
+    ("profile.get", ()),
+    ("home.highlights", ()),
+]
+
+
+async def _run_case(p, sql, args, iterations, concurrency):
+    timings = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            async with p.acquire() as con:
+                t0 = time.perf_counter()
+                await con.fetch(sql, *args)
+                timings.append((time.perf_counter() - t0) * 1000.0)
+
+    await asyncio.gather(*(one() for _ in range(iterations)))
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+async def _bench_mode(dsn, cache_size, iterations, concurrency):
+    p = await asyncpg.create_pool(
+        dsn, statement_cache_size=cache_size, min_size=concurrency, max_size=concurrency, ssl=_sslctx,
+    )
+    queries = registered()
+    out = {}
+    try:
+        for name, args in CASES:
+            try:
+                # Warm every connection so both modes are measured in steady state
+                await _run_case(p, queries[name], args, concurrency * 2, concurrency)
+                out[name] = await _run_case(p, queries[name], args, iterations, concurrency)
+            except asyncpg.PostgresError as e:
+                out[name] = e.__class__.__name__
+    finally:
+        await p.close()
+    return out
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--iterations", type=int, default=300)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--cache-size", type=int, default=settings.db_statement_cache_size)
+    args = ap.parse_args()
+
+    if not settings.database_url:
+        raise SystemExit("DATABASE_URL is not set")
+
+    before = await _bench_mode(settings.database_url, 0, args.iterations, args.concurrency)
+    after = await _bench_mode(settings.database_url, args.cache_size, args.iterations, args.concurrency)
+
+    print(f"{'query':<24} {'transaction p50/p95 ms':>24} {'session p50/p95 ms':>22} {'p50 speedup':>12}")
+    for name, _ in CASES:
+        b, a = before.get(name), after.get(name)
+        if not isinstance(b, tuple) or not isinstance(a, tuple):
+            print(f"{name:<24} {str(b):>24} {str(a):>22}")
+            continue
+        print(f"{name:<24} {b[0]:>11.2f} / {b[1]:<10.2f} {a[0]:>9.2f} / {a[1]:<10.2f} {b[0] / a[0]:>10.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Before/after benchmark for the posts list projection.
+
+Copies the `posts` table definition (columns, generated word_count, indexes)
+into a scratch schema on DATABASE_URL, fills it with a fixture of published
+posts with realistic HTML bodies, and times one GET /api/posts page the way
+the route builds it (fetch, row reader, JSON encode) with the old full rows
+and with the summary projection. It also reports the encoded payload size.
+
+    cd backend
+    python -m bench.posts_listing --posts 1000 --body-kb 20 --iterations 200
+
+Needs a database that has been migrated once (the app started against it);
+the scratch schema is dropped afterwards.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import asyncpg
+
+from app.config import settings
+from app.db import _sslctx
+from app.responses import dumps
+from app.routes.posts import PROJECTIONS
+
+WORDS = (
+    "revit ifc model family parameter schedule sheet view level grid wall slab beam column "
+    "clash coordination workflow dynamo script export import template phase workset link"
+).split()
+
+
+def _body(rng: random.Random, kb: int) -> str:
+    parts = []
+    size = 0
+    while size < kb * 1024:
+        p = "<p>" + " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + "</p>"
+        parts.append(p)
+        size += len(p)
+    return "".join(parts)
+
+
+async def _fixture(con, schema: str, n: int, body_kb: int) -> None:
+    rng = random.Random(42)
+    await con.execute(f"CREATE SCHEMA {schema};")
+    await con.execute(f"CREATE TABLE {schema}.posts (LIKE public.posts INCLUDING ALL);")
+    rows = [
+        (
+            f"Post {i}", f"post-{i}", f"Excerpt for post {i}", ["bim"] if i % 3 == 0 else [],
+            "published", _body(rng, body_kb), '{"color": "#4f46e5"}',
+        )
+        for i in range(n)
+    ]
+    await con.executemany(
+        f"""
+        INSERT INTO {schema}.posts (title, slug, excerpt, tags, status, body_html, meta, published_at)
+        VALUES ($1, $2, $3, $4, $5, $6, $7::jsonb, now() - random() * interval '1000 days');
+        """,
+        rows,
+    )
+    await con.execute(f"ANALYZE {schema}.posts;")
+
+
+async def _run_case(p, projection, page_size, iterations):
+    queries, read_row = PROJECTIONS[projection]
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        async with p.acquire() as con:
+            t0 = time.perf_counter()
+            rows = await con.fetch(queries.page, page_size + 1, 0)
+            body = dumps({"items": [read_row(r) for r in rows[:page_size]]})
+            timings.append((time.perf_counter() - t0) * 1000.0)
+        size = len(body)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1], size
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=1000)
+    ap.add_argument("--body-kb", type=int, default=20)
+    ap.add_argument("--iterations", type=int, default=200)
+    args = ap.parse_args()
+
+    if not settings.database_url:
+        raise SystemExit("DATABASE_URL is not set")
+
+    schema = f"bench_posts_{os.getpid()}"
+    con = await asyncpg.connect(settings.database_url, ssl=_sslctx)
+    try:
+        print(f"Creating {args.posts} posts (~{args.body_kb} KB bodies) in {schema} ...")
+        await _fixture(con, schema, args.posts, args.body_kb)
+
+        p = await asyncpg.create_pool(
+            settings.database_url, min_size=1, max_size=1, ssl=_sslctx,
+            server_settings={"search_path": schema},
+        )
+        try:
+            print(f"{'pageSize':>8} {'full p50/p95 ms':>18} {'summary p50/p95 ms':>20} {'full KB':>9} {'summary KB':>11}")
+            for page_size in (10, 50):
+                full = await _run_case(p, "full", page_size, args.iterations)
+                summary = await _run_case(p, "summary", page_size, args.iterations)
+                print(
+                    f"{page_size:>8} {full[0]:>8.2f} / {full[1]:<7.2f} {summary[0]:>9.2f} / {summary[1]:<8.2f}"
+                    f" {full[2] / 1024:>9.1f} {summary[2] / 1024:>11.1f}"
+                )
+        finally:
+            await p.close()
+    finally:
+        await con.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+        await con.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -112,6 +112,7 @@ async function sendJson(path, method, body) {
     throw new Error(msg);
   }
 
+  if (method !== "GET") retireBootstrap();
   if (res.status === 204) return null;
   return parseMaybeJson(res);
 }
@@ -146,6 +147,7 @@ async function sendForm(path, formData) {
     }
     throw new Error(msg);
   }
+  retireBootstrap();
   return parseMaybeJson(res);
 }
 
@@ -179,6 +181,7 @@ async function deleteWithFallback(resource, id) {
   if (id == null) throw new Error(`Missing id for delete ${resource}`);
   const idStr = encodeURIComponent(String(id));
   const token = getOwnerToken();
+  retireBootstrap();
   const baseHeaders = { Accept: "application/json" };
   if (token) {
     baseHeaders.Authorization = `Bearer ${token}`;
@@ -237,19 +240,45 @@ async function deleteWithFallback(resource, id) {
   }
 }
 
+/* ---------------------------- First-paint bootstrap ---------------------------- */
+
+/**
+ * GET /api/bootstrap returns profile, home, skills, languages, experience,
+ * education, projects and gallery in one response (same shapes as their own
+ * endpoints). The first read of each section within BOOTSTRAP_TTL_MS is served
+ * from that one request; later reads (refresh after an edit, revisits) hit the
+ * section's endpoint. Any owner write also retires the blob.
+ */
+const BOOTSTRAP_TTL_MS = 60000;
+let bootstrap = null; // { at, promise, used: Set }
+
+function retireBootstrap() {
+  bootstrap = null;
+}
+
+function fromBootstrap(key, fallback) {
+  const now = Date.now();
+  if (!bootstrap || now - bootstrap.at > BOOTSTRAP_TTL_MS) {
+    bootstrap = { at: now, promise: getJson("/api/bootstrap").catch(() => null), used: new Set() };
+  }
+  if (bootstrap.used.has(key)) return fallback();
+  bootstrap.used.add(key);
+  return bootstrap.promise.then((b) => (b && key in b ? b[key] : fallback()));
+}
+
 /* ------------------------------- Public GETs ------------------------------ */
 
 export const getHealth     = () => getJson("/api/health");
-export const getProfile    = () => getJson("/api/profile");
-export const getProjects   = () => getJson("/api/projects");
-export const getSkills     = () => getJson("/api/skills");
-export const getEducation  = () => getJson("/api/education");
-export const getExperience = () => getJson("/api/experience");
+export const getProfile    = () => fromBootstrap("profile", () => getJson("/api/profile"));
+export const getProjects   = () => fromBootstrap("projects", () => getJson("/api/projects"));
+export const getSkills     = () => fromBootstrap("skills", () => getJson("/api/skills"));
+export const getEducation  = () => fromBootstrap("education", () => getJson("/api/education"));
+export const getExperience = () => fromBootstrap("experience", () => getJson("/api/experience"));
 
 /** Primary gallery read. If backend still returns 405 on /api/gallery, fall back to /api/certificates */
 export const getGallery = async () => {
   try {
-    const r = await getJson("/api/gallery");
+    const r = await fromBootstrap("gallery", () => getJson("/api/gallery"));
     return Array.isArray(r) ? r : (Array.isArray(r?.items) ? r.items : []);
   } catch (e) {
     const msg = String(e?.message || "");
@@ -270,16 +299,20 @@ export const getGallery = async () => {
 };
 
 export const getCertificates = () => getJson("/api/certificates");
-export const getLanguages = () => getJson("/api/languages");
+export const getLanguages = () => fromBootstrap("languages", () => getJson("/api/languages"));
 
-export const getPosts = ({ page = 1, pageSize = 10, tag } = {}) =>
-  getJson(`/api/posts?page=${page}&pageSize=${pageSize}${tag ? `&tag=${encodeURIComponent(tag)}` : ""}`);
+// Items are summaries (no bodyHtml/meta/theme) unless `fields` asks for more ("full" or a comma list)
+export const getPosts = ({ page = 1, pageSize = 10, tag, fields } = {}) =>
+  getJson(
+    `/api/posts?page=${page}&pageSize=${pageSize}` +
+      `${tag ? `&tag=${encodeURIComponent(tag)}` : ""}${fields ? `&fields=${encodeURIComponent(fields)}` : ""}`
+  );
 
 export const getPost = (slug) => getJson(`/api/posts/${encodeURIComponent(slug)}`);
 
 /* ----------------------------- Home / Highlights ----------------------------- */
 
-export const getHome = () => getJson("/api/home");
+export const getHome = () => fromBootstrap("home", () => getJson("/api/home"));
 export const getHighlights = () => getJson("/api/highlights");
 
 /** Update welcome (Owner auth required).
@@ -416,6 +449,46 @@ export const deleteCertificate = (id)          => deleteWithFallback("gallery",
 export const resolveCertificateUrl = (url) =>
   sendJson("/api/certificates/resolve", "POST", { url });
 
+const RESOLVE_BATCH_MAX = 100; // backend MAX_BATCH
+
+/**
+ * Resolve many cert URLs with one request per 100 URLs. The server streams
+ * NDJSON lines ({index, url, ok, status, ...}) as each finishes; `onResult`
+ * gets every line as it arrives. Resolves once all lines have been read.
+ */
+export async function resolveCertificateUrls(urls, onResult) {
+  for (let start = 0; start < urls.length; start += RESOLVE_BATCH_MAX) {
+    const chunk = urls.slice(start, start + RESOLVE_BATCH_MAX);
+    const res = await doFetch(apiUrl("/api/certificates/resolve:batch"), {
+      method: "POST",
+      headers: { "Content-Type": "application/json", Accept: "application/x-ndjson" },
+      body: JSON.stringify({ urls: chunk }),
+    });
+    if (!res.ok) {
+      const body = await parseMaybeJson(res);
+      throw new Error(typeof body === "string" && body ? body : `${res.status} ${res.statusText}`);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buf = "";
+    const emit = (line) => {
+      if (!line.trim()) return;
+      const r = JSON.parse(line);
+      onResult({ ...r, index: r.index + start });
+    };
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buf += decoder.decode(value, { stream: true });
+      const lines = buf.split("\n");
+      buf = lines.pop();
+      lines.forEach(emit);
+    }
+    emit(buf + decoder.decode());
+  }
+}
+
 /* -------------------------------- Blog CRUD ------------------------------- */
 export const createPost = (payload)            => sendJson("/api/posts", "POST", payload);
 export const updatePost = (id, payload)        => sendJson(`/api/posts/${encodeURIComponent(String(id))}`, "PUT", payload);
@@ -202,6 +202,32 @@ function PasswordPromptModal({ onClose, onSubmit, darkMode, action = "perform th
   );
 }
 
+/* ---------- BIM index ---------- */
+const INDEX_PAGE_SIZE = 20;
+const SEARCH_LIMIT = 50;
+const SEARCH_DEBOUNCE_MS = 300;
+// Index summaries carry block_count; full entries carry blocks
+const countBlocks = (item) => item?.block_count ?? item?.blocks?.length ?? 0;
+
+// /api/bim/search snippets mark hits with <mark>…</mark>; everything else is plain text
+function SearchSnippet({ text = "" }) {
+  return (
+    <>
+      {String(text)
+        .split(/<\/?mark>/)
+        .map((part, i) =>
+          i % 2 ? (
+            <mark key={i} className="bg-amber-200 text-slate-900 rounded px-0.5">
+              {part}
+            </mark>
+          ) : (
+            <React.Fragment key={i}>{part}</React.Fragment>
+          )
+        )}
+    </>
+  );
+}
+
 /* ---------- fetch helper ---------- */
 async function fetchJSON(path, options = {}) {
   let res = await fetch(api(path), options);
@@ -286,7 +312,7 @@ function DeleteConfirmationModal({ item, onConfirm, onCancel, darkMode }) {
     return () => clearTimeout(timer);
   }, []);
 
-  const blockCount = item?.blocks?.length || 0;
+  const blockCount = countBlocks(item);
   const hasContent = blockCount > 0;
   const confirmationWord = "DELETE";
   const isConfirmValid = confirmText.trim().toUpperCase() === confirmationWord;
@@ -858,6 +884,12 @@ export default function BIMDisplay() {
   const [passwordPrompt, setPasswordPrompt] = useState(null);
   const [searchQuery, setSearchQuery] = useState("");
   const [filterFavorites, setFilterFavorites] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // null while not searching; otherwise the ranked /api/bim/search hits
+  const [searchResults, setSearchResults] = useState(null);
+  const [searching, setSearching] = useState(false);
+  const loadMoreRef = useRef(null);
   const [sortBy, setSortBy] = useState("recent");
   const navigate = useNavigate();
 
@@ -883,12 +915,14 @@ export default function BIMDisplay() {
     return () => window.removeEventListener('showPasswordPrompt', handlePasswordPrompt);
   }, []);
 
+  // The list renders index summaries (title, tags, block_count, preview) one
+  // page at a time; full blocks are fetched per entry when opened or duplicated.
   const load = useCallback(async () => {
     try {
       setLoading(true);
-      const data = await fetchJSON("/api/bim");
-      const itemsArray = Array.isArray(data) ? data : [];
-      setItems(itemsArray);
+      const data = await fetchJSON(`/api/bim?limit=${INDEX_PAGE_SIZE}`);
+      setItems(Array.isArray(data?.items) ? data.items : []);
+      setNextCursor(data?.nextCursor || null);
       setErr("");
     } catch (e) {
       setErr(e?.message || "Failed to load BIM entries");
@@ -901,9 +935,74 @@ export default function BIMDisplay() {
     load();
   }, [load]);
 
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const data = await fetchJSON(
+        `/api/bim?limit=${INDEX_PAGE_SIZE}&cursor=${encodeURIComponent(nextCursor)}`
+      );
+      const page = Array.isArray(data?.items) ? data.items : [];
+      setItems((prev) => {
+        const seen = new Set(prev.map((p) => p.id));
+        return [...prev, ...page.filter((p) => !seen.has(p.id))];
+      });
+      setNextCursor(data?.nextCursor || null);
+    } catch (e) {
+      alert(e?.message || "Failed to load more entries");
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [nextCursor, loadingMore]);
+
+  // Next page when the end of the list scrolls into view ("Load more" as fallback)
+  useEffect(() => {
+    const el = loadMoreRef.current;
+    if (!el || !nextCursor || searchResults || typeof IntersectionObserver === "undefined") return;
+    const observer = new IntersectionObserver(
+      (entries) => entries.some((en) => en.isIntersecting) && loadMore(),
+      { rootMargin: "400px" }
+    );
+    observer.observe(el);
+    return () => observer.disconnect();
+  }, [nextCursor, searchResults, loadMore]);
+
+  // Full-text search runs on the server (/api/bim/search), not over loaded pages
+  useEffect(() => {
+    const q = searchQuery.trim();
+    if (!q) {
+      setSearchResults(null);
+      setSearching(false);
+      return;
+    }
+    let cancelled = false;
+    setSearching(true);
+    const timer = setTimeout(async () => {
+      try {
+        const data = await fetchJSON(`/api/bim/search?q=${encodeURIComponent(q)}&limit=${SEARCH_LIMIT}`);
+        if (!cancelled) setSearchResults(Array.isArray(data?.items) ? data.items : []);
+      } catch {
+        // Search unavailable (e.g. index not migrated yet): match loaded titles
+        if (!cancelled) {
+          const query = q.toLowerCase();
+          setSearchResults(items.filter((i) => String(i.title || "").toLowerCase().includes(query)));
+        }
+      } finally {
+        if (!cancelled) setSearching(false);
+      }
+    }, SEARCH_DEBOUNCE_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [searchQuery]);
+
+  const listed = searchResults ?? items;
+
   const onDelete = async (id) => {
     if (!owner) return;
-    const item = items.find(i => i.id === id);
+    const item = listed.find(i => i.id === id);
     if (!item) return;
     setDeleteConfirmItem(item);
   };
@@ -926,7 +1025,9 @@ export default function BIMDisplay() {
           Authorization: `Bearer ${token}`
         } 
       });
-      setItems((prev) => prev.filter((p) => String(p?.id) !== String(deleteConfirmItem.id)));
+      const notDeleted = (p) => String(p?.id) !== String(deleteConfirmItem.id);
+      setItems((prev) => prev.filter(notDeleted));
+      setSearchResults((prev) => (prev ? prev.filter(notDeleted) : prev));
       setDeleteConfirmItem(null);
     } catch (e) {
       alert(e?.message || "Delete failed");
@@ -935,10 +1036,15 @@ export default function BIMDisplay() {
     }
   };
 
-  const handleDuplicate = (id) => {
+  const handleDuplicate = async (id) => {
     if (!owner) return;
-    const item = items.find((i) => i.id === id);
-    if (!item) return;
+    let item;
+    try {
+      item = await fetchEntry(id);
+    } catch (e) {
+      alert(e?.message || "Failed to load entry");
+      return;
+    }
 
     const displayTitle =
       (extractMainTitle(item.blocks || [])?.title || item.title || "Untitled") + " (copy)";
@@ -1008,8 +1114,11 @@ export default function BIMDisplay() {
         },
         body: JSON.stringify({ locked: newLockedState }),
       });
-      
-      await load();
+
+      // Patch the row in place instead of reloading from the first page
+      const withLock = (p) => (p.id === id ? { ...p, locked: newLockedState } : p);
+      setItems((prev) => prev.map(withLock));
+      setSearchResults((prev) => (prev ? prev.map(withLock) : prev));
     } catch (e) {
       alert(`Failed to ${newLockedState ? 'lock' : 'unlock'} entry`);
     } finally {
@@ -1021,15 +1130,21 @@ export default function BIMDisplay() {
     }
   };
 
-  const goView = (id) => {
-    const item = items.find((i) => i.id === id);
-    if (item) {
-      if (item.locked && !owner) {
-        alert("🔒 This entry is locked");
-        return;
-      }
+  const fetchEntry = (id) => fetchJSON(`/api/bim/${encodeURIComponent(id)}`);
+
+  const goView = async (id) => {
+    const summary = listed.find((i) => i.id === id);
+    if (!summary) return;
+    if (summary.locked && !owner) {
+      alert("🔒 This entry is locked");
+      return;
+    }
+    try {
+      const item = await fetchEntry(id);
       const windowId = `window-${Date.now()}-${Math.random()}`;
       setViewingItems(prev => [...prev, { ...item, windowId }]);
+    } catch (e) {
+      alert(e?.message || "Failed to load entry");
     }
   };
 
@@ -1052,17 +1167,9 @@ export default function BIMDisplay() {
     window.dispatchEvent(event);
   };
 
+  // Search hits keep their rank order under "recent"
   const filteredAndSortedItems = useMemo(() => {
-    let result = [...items];
-
-    if (searchQuery) {
-      const query = searchQuery.toLowerCase();
-      result = result.filter(item => {
-        const title = extractMainTitle(item.blocks || [])?.title || item.title || "";
-        const content = item.blocks?.map(b => String(b.value || '').replace(/<[^>]*>/g, '')).join(' ') || "";
-        return title.toLowerCase().includes(query) || content.toLowerCase().includes(query);
-      });
-    }
+    let result = [...listed];
 
     if (filterFavorites) {
       result = result.filter(item => favorites.has(item.id));
@@ -1075,11 +1182,11 @@ export default function BIMDisplay() {
         return titleA.localeCompare(titleB);
       });
     } else if (sortBy === "blocks") {
-      result.sort((a, b) => (b.blocks?.length || 0) - (a.blocks?.length || 0));
+      result.sort((a, b) => countBlocks(b) - countBlocks(a));
     }
 
     return result;
-  }, [items, searchQuery, filterFavorites, favorites, sortBy]);
+  }, [listed, filterFavorites, favorites, sortBy]);
 
   return (
     <div className={`min-h-screen transition-colors duration-300 ${darkMode ? "bg-gradient-to-br from-slate-900 via-slate-800 to-slate-900" : "bg-gradient-to-br from-slate-50 via-blue-50/30 to-slate-50"}`}>
@@ -1206,9 +1313,12 @@ export default function BIMDisplay() {
 
             {(searchQuery || filterFavorites) && (
               <div className={`mt-3 text-sm ${darkMode ? "text-slate-300" : "text-slate-600"}`}>
-                Showing {filteredAndSortedItems.length} of {items.length} entries
-                {searchQuery && ` matching "${searchQuery}"`}
-                {filterFavorites && ` in favorites`}
+                {searching
+                  ? `Searching for "${searchQuery.trim()}"…`
+                  : searchResults
+                    ? `${filteredAndSortedItems.length} ${filteredAndSortedItems.length === 1 ? "entry" : "entries"} matching "${searchQuery.trim()}"`
+                    : `Showing ${filteredAndSortedItems.length} of ${items.length} loaded entries`}
+                {!searching && filterFavorites && ` in favorites`}
               </div>
             )}
           </div>
@@ -1312,14 +1422,19 @@ export default function BIMDisplay() {
                         
                         {isLocal && (
                           <span className="px-3 py-1.5 rounded-lg bg-gradient-to-r from-blue-500 to-cyan-500 text-white text-xs font-bold shadow-sm">
-                            {e.blocks?.length ?? 0} {e.blocks?.length === 1 ? "block" : "blocks"}
+                            {countBlocks(e)} {countBlocks(e) === 1 ? "block" : "blocks"}
                           </span>
                         )}
                       </div>
                     </div>
 
                     <div className="mb-4">
-                      <BlockPreview blocks={e.blocks || []} darkMode={darkMode} locked={e.locked} />
+                      <BlockPreview
+                        blocks={e.blocks || []}
+                        preview={e.snippet ? <SearchSnippet text={e.snippet} /> : e.preview}
+                        darkMode={darkMode}
+                        locked={e.locked}
+                      />
                     </div>
 
                     <div className="flex flex-wrap gap-2 mb-4">
@@ -1430,6 +1545,21 @@ export default function BIMDisplay() {
           </div>
         )}
 
+        {!loading && !err && !searchResults && nextCursor && (
+          <div ref={loadMoreRef} className="flex justify-center">
+            <button
+              type="button"
+              onClick={loadMore}
+              disabled={loadingMore}
+              className={`px-6 py-2 rounded-lg font-semibold transition-colors ${
+                darkMode ? "bg-slate-700 text-slate-100 hover:bg-slate-600" : "bg-white text-slate-700 hover:bg-slate-100 border border-slate-200"
+              } ${loadingMore ? "opacity-60 cursor-wait" : ""}`}
+            >
+              {loadingMore ? "Loading…" : "Load more"}
+            </button>
+          </div>
+        )}
+
         {!loading && !err && filteredAndSortedItems.length > 0 && isLocal && (
           <div className="flex justify-center">
             <button
@@ -1444,7 +1574,7 @@ export default function BIMDisplay() {
           </div>
         )}
 
-        {!loading && !err && items.length > 0 && filteredAndSortedItems.length === 0 && (
+        {!loading && !err && !searching && items.length > 0 && filteredAndSortedItems.length === 0 && (
           <div
             className={`text-center py-24 rounded-2xl border-2 border-dashed shadow-inner ${
               darkMode ? "bg-gradient-to-br from-slate-800 to-slate-700 border-slate-600" : "bg-gradient-to-br from-white to-slate-50 border-slate-300"
@@ -1501,7 +1631,7 @@ export default function BIMDisplay() {
 }
 
 /* ---------- Shared preview body ---------- */
-function PreviewContent({ blocks = [], darkMode = false }) {
+function PreviewContent({ blocks = [], preview = "", darkMode = false }) {
   const groupedBlocks = groupConsecutiveImages(blocks);
   return (
     <div
@@ -1571,6 +1701,11 @@ function PreviewContent({ blocks = [], darkMode = false }) {
 
         return null;
       })}
+      {!groupedBlocks.length && preview && (
+        <div className={`leading-relaxed text-sm ${darkMode ? "text-slate-300" : "text-slate-700"}`}>
+          {preview}
+        </div>
+      )}
       {groupedBlocks.length > 5 && (
         <div className="text-xs italic text-slate-400">+ more content…</div>
       )}
@@ -1620,8 +1755,9 @@ function UnlockedPreviewOverlay({ darkMode = false }) {
 }
 
 /* ---------- Preview wrapper ---------- */
-function BlockPreview({ blocks = [], darkMode = false, locked = false }) {
-  if (!blocks.length) {
+function BlockPreview({ blocks = [], preview = "", darkMode = false, locked = false }) {
+  // Visitors get an empty preview for locked entries; still show the lock overlay
+  if (!blocks.length && !preview && !locked) {
     return (
       <div
         className={`flex items-center justify-center h-24 rounded-lg border ${
@@ -1643,7 +1779,7 @@ function BlockPreview({ blocks = [], darkMode = false, locked = false }) {
       style={{ minHeight: "12rem" }}
     >
       <div className="locked-content-blur">
-        <PreviewContent blocks={blocks} darkMode={darkMode} />
+        <PreviewContent blocks={blocks} preview={preview} darkMode={darkMode} />
       </div>
 
       {locked ? (
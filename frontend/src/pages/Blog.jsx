@@ -139,7 +139,9 @@ function createSnippet(html, maxChars = 200) {
   }
 }
 
-const estimateReadingTime = (html) => {
+// API list items carry a server-side wordCount instead of the body
+const estimateReadingTime = (html, wordCount) => {
+  if (typeof wordCount === "number") return Math.max(1, Math.ceil(wordCount / 200));
   const text = (html || "").replace(/<[^>]*>/g, "");
   const words = text.trim() ? text.trim().split(/\s+/).length : 0;
   return Math.max(1, Math.ceil(words / 200));
@@ -307,6 +309,7 @@ export default function Blog() {
           title,
           bodyHtml,
           content: bodyHtml,
+          wordCount: x.wordCount,
           tags: Array.isArray(x.tags) ? x.tags : [],
           color: x.color || "#6366f1",
           theme: x.theme || { fontFamily: "Inter", basePx: 16, headingScale: 1.15 },
@@ -406,7 +409,7 @@ export default function Blog() {
 
   // Calculate reading stats based on actual data
   const readingStats = useMemo(() => {
-    const totalReadTime = items.reduce((acc, post) => acc + estimateReadingTime(post.bodyHtml), 0);
+    const totalReadTime = items.reduce((acc, post) => acc + estimateReadingTime(post.bodyHtml, post.wordCount), 0);
     const postsRead = recentReads.length;
     
     return {
@@ -851,7 +854,7 @@ export default function Blog() {
               {processedItems.map((post, index) => {
                 const isBookmarked = bookmarks.includes(String(post.id));
                 const isRecent = recentReads.includes(String(post.id));
-                const readingTime = estimateReadingTime(post.bodyHtml);
+                const readingTime = estimateReadingTime(post.bodyHtml, post.wordCount);
                 const progress = readingProgress[String(post.id)]?.progress || 0;
                 const tint = clampAccent(post.color);
 
@@ -432,7 +432,7 @@ export default function BlogEdit() {
         } catch {}
       }
       if (!p) {
-        const list = await apiGetPosts({ page: 1, pageSize: 200 });
+        const list = await apiGetPosts({ page: 1, pageSize: 200, fields: "full" });
         const items = Array.isArray(list?.items) ? list.items : Array.isArray(list) ? list : [];
         const lower = String(needle).toLowerCase();
         p =
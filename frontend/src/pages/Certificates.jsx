@@ -2,6 +2,7 @@
 import { useEffect, useMemo, useState, useRef, useCallback } from "react";
 import { useLocation, useNavigate } from "react-router-dom";
 import { getLocalCertificates, removeLocalCertificate } from "../lib/certsLocal.js";
+import { resolveCertificateUrls } from "../lib/api.js";
 import { useOwnerMode, setOwnerFlag } from "../lib/owner.js";
 
 function normalizeItem(it, idx) {
@@ -13,6 +14,7 @@ function normalizeItem(it, idx) {
     issuer: it.issuer || it.provider || it.platform || "",
     dateMonth, date: dateLabel,
     image: it.imageUrl || it.image || it.url || "",
+    imageSrcset: it.imageSrcset || null,
     credentialUrl: it.credentialUrl || it.verifyUrl || it.link || "",
     credentialId: it.credentialId || it.certificateId || "",
     type: it.type || it.category || "Certificate",
@@ -22,6 +24,17 @@ function normalizeItem(it, idx) {
   };
 }
 
+// Serves the backend's resized AVIF/WebP variants when present; plain <img> otherwise
+function ResponsiveImg({ src, srcset, sizes, ...rest }) {
+  if (!srcset?.sources?.length) return <img src={src} {...rest} />;
+  return (
+    <picture className="contents">
+      {srcset.sources.map((s) => <source key={s.type} type={s.type} srcSet={s.srcset} sizes={sizes} />)}
+      <img src={src} loading="lazy" decoding="async" {...rest} />
+    </picture>
+  );
+}
+
 const SKIP_TITLES = ["portfolio banner", "profile photo"];
 
 function colorFor(str = "") {
@@ -574,13 +587,33 @@ export default function Certificates() {
     } catch { return false; }
   }
 
+  // One batch request checks every credential URL server-side; hosts the server
+  // won't resolve (not on its allow-list) fall back to the browser check.
+  const requestedRef = useRef(new Set());
   useEffect(() => {
-    let cancelled = false;
-    (async () => {
-      const toCheck = filtered.filter((c) => c.credentialUrl && verified[c.id] == null);
-      for (const c of toCheck) { const ok = await verifyUrl(c.credentialUrl); if (cancelled) break; setVerified((prev) => ({ ...prev, [c.id]: ok })); }
-    })();
-    return () => { cancelled = true; };
+    const toCheck = filtered.filter((c) => c.credentialUrl && verified[c.id] == null && !requestedRef.current.has(c.id));
+    if (!toCheck.length) return;
+    toCheck.forEach((c) => requestedRef.current.add(c.id));
+
+    const idsByUrl = new Map();
+    toCheck.forEach((c) => idsByUrl.set(c.credentialUrl, [...(idsByUrl.get(c.credentialUrl) || []), c.id]));
+    const urls = [...idsByUrl.keys()];
+    const mark = (url, ok) => setVerified((prev) => {
+      const next = { ...prev };
+      (idsByUrl.get(url) || []).forEach((id) => { next[id] = ok; });
+      return next;
+    });
+    const checkInBrowser = async (url) => mark(url, await verifyUrl(url));
+
+    const answered = new Set();
+    resolveCertificateUrls(urls, (r) => {
+      const url = urls[r.index];
+      answered.add(url);
+      if (r.status === 400) checkInBrowser(url);
+      else mark(url, !!r.ok);
+    })
+      .catch(() => {})
+      .finally(() => urls.filter((u) => !answered.has(u)).forEach(checkInBrowser));
   }, [filtered, verified]);
 
   const tintFor = (c) => colorFor(c.issuer || c.title);
@@ -702,7 +735,7 @@ export default function Certificates() {
                   return (
                     <div key={c.id} className={`group rounded-xl border p-5 transition-all duration-300 cursor-pointer transform hover:-translate-y-0.5 ${darkMode ? "bg-gradient-to-r from-gray-800 to-gray-900 border-gray-700 text-gray-100 hover:border-indigo-500/50 hover:shadow-xl hover:shadow-indigo-500/10" : "bg-white border-gray-200 text-gray-900 hover:border-indigo-300 hover:shadow-xl hover:shadow-indigo-100"}`} onClick={() => setPreview(c)}>
                       <div className="flex items-center gap-4">
-                        {c.image ? <img src={c.image} alt={c.title} className="w-24 h-24 object-cover rounded-lg shadow-md group-hover:shadow-lg transition-all" /> : <div className={`w-24 h-24 grid place-items-center rounded-lg border-2 border-dashed ${darkMode ? "border-gray-700 bg-gray-900" : "border-gray-300 bg-gray-50"}`}><svg className={`w-10 h-10 opacity-40 ${darkMode ? "text-gray-600" : "text-gray-400"}`} fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={1.5} d="M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z" /></svg></div>}
+                        {c.image ? <ResponsiveImg src={c.image} srcset={c.imageSrcset} sizes="96px" alt={c.title} className="w-24 h-24 object-cover rounded-lg shadow-md group-hover:shadow-lg transition-all" /> : <div className={`w-24 h-24 grid place-items-center rounded-lg border-2 border-dashed ${darkMode ? "border-gray-700 bg-gray-900" : "border-gray-300 bg-gray-50"}`}><svg className={`w-10 h-10 opacity-40 ${darkMode ? "text-gray-600" : "text-gray-400"}`} fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={1.5} d="M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z" /></svg></div>}
                         <div className="flex-1 min-w-0">
                           <h3 className="font-bold text-lg mb-2 group-hover:text-indigo-500 transition-colors truncate">{c.title}</h3>
                           <div className="flex flex-wrap gap-2">
@@ -739,7 +772,7 @@ export default function Certificates() {
                       </div>
                     )}
                     <div className={`aspect-[4/3] grid place-items-center overflow-hidden relative ${darkMode ? "bg-gray-900" : "bg-gradient-to-br from-gray-50 to-gray-100"}`}>
-                      {c.image ? <img src={c.image} alt={c.title} className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-500" /> : <div className={`${darkMode ? "text-gray-300" : "text-gray-500"} text-center`}><svg className="w-16 h-16 mx-auto mb-2 opacity-40" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={1.5} d="M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z" /></svg><span className="text-xs">No image</span></div>}
+                      {c.image ? <ResponsiveImg src={c.image} srcset={c.imageSrcset} sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw" alt={c.title} className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-500" /> : <div className={`${darkMode ? "text-gray-300" : "text-gray-500"} text-center`}><svg className="w-16 h-16 mx-auto mb-2 opacity-40" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={1.5} d="M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z" /></svg><span className="text-xs">No image</span></div>}
                       <div className={`absolute inset-0 opacity-0 group-hover:opacity-100 transition-opacity duration-300 ${darkMode ? "bg-gradient-to-t from-gray-900/80 via-transparent to-transparent" : "bg-gradient-to-t from-white/80 via-transparent to-transparent"}`} />
                     </div>
                     <div className="p-5">